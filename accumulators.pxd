@@ -0,0 +1,25 @@
+cdef class Sums:
+    cdef:
+        readonly object total
+        readonly long count
+
+    cpdef Sums merge(self, Sums)
+    cpdef object mean(self)
+
+
+cdef class Moments:
+    cdef:
+        readonly long count
+        readonly object means, deviations
+
+    cpdef Moments merge(self, Moments)
+    cpdef object variances(self)
+
+
+cdef class Covariance:
+    cdef:
+        readonly long count
+        readonly object means, comoments
+
+    cpdef Covariance merge(self, Covariance)
+    cpdef object correlations(self)
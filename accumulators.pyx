@@ -0,0 +1,136 @@
+"""
+Statistics accumulators that can be exactly merged.
+
+Processors reduce each record to a handful of accumulators; the accumulators
+of different records (possibly computed by different processes, or loaded from
+disk) are then merged as if they were computed over all the data at once.
+"""
+from cython import ccall, cclass, locals, returns
+from numpy import asarray, outer, sqrt
+
+
+@cclass
+class Sums:
+    """
+    Totals of some values together with the number of items they cover.
+    """
+    def __init__(self, total, count):
+        self.total = asarray(total)
+        self.count = count
+
+    @ccall
+    @returns('Sums')
+    @locals(other='Sums')
+    def merge(self, other):
+        """
+        Returns the sums over the items of both accumulators.
+        """
+        return Sums(self.total + other.total, self.count + other.count)
+
+    @ccall
+    @returns('object')
+    def mean(self):
+        """
+        Average values per item.
+        """
+        return self.total / self.count
+
+
+@cclass
+class Moments:
+    """
+    Count, mean and the sum of squared deviations of a sequence of vectors
+    (Welford's method, merged using the formula of Chan et al.).
+    """
+    def __init__(self, values=None):
+        """
+        Accumulates the rows of values (if given).
+        """
+        if values is None:
+            self.count = 0
+            self.means = self.deviations = 0.
+        else:
+            values = asarray(values, dtype='f8')
+            self.count = values.shape[0]
+            self.means = values.mean(axis=0)
+            self.deviations = ((values - self.means) ** 2).sum(axis=0)
+
+    @ccall
+    @returns('Moments')
+    @locals(other='Moments', merged='Moments', count='long')
+    def merge(self, other):
+        """
+        Returns the moments of the rows of both accumulators.
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+        count = self.count + other.count
+        delta = other.means - self.means
+        merged = Moments()
+        merged.count = count
+        merged.means = self.means + delta * other.count / count
+        merged.deviations = (self.deviations + other.deviations +
+                             delta ** 2 * self.count * other.count / count)
+        return merged
+
+    @ccall
+    @returns('object')
+    def variances(self):
+        """
+        Population variances of the vectors' components.
+        """
+        return self.deviations / self.count
+
+
+@cclass
+class Covariance:
+    """
+    Count, means and the co-moment matrix of a sequence of vectors, pooled
+    exactly when merging.
+    """
+    def __init__(self, values=None):
+        """
+        Accumulates the rows of values (if given).
+        """
+        if values is None:
+            self.count = 0
+            self.means = self.comoments = 0.
+        else:
+            values = asarray(values, dtype='f8')
+            self.count = values.shape[0]
+            self.means = values.mean(axis=0)
+            centered = values - self.means
+            self.comoments = centered.T.dot(centered)
+
+    @ccall
+    @returns('Covariance')
+    @locals(other='Covariance', merged='Covariance', count='long')
+    def merge(self, other):
+        """
+        Returns the covariance accumulator of the rows of both accumulators.
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+        count = self.count + other.count
+        delta = other.means - self.means
+        merged = Covariance()
+        merged.count = count
+        merged.means = self.means + delta * other.count / count
+        merged.comoments = (self.comoments + other.comoments +
+                            outer(delta, delta) * self.count * other.count /
+                            count)
+        return merged
+
+    @ccall
+    @returns('object')
+    def correlations(self):
+        """
+        Pearson correlation coefficients between the vectors' components
+        (NaN for constant components).
+        """
+        deviations = sqrt(self.comoments.diagonal())
+        return self.comoments / outer(deviations, deviations)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+"""
+A command-line tool for measuring the toolkit's performance. By default all
+bots, trainers, collectors and processors are measured on a synthetic level
+(requires the stand-in interface), with the results printed:
+
+    ./bench.py
+
+Levels are given either as <steps>x<actions>x<features> or as names of
+existing levels, a few groups of benchmarks can be selected:
+
+    ./bench.py 100000x4x36 10000x9x12 --groups bots collectors
+
+Results can be stored as JSON and later used as a baseline; the command exits
+with a non-zero status if any result is worse than the baseline one by more
+than the threshold (a fraction):
+
+    ./bench.py --output baseline.json
+    ./bench.py --baseline baseline.json --threshold .1
+
+Use "--output -" with verbosity 0 to print just the JSON document.
+"""
+from sys import exit, stderr
+
+from core import bench_groups, compare_bench, do_bench
+from iop import (bench_desc, date_desc, load_bench, parse_args, save_bench,
+                 time_desc)
+
+description = "Measure the speed of bots, trainers, collectors and others."
+arguments = (
+    (('levels',), {
+        'nargs': '*',
+        'default': ['20000x4x36'],
+        'help': "synthetic level sizes (steps x actions x features) or names"
+    }),
+    (('-g', '--groups'), {
+        'nargs': '+',
+        'choices': bench_groups,
+        'default': list(bench_groups),
+        'help': "benchmarks to run"
+    }),
+    (('-r', '--repeat'), {
+        'type': int,
+        'default': 3,
+        'help': "number of measurements to take the best of"
+    }),
+    (('-u', '--substeps'), {
+        'type': int,
+        'default': 1,
+        'help': "cost of a synthetic level step (see create_level())"
+    }),
+    (('-b', '--baseline'), {
+        'default': None,
+        'help': "JSON results to compare with"
+    }),
+    (('-t', '--threshold'), {
+        'type': float,
+        'default': .1,
+        'help': "fraction by which results may be worse than the baseline"
+    }),
+    (('-s', '--prngs_seed'), {
+        'type': int,
+        'default': 0,
+        'help': "fixed seed for all pseudo-random number generators"
+    }),
+    (('-o', '--output'), {
+        'default': None,
+        'help': "file to store the JSON results in (- for stdout)"
+    }),
+    (('-v', '--verbosity'), {
+        'type': int,
+        'default': 1,
+        'help': "0 = condensed, 1 = expanded, 2 = progress, 4+ = debugging"
+    }),
+    (('-p', '--precision'), {
+        'type': int,
+        'default': None,
+        'help': "how many decimal digits of floats to print"
+    })
+)
+
+if __name__ == '__main__':
+    args = parse_args(description, arguments)
+    if args.repeat < 1:
+        raise ValueError("--repeat should be positive")
+
+    results, info = do_bench(**vars(args))
+
+    if args.output is not None:
+        save_bench(args.output, results, info, args.verbosity)
+    baseline = {}
+    regressions = []
+    if args.baseline is not None:
+        baseline = load_bench(args.baseline, args.verbosity)
+        regressions = compare_bench(results, baseline, args.threshold)
+
+    if args.verbosity > 0 or args.output != '-':
+        info['date'] = date_desc(info['date'])
+        info['levels'] = ", ".join(info['levels'])
+        info['groups'] = ", ".join(info['groups'])
+        info['time'] = time_desc(info['time'], args.precision)
+        info['results'] = bench_desc(results, baseline, args.precision)
+        print(("\nDate: {date}\n" +
+               "Levels: {levels}\n" +
+               "Groups: {groups}\n" +
+               "Repeat: {repeat}, Time: {time}\n" +
+               "PRNGs: {prngs_seed}\n\n{results}").format(**info))
+    if regressions:
+        print("Regressions (more than {:.0f}% worse than {}):".format(
+                        100 * args.threshold, args.baseline), file=stderr)
+        precision = 1 if args.precision is None else args.precision
+        for key, value, base_value, unit in regressions:
+            print("{}  {:.{}f} {} (was {:.{}f})".format(
+                    key, value, precision, unit, base_value, precision),
+                  file=stderr)
+        exit(1)
@@ -5,14 +5,42 @@ cdef class BaseBot:
         dict param_sizes
         int param_entries
         dict param_multipliers
+        tuple param_keys
+        int[::1] param_bounds
+        tuple param_layout
+        float[::1] param_buffer
+        bint param_shared
+        tuple param_emphases
+        float[::1] entry_multipliers
         int param_choices
         int[::1] choices
         readonly dict params
+        readonly set varied_choices
+        readonly dict param_deltas
         int last_action
+        bint bound
+        int features, actions
+        float[:, :, ::1] coeffs
+        float[:, ::1] free
+        float[::1] values, inputs
+        public object trajectory
+        public object run_scores
+        readonly int played
 
     cpdef BaseBot clone(self, bint state=?)
+    cpdef void load_state(self, BaseBot)
+    cpdef void bind(self)
+    cpdef void pack_params(self, tuple)
+    cpdef void own_params(self)
     cpdef dict new_params(self, dict, tuple)
     cpdef void vary_params(self, dict, tuple, float, int)
     cpdef void vary_param(self, dict, tuple, float)
-    cpdef float evaluate(self, int)
+    cpdef void set_param_entry(self, int, float)
+    cpdef void apply_deltas(self, dict)
+    cpdef tuple frozen_keys(self)
+    cpdef object param_vector(self)
+    cpdef void set_param_vector(self, object)
+    cpdef int varied_step(self)
+    cpdef float evaluate(self, int, int interval=?, object bounds=?,
+                         int steps=?, object seeds=?)
     cpdef void act(self, int)
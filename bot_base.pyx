@@ -1,10 +1,16 @@
+from copy import copy
+
 from libc.math cimport ceil, sqrt
 
-from cython import ccall, cclass, locals, returns, wraparound
-from numpy import asarray, empty, newaxis, ones, prod, repeat
+from cython import cast, ccall, cclass, locals, returns, wraparound
+from numpy import (arange, asarray, concatenate, cumsum, empty, full, newaxis,
+                   ones, prod, repeat, searchsorted, unique, zeros)
 from numpy.random import randint
 
-from interface cimport c_get_score
+from prngs cimport VariatePool, seed_run
+from profiler cimport enabled, note, now
+
+from interface cimport c_get_score, c_get_time
 from interface import reset_level
 
 
@@ -29,6 +35,20 @@ class BaseBot:
     default nothing is scaled, but some subclasses update the multipliers).
     Frozen parameters are removed from these dictionaries after generation.
 
+    Parameter arrays are kept in one contiguous float32 buffer, with the params
+    dict holding views of it. Arrays that may be varied come first, so a
+    parameter entry is located by a binary search over the cumulative sizes,
+    and a copy of the whole buffer is made at once. Emphasized multipliers are
+    precomputed for each entry (see emphasized_multipliers()).
+
+    A clone shares the parameter buffer (and the params dict) with the bot it
+    was cloned from, until either of them changes a parameter. Subclasses that
+    change parameters in place should do it through set_param_entry(), or at
+    least call own_params() first. Changes made since the bot was created or
+    cloned are also collected in the param_deltas dict, mapping entry numbers
+    to their new values; the deltas may be applied to another clone of the
+    same parent with apply_deltas().
+
     The base class manages a choices array. Each entry in this array is the
     number of the parameters' set that should be used at the said time.
     If a bot declares that it wants to use multiple values for parameter
@@ -38,8 +58,33 @@ class BaseBot:
 
     All arrays are guaranteed to be C-contiguous, so you may avoid stride
     calculations for the last index (use ::1 in Cython).
+
+    Parameter set indices touched by vary_param() are collected in the
+    varied_choices set (that is empty for a new bot or a clone). For multi-
+    valued bots, this lets varied_step() tell the first step at which the bot
+    may act differently than before the variations.
+
+    Bots that keep some state between steps should copy it in load_state()
+    (that is used by clone() and when resuming from a checkpoint).
+
+    Typed views of the parameters and other per-bot constants that act()
+    needs should be taken in bind(), rather than at every act() call. Bots
+    are bound before they first act, and again after their parameters are
+    changed (clones and bots with varied parameters are marked as unbound).
+
+    Bots that act the same way whenever they see the same states should set
+    deterministic, letting their scores be cached.
+
+    Bots that choose the action with the biggest value of a linear function
+    of some inputs derived from observed states may list the coefficient
+    arrays in offline_keys and provide offline_inputs(). This lets their
+    decisions be computed for recorded states without playing the level (see
+    offline_actions() and the playthrough module). Such bots may also use
+    kernel_params() and the kernels module for any number of actions.
     """
     multi = False
+    deterministic = False
+    offline_keys = ()
 
     @locals(level='dict', params='dict', param_map='dict',
             param_freeze='tuple', param_scale='dict', dists='dict',
@@ -152,35 +197,141 @@ class BaseBot:
             self.param_entries -= self.param_sizes[key]
             del self.param_shapes[key]
             del self.param_sizes[key]
-            del self.multipliers[key]
-
+            del self.param_multipliers[key]
+        self.param_keys = tuple(self.param_sizes)
+        self.param_bounds = cumsum(tuple(self.param_sizes.values()),
+                                   dtype='i4')
+        self.pack_params(self.param_keys + param_freeze)
+        if emphases is not None:
+            self.entry_multipliers = self.emphasized_multipliers(emphases)
+            self.param_emphases = emphases
+
+        self.varied_choices = set()
+        self.param_deltas = {}
         self.last_action = -1
 
     @ccall
     @returns('BaseBot')
-    @locals(state='bint', bot='BaseBot')
+    @locals(state='bint', bot='BaseBot', start='double')
     def clone(self, state=True):
         """
         Returns a copy of this bot, one that can vary parameters independently.
 
         If state is true, the current bot's state should be cloned, otherwise,
         bot's state should be initialized as if the bot was created anew.
+
+        Parameters are not copied until one of the bots changes them.
         """
+        start = now() if enabled else 0
         bot = self.__new__(type(self), self.level)
         bot.level = self.level
         bot.param_shapes = self.param_shapes
         bot.param_sizes = self.param_sizes
         bot.param_entries = self.param_entries
         bot.param_multipliers = self.param_multipliers
+        bot.param_keys = self.param_keys
+        bot.param_bounds = self.param_bounds
+        bot.param_layout = self.param_layout
+        bot.param_emphases = self.param_emphases
+        bot.entry_multipliers = self.entry_multipliers
         bot.param_choices = self.param_choices
         bot.choices = self.choices
-        bot.params = {k: p.copy() for k, p in self.params.items()}
+        bot.param_buffer = self.param_buffer
+        bot.params = self.params
+        bot.param_shared = True
+        self.param_shared = True
+        bot.varied_choices = set()
+        bot.param_deltas = {}
         if state:
-            bot.last_action = self.last_action
+            bot.load_state(self)
         else:
             bot.last_action = -1
+        if enabled:
+            note('clone', start)
         return bot
 
+    @ccall
+    @returns('void')
+    @locals(bot='BaseBot')
+    def load_state(self, bot):
+        """
+        Copies the state of another bot of the same class and for the same
+        level (but possibly with different parameters) to this bot.
+        """
+        self.last_action = bot.last_action
+
+    @ccall
+    @returns('void')
+    def bind(self):
+        """
+        Takes the typed parameter views, level dimensions and scratch buffers
+        that act() uses.
+
+        By default binds the coefficients of the offline_keys and the free
+        coefficients (as laid out by kernel_params()), a buffer for action
+        values and one for the kernel inputs. Bots that use other parameters
+        should extend this. Call it after modifying params in place.
+        """
+        self.features = self.level['features']
+        self.actions = self.level['actions']
+        self.values = empty(self.actions, dtype='f4')
+        if self.offline_keys:
+            self.coeffs, self.free = self.kernel_params()
+            self.inputs = empty(self.coeffs.shape[1], dtype='f4')
+        self.bound = True
+
+    @ccall
+    @returns('void')
+    @locals(keys='tuple', layout='list', buffer='object',
+            key='str', offset='int', size='int', shape='tuple')
+    def pack_params(self, keys):
+        """
+        Moves the parameter arrays for the given keys into a new float32
+        buffer, replacing them in the params dict with views of the buffer.
+
+        Keys missing from the params are skipped. The keys of arrays that
+        may be varied should come first and in the param_sizes order, so the
+        number of an entry (counting up to param_entries) is also its index
+        in the buffer.
+        """
+        layout = []
+        offset = 0
+        for key in keys:
+            if key in self.params:
+                shape = self.params[key].shape
+                size = self.params[key].size
+                layout.append((key, offset, size, shape))
+                offset += size
+        buffer = empty(offset, dtype='f4')
+        for key, offset, size, shape in layout:
+            buffer[offset:offset + size] = self.params[key].flat
+            self.params[key] = buffer[offset:offset + size].reshape(shape)
+        self.param_layout = tuple(layout)
+        self.param_buffer = buffer
+        self.param_shared = False
+
+    @ccall
+    @returns('void')
+    @locals(buffer='object', params='dict',
+            key='str', offset='int', size='int', shape='tuple', param='object')
+    def own_params(self):
+        """
+        Copies the parameters if they are shared with another bot (a clone or
+        the bot that this one was cloned from).
+        """
+        if not self.param_shared:
+            return
+        buffer = self.param_buffer.base.copy()
+        params = {}
+        for key, offset, size, shape in self.param_layout:
+            params[key] = buffer[offset:offset + size].reshape(shape)
+        for key, param in self.params.items():
+            if key not in params:
+                params[key] = copy(param)
+        self.param_buffer = buffer
+        self.params = params
+        self.param_shared = False
+
     @ccall
     @returns('dict')
     @locals(dists='dict', emphases='tuple',
@@ -225,68 +376,310 @@ class BaseBot:
     @ccall
     @returns('void')
     @locals(dists='dict', emphases='tuple', change='float', variations='int',
-            variation='int')
+            variation='int', start='double')
     def vary_params(self, dists, emphases, change, variations):
         """
         Makes a couple of variations in a single call.
         """
+        start = now() if enabled else 0
         for variation in range(variations):
             self.vary_param(dists, emphases, change)
+        if enabled:
+            note('vary', start, variations)
 
     @ccall
     @returns('void')
     @locals(dists='dict', emphases='tuple', change='float',
-            features='int', feature0='int', feature1='int', entry='int',
-            key='str', size='int', array='object', dist='object',
-            multiplier='float', coeff='float')
-    @wraparound(True)
+            entry='int', low='int', high='int', middle='int',
+            bounds='int[::1]', uniform='VariatePool', dist='object',
+            variate='double', coeff='float', value='float')
     def vary_param(self, dists, emphases, change):
         """
         Randomly varies a single entry from parameter arrays.
 
         The change should be in (0, 1], where 1 means that a parameter should
         be redrawn, while .001 makes a very small variation.
+
+        If the distributions are pooled (see prngs.pool_dists()), the entry is
+        also chosen using the pool of uniform variates.
         """
-        features = self.level['features']
-        multiplier = 1
+        if emphases is not self.param_emphases:
+            self.entry_multipliers = self.emphasized_multipliers(emphases)
+            self.param_emphases = emphases
+
+        uniform = dists.get('uniform')
+        if uniform is None:
+            entry = randint(self.param_entries)
+        else:
+            entry = uniform.index(self.param_entries)
+        bounds = self.param_bounds
+        low = 0
+        high = bounds.shape[0] - 1
+        while low < high:
+            middle = (low + high) // 2
+            if entry < bounds[middle]:
+                high = middle
+            else:
+                low = middle + 1
+        dist = dists['vary'].get(self.param_keys[low], dists['real'])
+        if isinstance(dist, VariatePool):
+            variate = cast(VariatePool, dist).draw()
+        else:
+            variate = dist.rvs()
+        coeff = variate * self.entry_multipliers[entry]
+        value = self.param_buffer[entry]
+        self.set_param_entry(entry, value + change * (coeff - value))
+
+    @ccall
+    @returns('void')
+    @locals(entry='int', value='float')
+    def set_param_entry(self, entry, value):
+        """
+        Sets a parameter entry (numbered as in the buffer) to the value,
+        copying the parameters first if they are shared.
+        """
+        self.own_params()
+        self.param_buffer[entry] = value
+        self.bound = False
+        self.param_deltas[entry] = value
+        self.varied_choices.add(entry % self.param_choices)
 
-        entry = randint(self.param_entries)
+    @ccall
+    @returns('void')
+    @locals(deltas='dict', entry='int', value='float')
+    def apply_deltas(self, deltas):
+        """
+        Makes the changes recorded in another bot's param_deltas.
+        """
+        for entry, value in deltas.items():
+            self.set_param_entry(entry, value)
+
+    @ccall
+    @returns('tuple')
+    def frozen_keys(self):
+        """
+        Returns the keys of the parameter arrays that may not be varied.
+        """
+        return tuple([entry[0] for entry in self.param_layout
+                      if entry[0] not in self.param_sizes])
+
+    @ccall
+    @returns('object')
+    def param_vector(self):
+        """
+        Returns a copy of all entries that may be varied, as a float64 array
+        (of param_entries length, ordered as the entries are numbered).
+        """
+        return asarray(self.param_buffer[:self.param_entries], dtype='f8')
+
+    @ccall
+    @returns('void')
+    @locals(values='object', choice='int')
+    def set_param_vector(self, values):
+        """
+        Replaces all entries that may be varied at once, values should be an
+        array as returned by param_vector(). Frozen parameters are kept.
+
+        The change is not recorded in param_deltas, but all parameter sets
+        are marked as varied.
+        """
+        self.own_params()
+        self.param_buffer.base[:self.param_entries] = values
+        self.bound = False
+        for choice in range(self.param_choices):
+            self.varied_choices.add(choice)
+
+    @locals(emphases='tuple', features='int', choices='int',
+            key='str', size='int', multipliers='list',
+            emps='object', indices='object', multiplier='object')
+    @wraparound(True)
+    def emphasized_multipliers(self, emphases):
+        """
+        Returns a float32 array with the multiplier of each variable entry,
+        taking emphases into account as new_params() does.
+        """
+        features = self.level['features']
+        choices = self.param_choices
+        emps = asarray(emphases, dtype='f8')
+        multipliers = []
         for key, size in self.param_sizes.items():
-            if entry < size:
-                array = self.params[key].flat
-                dist = dists['vary'].get(key, dists['real'])
-                multiplier = self.param_multipliers[key]
-                break
+            multiplier = asarray(self.param_multipliers[key], dtype='f4')
+            indices = arange(size) // choices
+            if ('state' in key or 'diffs' in key) and key[-1] == 'l':
+                multiplier = multiplier * emps[indices % features]
+            elif ('state' in key or 'diffs' in key) and key[-1] == 'q':
+                indices = indices % features ** 2
+                multiplier = multiplier * (emps[indices // features] *
+                                           emps[indices % features]) ** .5
             else:
-                entry -= size
-        if 'state' in key or 'diffs' in key:
-            if key[-1] == 'l':
-                multiplier *= emphases[entry // self.param_choices % features]
-            elif key[-1] == 'q':
-                feature0, feature1 = divmod(
-                        entry // self.param_choices % features ** 2, features)
-                multiplier *= sqrt(emphases[feature0] * emphases[feature1])
-        coeff = dist.rvs() * multiplier
-        array[entry] += change * (coeff - array[entry])
+                multiplier = full(size, multiplier)
+            multipliers.append(multiplier)
+        return concatenate([zeros(0)] + multipliers).astype('f4')
+
+    @ccall
+    @returns('int')
+    def varied_step(self):
+        """
+        Returns the first level step that may be affected by the parameter
+        variations made since the bot was created or cloned (the number of
+        steps if no variations were made).
+
+        Parameter sets are assigned to consecutive phases, so for a multi-
+        valued bot this is the start of the first varied phase.
+        """
+        if not self.varied_choices:
+            return self.level['steps']
+        if not self.multi:
+            return 0
+        return searchsorted(self.choices, min(self.varied_choices))
 
     @ccall
     @returns('float')
-    @locals(runs='int', run='int', score='float')
-    def evaluate(self, runs):
+    @locals(runs='int', interval='int', bounds='object', steps='int',
+            seeds='object', run='int', step='int', point='int', score='float',
+            run_score='float', scores='double[::1]', limits='double[::1]',
+            results='double[::1]', start='double')
+    def evaluate(self, runs, interval=0, bounds=None, steps=0, seeds=None):
         """
         Estimates the value of the current parameters by running the bot
         through a complete level.
 
         If runs is given, repeats the level a couple of times and averages the
-        score -- to account for non-determinism in bots behavior.
+        score -- to account for non-determinism in bots behavior. A non-zero
+        steps limits each run to that many first steps of the level (the
+        score is then the one at that point).
+
+        If seeds are given (one for each run), the generators are reseeded
+        with the run's seed before each run, so that bots evaluated with the
+        same seeds are compared under common random numbers; the score of
+        each run is then stored as run_scores.
+
+        With a non-zero interval, the score is also noted every that many
+        steps (and at the level end), and the averaged intermediate scores
+        are stored as the bot's trajectory. If bounds for the intermediate
+        scores are also given (a float64 array of the trajectory's length),
+        the evaluation is aborted as soon as the score of any run falls below
+        the bound, and -inf is returned (with no trajectory). The number of
+        level steps actually played is stored as played.
         """
+        start = now() if enabled else 0
+        if steps == 0:
+            steps = self.level['steps']
         score = 0
+        self.played = 0
+        if seeds is not None:
+            self.run_scores = zeros(runs)
+            results = self.run_scores
+        if interval == 0:
+            for run in range(runs):
+                if seeds is not None:
+                    seed_run(seeds[run])
+                reset_level()
+                self.act(steps)
+                run_score = c_get_score()
+                if seeds is not None:
+                    results[run] = run_score
+                score += run_score
+            self.played = runs * steps
+            if enabled:
+                note('play', start, self.played)
+            return score / runs
+
+        self.trajectory = zeros((steps + interval - 1) // interval)
+        scores = self.trajectory
+        if bounds is not None:
+            limits = bounds
         for run in range(runs):
+            if seeds is not None:
+                seed_run(seeds[run])
             reset_level()
-            self.act(self.level['steps'])
-            score += c_get_score()
+            for point, step in enumerate(range(0, steps, interval)):
+                self.act(min(interval, steps - step))
+                run_score = c_get_score()
+                scores[point] += run_score
+                if bounds is not None and run_score < limits[point]:
+                    self.played += c_get_time()
+                    self.trajectory = None
+                    self.run_scores = None
+                    if enabled:
+                        note('play', start, self.played)
+                    return float('-inf')
+            self.played += steps
+            if seeds is not None:
+                results[run] = run_score
+            score += run_score
+        self.trajectory /= runs
+        if enabled:
+            note('play', start, self.played)
         return score / runs
 
+    def offline_inputs(self, states, start, end):
+        """
+        Returns the inputs of the offline_keys coefficients for the recorded
+        states[start:end], as an (end - start, inputs) float32 array.
+
+        The inputs should be calculated with the same single-precision
+        operations as in act(), with zeros for states before the level start.
+        """
+        raise NotImplementedError()
+
+    @locals(keys='tuple', free_key='str', actions='int', choices='int')
+    def kernel_params(self, keys=None, free_key='free'):
+        """
+        Returns the coefficient arrays for the keys (offline_keys by default)
+        stacked along the inputs axis and laid out for the kernels module,
+        that is as a C-contiguous (choices, inputs, actions) array, together
+        with a (choices, actions) array of free coefficients.
+
+        The inputs are ordered as the keys, and for each key as the entries
+        of the parameter array (after the actions axis).
+        """
+        if keys is None:
+            keys = self.offline_keys
+        actions = self.level['actions']
+        choices = self.param_choices
+        coeffs = concatenate([self.params[k].reshape(actions, -1, choices)
+                              for k in keys], axis=1)
+        free = self.params[free_key].reshape(actions, choices)
+        return (coeffs.transpose(2, 1, 0).astype('f4', order='C'),
+                free.transpose().astype('f4', order='C'))
+
+    @locals(start='int', end='int', actions='int', choice='int')
+    @wraparound(True)
+    def offline_actions(self, states, start, end):
+        """
+        Determines actions the bot would make for the states[start:end], given
+        that it has seen all the earlier recorded states.
+
+        Returns an array of actions and an array of flags telling if the action
+        is certain. The values are computed in double precision, thus actions
+        for which the best value is not ahead of the others by more than the
+        act() rounding errors may account for, are marked as uncertain.
+        """
+        actions = self.level['actions']
+        inputs = asarray(self.offline_inputs(states, start, end), dtype='f8')
+        coeffs, free = self.kernel_params()
+        if self.multi:
+            choices = asarray(self.choices[start:end])
+        else:
+            choices = zeros(end - start, dtype='i4')
+        values = empty((end - start, actions))
+        scales = empty((end - start, actions))
+        for choice in unique(choices):
+            rows = choices == choice
+            choice_coeffs = coeffs[choice].astype('f8')
+            values[rows] = inputs[rows].dot(choice_coeffs)
+            values[rows] += free[choice]
+            scales[rows] = abs(inputs[rows]).dot(abs(choice_coeffs))
+            scales[rows] += abs(free[choice])
+        decisions = values.argmax(axis=1)
+        values.sort(axis=1)
+        # A float sum of n products may be off by about n * 2 ** -24 of the
+        # sum of their absolute values, a difference of two such sums twice
+        # as much; leaving another factor of two for safety.
+        tolerances = (inputs.shape[1] + 1) * 2. ** -22 * scales.max(axis=1)
+        return decisions, values[:, -1] - values[:, -2] > tolerances
+
     @ccall
     @returns('void')
     @locals(steps='int')
@@ -301,3 +694,17 @@ class BaseBot:
         did not do any) as self.last_action (for collectors use).
         """
         raise NotImplementedError()
+
+
+@locals(start='int', end='int', lag='int', first='int')
+def lagged(states, start, end, lag):
+    """
+    Returns states[start - lag:end - lag] with zeros in place of the states
+    from before the level start (as seen by a new bot).
+    """
+    if start >= lag:
+        return states[start - lag:end - lag]
+    shifted = zeros((end - start, states.shape[1]), dtype=states.dtype)
+    first = min(lag - start, end - start)
+    shifted[first:] = states[start + first - lag:end - lag]
+    return shifted
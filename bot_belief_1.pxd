@@ -4,3 +4,6 @@ from bot_base cimport BaseBot
 cdef class Bot(BaseBot):
     cdef:
         float belief
+        float belief_free
+        float[::1] belief_state0l
+        float belief_belief0l
@@ -10,18 +10,20 @@ a value of .1 would make the belief update based on the state 10 times smaller
 than the belief update based on the previous belief. Similarly, belief trust
 weakens the impact of the belief on action evaluation. Both are drawn from the
 "unit" distribution when generating new parameters.
-
-Assumes 4 actions.
 """
-from cython import ccall, cclass, locals, returns
+from cython import address, ccall, cclass, locals, returns, sizeof
+from libc.string cimport memcpy
 
 from bot_base cimport BaseBot
+from kernels cimport add_products, best_action
 
 from interface cimport c_do_action, c_get_state
 
 
 @cclass
 class Bot(BaseBot):
+    deterministic = True
+
     @staticmethod
     def shapes(steps, actions, features):
         return {
@@ -37,13 +39,12 @@ class Bot(BaseBot):
         self.belief = 0
 
     @ccall
-    @returns('Bot')
-    @locals(state='bint', bot='Bot')
-    def clone(self, state=True):
-        bot = BaseBot.clone(self, state)
-        if state:
-            bot.belief = self.belief
-        return bot
+    @returns('void')
+    @locals(bot='BaseBot', source='Bot')
+    def load_state(self, bot):
+        BaseBot.load_state(self, bot)
+        source = bot
+        self.belief = source.belief
 
     @ccall
     @returns('dict')
@@ -62,45 +63,46 @@ class Bot(BaseBot):
         params['_belief_lag'] = belief_lag
         return params
 
+    @ccall
+    @returns('void')
+    def bind(self):
+        BaseBot.bind(self)
+        self.coeffs, self.free = self.kernel_params(('belief0l', 'state0l'))
+        self.belief_free = self.params['belief_free'][0]
+        self.belief_state0l = self.params['belief_state0l']
+        self.belief_belief0l = self.params['belief_belief0l'][0]
+
     @ccall
     @returns('void')
     @locals(steps='int', step='int', action='int',
-            features='int', feature='int',
-            free='float[4]', state0l='float[:, ::1]', belief0l='float[4]',
+            features='int', feature='int', actions='int', values_size='int',
+            free='float[:, ::1]', coeffs='float[:, :, ::1]',
             belief_free='float', belief_state0l='float[::1]',
             belief_belief0l='float', belief='float',
-            values='float[4]', state0='float*', state0f='float')
+            values='float[::1]', state0='float*')
     def act(self, steps):
-        features = self.level['features']
-        free = self.params['free']
-        state0l = self.params['state0l']
-        belief0l = self.params['belief0l']
-        belief_free = self.params['belief_free']
-        belief_state0l = self.params['belief_state0l']
-        belief_belief0l = self.params['belief_belief0l']
+        if not self.bound:
+            self.bind()
+        features = self.features
+        actions = self.actions
+        values_size = actions * sizeof(float)
+        coeffs = self.coeffs
+        free = self.free
+        belief_free = self.belief_free
+        belief_state0l = self.belief_state0l
+        belief_belief0l = self.belief_belief0l
         belief = self.belief
+        values = self.values
         action = -1
 
         for step in range(steps):
-            values = free[:]
-            values[0] += belief0l[0] * belief
-            values[1] += belief0l[1] * belief
-            values[2] += belief0l[2] * belief
-            values[3] += belief0l[3] * belief
             state0 = c_get_state()
-            for feature in range(features):
-                state0f = state0[feature]
-                values[0] += state0l[0, feature] * state0f
-                values[1] += state0l[1, feature] * state0f
-                values[2] += state0l[2, feature] * state0f
-                values[3] += state0l[3, feature] * state0f
-            action = (((0 if values[0] > values[3] else 3)
-                                if values[0] > values[2] else
-                                        (2 if values[2] > values[3] else 3))
-                                if values[0] > values[1] else
-                        ((1 if values[1] > values[3] else 3)
-                                if values[1] > values[2] else
-                                        (2 if values[2] > values[3] else 3)))
+            memcpy(address(values[0]), address(free[0, 0]), values_size)
+            add_products(address(values[0]), address(coeffs[0, 0, 0]),
+                         address(belief), 1, actions)
+            add_products(address(values[0]), address(coeffs[0, 1, 0]),
+                         state0, features, actions)
+            action = best_action(address(values[0]), actions)
             c_do_action(action)
             belief = belief_free + belief_belief0l * belief
             for feature in range(features):
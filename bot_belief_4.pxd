@@ -4,3 +4,6 @@ from bot_base cimport BaseBot
 cdef class Bot(BaseBot):
     cdef:
         float[4] beliefs
+        float[4] belief_free
+        float[:, ::1] belief_state0l
+        float[:, ::1] belief_belief0l
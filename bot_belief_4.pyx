@@ -1,17 +1,19 @@
 """
 Holds a belief for 4 float values.
-
-Assumes 4 actions.
 """
-from cython import ccall, cclass, locals, returns
+from cython import address, ccall, cclass, locals, returns, sizeof
+from libc.string cimport memcpy
 
 from bot_base cimport BaseBot
+from kernels cimport add_products, best_action
 
 from interface cimport c_do_action, c_get_state
 
 
 @cclass
 class Bot(BaseBot):
+    deterministic = True
+
     @staticmethod
     def shapes(steps, actions, features):
         return {
@@ -27,13 +29,12 @@ class Bot(BaseBot):
         self.beliefs = [0] * 4
 
     @ccall
-    @returns('Bot')
-    @locals(state='bint', bot='Bot')
-    def clone(self, state=True):
-        bot = BaseBot.clone(self, state)
-        if state:
-            bot.beliefs = self.beliefs[:]
-        return bot
+    @returns('void')
+    @locals(bot='BaseBot', source='Bot')
+    def load_state(self, bot):
+        BaseBot.load_state(self, bot)
+        source = bot
+        self.beliefs = source.beliefs[:]
 
     @ccall
     @returns('dict')
@@ -52,58 +53,47 @@ class Bot(BaseBot):
         params['_belief_lag'] = belief_lag
         return params
 
+    @ccall
+    @returns('void')
+    def bind(self):
+        BaseBot.bind(self)
+        self.coeffs, self.free = self.kernel_params(('belief0l', 'state0l'))
+        self.belief_free = self.params['belief_free']
+        self.belief_state0l = self.params['belief_state0l']
+        self.belief_belief0l = self.params['belief_belief0l']
+
     @ccall
     @returns('void')
     @locals(steps='int', step='int', action='int',
-            features='int', feature='int',
-            free='float[4]', state0l='float[:, ::1]', belief0l='float[:, ::1]',
+            features='int', feature='int', actions='int', values_size='int',
+            free='float[:, ::1]', coeffs='float[:, :, ::1]',
             belief_free='float[4]', belief_state0l='float[:, ::1]',
             belief_belief0l='float[:, ::1]',
-            beliefs='float[4]', beliefst='float[4]', values='float[4]',
+            beliefs='float[4]', beliefst='float[4]', values='float[::1]',
             state0='float*', state0f='float')
     def act(self, steps):
-        features = self.level['features']
-        free = self.params['free']
-        state0l = self.params['state0l']
-        belief0l = self.params['belief0l']
-        belief_free = self.params['belief_free']
-        belief_state0l = self.params['belief_state0l']
-        belief_belief0l = self.params['belief_belief0l']
+        if not self.bound:
+            self.bind()
+        features = self.features
+        actions = self.actions
+        values_size = actions * sizeof(float)
+        coeffs = self.coeffs
+        free = self.free
+        belief_free = self.belief_free
+        belief_state0l = self.belief_state0l
+        belief_belief0l = self.belief_belief0l
         beliefs = self.beliefs[:]
+        values = self.values
         action = -1
 
         for step in range(steps):
-            values = free[:]
-            values[0] += (belief0l[0, 0] * beliefs[0] +
-                          belief0l[0, 1] * beliefs[1] +
-                          belief0l[0, 2] * beliefs[2] +
-                          belief0l[0, 3] * beliefs[3])
-            values[1] += (belief0l[1, 0] * beliefs[0] +
-                          belief0l[1, 1] * beliefs[1] +
-                          belief0l[1, 2] * beliefs[2] +
-                          belief0l[1, 3] * beliefs[3])
-            values[2] += (belief0l[2, 0] * beliefs[0] +
-                          belief0l[2, 1] * beliefs[1] +
-                          belief0l[2, 2] * beliefs[2] +
-                          belief0l[2, 3] * beliefs[3])
-            values[3] += (belief0l[3, 0] * beliefs[0] +
-                          belief0l[3, 1] * beliefs[1] +
-                          belief0l[3, 2] * beliefs[2] +
-                          belief0l[3, 3] * beliefs[3])
             state0 = c_get_state()
-            for feature in range(features):
-                state0f = state0[feature]
-                values[0] += state0l[0, feature] * state0f
-                values[1] += state0l[1, feature] * state0f
-                values[2] += state0l[2, feature] * state0f
-                values[3] += state0l[3, feature] * state0f
-            action = (((0 if values[0] > values[3] else 3)
-                                if values[0] > values[2] else
-                                        (2 if values[2] > values[3] else 3))
-                                if values[0] > values[1] else
-                        ((1 if values[1] > values[3] else 3)
-                                if values[1] > values[2] else
-                                        (2 if values[2] > values[3] else 3)))
+            memcpy(address(values[0]), address(free[0, 0]), values_size)
+            add_products(address(values[0]), address(coeffs[0, 0, 0]),
+                         address(beliefs[0]), 4, actions)
+            add_products(address(values[0]), address(coeffs[0, 4, 0]),
+                         state0, features, actions)
+            action = best_action(address(values[0]), actions)
             c_do_action(action)
             beliefst = belief_free[:]
             beliefst[0] += (belief_belief0l[0, 0] * beliefs[0] +
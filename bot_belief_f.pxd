@@ -5,3 +5,6 @@ cdef class Bot(BaseBot):
     cdef:
         float* beliefs0
         float* beliefs0t
+        float[::1] belief_free
+        float[:, ::1] belief_state0l
+        float[:, ::1] belief_belief0l
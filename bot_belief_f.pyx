@@ -1,19 +1,20 @@
 """
 Holds a belief for a hidden state, of the same length as the visible state.
-
-Assumes 4 actions.
 """
-from cython import cast, ccall, cclass, locals, returns, sizeof
+from cython import address, cast, ccall, cclass, locals, returns, sizeof
 from libc.stdlib cimport calloc, free
 from libc.string cimport memcpy
 
 from bot_base cimport BaseBot
+from kernels cimport add_products, best_action
 
 from interface cimport c_do_action, c_get_state
 
 
 @cclass
 class Bot(BaseBot):
+    deterministic = True
+
     @staticmethod
     def shapes(steps, actions, features):
         return {
@@ -35,15 +36,14 @@ class Bot(BaseBot):
         free(self.beliefs0)
 
     @ccall
-    @returns('Bot')
-    @locals(state='bint', bot='Bot', beliefs_size='int')
-    def clone(self, state=True):
-        bot = BaseBot.clone(self, state)
-        if state:
-            beliefs_size = self.level['features'] * sizeof(float)
-            memcpy(bot.beliefs0, self.beliefs0, beliefs_size)
-            memcpy(bot.beliefs0t, self.beliefs0t, beliefs_size)
-        return bot
+    @returns('void')
+    @locals(bot='BaseBot', source='Bot', beliefs_size='int')
+    def load_state(self, bot):
+        BaseBot.load_state(self, bot)
+        source = bot
+        beliefs_size = self.level['features'] * sizeof(float)
+        memcpy(self.beliefs0, source.beliefs0, beliefs_size)
+        memcpy(self.beliefs0t, source.beliefs0t, beliefs_size)
 
     @ccall
     @returns('dict')
@@ -62,49 +62,49 @@ class Bot(BaseBot):
         params['_belief_lag'] = belief_lag
         return params
 
+    @ccall
+    @returns('void')
+    def bind(self):
+        BaseBot.bind(self)
+        self.coeffs, self.free = self.kernel_params(('state0l', 'belief0l'))
+        self.belief_free = self.params['belief_free']
+        self.belief_state0l = self.params['belief_state0l']
+        self.belief_belief0l = self.params['belief_belief0l']
+
     @ccall
     @returns('void')
     @locals(steps='int', step='int', action='int',
-            features='int', feature='int', featureb='int',
-            free='float[4]', state0l='float[:, ::1]', belief0l='float[:, ::1]',
+            features='int', feature='int', featureb='int', actions='int',
+            values_size='int',
+            free='float[:, ::1]', coeffs='float[:, :, ::1]',
             belief_free='float[::1]', belief_state0l='float[:, ::1]',
             belief_belief0l='float[:, ::1]',
             beliefs0='float*', beliefs0t='float*',
-            values='float[4]', state0='float*', state0f='float',
-            beliefs0f='float', belieft='float')
+            values='float[::1]', state0='float*', belieft='float')
     def act(self, steps):
-        features = self.level['features']
-        free = self.params['free']
-        state0l = self.params['state0l']
-        belief0l = self.params['belief0l']
-        belief_free = self.params['belief_free']
-        belief_state0l = self.params['belief_state0l']
-        belief_belief0l = self.params['belief_belief0l']
+        if not self.bound:
+            self.bind()
+        features = self.features
+        actions = self.actions
+        values_size = actions * sizeof(float)
+        coeffs = self.coeffs
+        free = self.free
+        belief_free = self.belief_free
+        belief_state0l = self.belief_state0l
+        belief_belief0l = self.belief_belief0l
         beliefs0 = self.beliefs0
         beliefs0t = self.beliefs0t
+        values = self.values
         action = -1
 
         for step in range(steps):
-            values = free[:]
             state0 = c_get_state()
-            for feature in range(features):
-                state0f = state0[feature]
-                beliefs0f = beliefs0[feature]
-                values[0] += (state0l[0, feature] * state0f +
-                                            belief0l[0, feature] * beliefs0f)
-                values[1] += (state0l[1, feature] * state0f +
-                                            belief0l[1, feature] * beliefs0f)
-                values[2] += (state0l[2, feature] * state0f +
-                                            belief0l[2, feature] * beliefs0f)
-                values[3] += (state0l[3, feature] * state0f +
-                                            belief0l[3, feature] * beliefs0f)
-            action = (((0 if values[0] > values[3] else 3)
-                                if values[0] > values[2] else
-                                        (2 if values[2] > values[3] else 3))
-                                if values[0] > values[1] else
-                        ((1 if values[1] > values[3] else 3)
-                                if values[1] > values[2] else
-                                        (2 if values[2] > values[3] else 3)))
+            memcpy(address(values[0]), address(free[0, 0]), values_size)
+            add_products(address(values[0]), address(coeffs[0, 0, 0]),
+                         state0, features, actions)
+            add_products(address(values[0]), address(coeffs[0, features, 0]),
+                         beliefs0, features, actions)
+            action = best_action(address(values[0]), actions)
             c_do_action(action)
             for featureb in range(features):
                 belieft = belief_free[featureb]
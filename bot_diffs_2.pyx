@@ -1,19 +1,23 @@
 """
 Linear regression using the state and two backward finite differences.
-
-Assumes 4 actions.
 """
-from cython import cast, ccall, cclass, locals, returns, sizeof
+from cython import address, cast, ccall, cclass, locals, returns, sizeof
 from libc.stdlib cimport calloc, free
 from libc.string cimport memcpy
+from numpy import concatenate
 
 from bot_base cimport BaseBot
+from bot_base import lagged
+from kernels cimport add_products, best_action
 
 from interface cimport c_do_action, c_get_state
 
 
 @cclass
 class Bot(BaseBot):
+    deterministic = True
+    offline_keys = ('state0l', 'diffs0l', 'diffs1l')
+
     @staticmethod
     def shapes(steps, actions, features):
         return {
@@ -32,62 +36,61 @@ class Bot(BaseBot):
         free(self.state1)
 
     @ccall
-    @returns('Bot')
-    @locals(state='bint', bot='Bot', state_size='int')
-    def clone(self, state=True):
-        bot = BaseBot.clone(self, state)
-        if state:
-            state_size = self.level['features'] * sizeof(float)
-            memcpy(bot.state1, self.state1, state_size)
-            memcpy(bot.state2, self.state2, state_size)
-        return bot
+    @returns('void')
+    @locals(bot='BaseBot', source='Bot', state_size='int')
+    def load_state(self, bot):
+        BaseBot.load_state(self, bot)
+        source = bot
+        state_size = self.level['features'] * sizeof(float)
+        memcpy(self.state1, source.state1, state_size)
+        memcpy(self.state2, source.state2, state_size)
+
+    def offline_inputs(self, states, start, end):
+        state0 = states[start:end]
+        state1 = lagged(states, start, end, 1)
+        state2 = lagged(states, start, end, 2)
+        diffs0 = state0 - state1
+        diffs1 = diffs0 - state1 + state2
+        return concatenate((state0, diffs0, diffs1), axis=1)
 
     @ccall
     @returns('void')
     @locals(steps='int', step='int', action='int',
-            features='int', feature='int', state_size='int',
-            free='float[4]', state0l='float[:, ::1]', diffs0l='float[:, ::1]',
-            diffs1l='float[:, ::1]', values='float[4]',
+            features='int', feature='int', actions='int',
+            state_size='int', values_size='int',
+            free='float[:, ::1]', coeffs='float[:, :, ::1]',
+            values='float[::1]', inputs='float[::1]',
             state0='float*', state1='float*', state2='float*',
-            state0f='float', state1f='float', diffs0f='float', diffs1f='float')
+            state0f='float', state1f='float', diffs0f='float')
     def act(self, steps):
-        features = self.level['features']
+        if not self.bound:
+            self.bind()
+        features = self.features
+        actions = self.actions
         state_size = features * sizeof(float)
-        free = self.params['free']
-        state0l = self.params['state0l']
-        diffs0l = self.params['diffs0l']
-        diffs1l = self.params['diffs1l']
+        values_size = actions * sizeof(float)
+        coeffs = self.coeffs
+        free = self.free
+        values = self.values
+        inputs = self.inputs
         state1 = self.state1
         state2 = self.state2
         action = -1
 
         for step in range(steps):
-            values = free[:]
             state0 = c_get_state()
             for feature in range(features):
                 state0f = state0[feature]
                 state1f = state1[feature]
                 diffs0f = state0f - state1f
-                diffs1f = diffs0f - state1f + state2[feature]
-                values[0] += (state0l[0, feature] * state0f +
-                                                diffs0l[0, feature] * diffs0f +
-                                                diffs1l[0, feature] * diffs1f)
-                values[1] += (state0l[1, feature] * state0f +
-                                                diffs0l[1, feature] * diffs0f +
-                                                diffs1l[1, feature] * diffs1f)
-                values[2] += (state0l[2, feature] * state0f +
-                                                diffs0l[2, feature] * diffs0f +
-                                                diffs1l[2, feature] * diffs1f)
-                values[3] += (state0l[3, feature] * state0f +
-                                                diffs0l[3, feature] * diffs0f +
-                                                diffs1l[3, feature] * diffs1f)
-            action = (((0 if values[0] > values[3] else 3)
-                                if values[0] > values[2] else
-                                        (2 if values[2] > values[3] else 3))
-                                if values[0] > values[1] else
-                        ((1 if values[1] > values[3] else 3)
-                                if values[1] > values[2] else
-                                        (2 if values[2] > values[3] else 3)))
+                inputs[feature] = state0f
+                inputs[features + feature] = diffs0f
+                inputs[2 * features + feature] = (diffs0f - state1f +
+                                                  state2[feature])
+            memcpy(address(values[0]), address(free[0, 0]), values_size)
+            add_products(address(values[0]), address(coeffs[0, 0, 0]),
+                         address(inputs[0]), 3 * features, actions)
+            action = best_action(address(values[0]), actions)
             c_do_action(action)
             state2, state1 = state1, state2
             memcpy(state1, state0, state_size)
@@ -2,18 +2,21 @@
 Sums weighted components of the state and adds a free factor, with a different
 vector of weights and factor for each action, then chooses the action for which
 the sum is the biggest.
-
-Assumes 4 actions.
 """
-from cython import ccall, cclass, locals, returns
+from cython import address, ccall, cclass, locals, returns, sizeof
+from libc.string cimport memcpy
 
 from bot_base cimport BaseBot
+from kernels cimport add_products, best_action
 
 from interface cimport c_do_action, c_get_state
 
 
 @cclass
 class Bot(BaseBot):
+    deterministic = True
+    offline_keys = ('state0l',)
+
     @staticmethod
     def shapes(steps, actions, features):
         return {
@@ -21,34 +24,32 @@ class Bot(BaseBot):
             'state0l': (actions, features)
         }
 
+    def offline_inputs(self, states, start, end):
+        return states[start:end]
+
     @ccall
     @returns('void')
     @locals(steps='int', step='int', action='int',
-            features='int', feature='int',
-            free='float[4]', state0l='float[:, ::1]',
-            values='float[4]', state0='float*', state0f='float')
+            features='int', actions='int', values_size='int',
+            free='float[:, ::1]', coeffs='float[:, :, ::1]',
+            values='float[::1]', state0='float*')
     def act(self, steps):
-        features = self.level['features']
-        free = self.params['free']
-        state0l = self.params['state0l']
+        if not self.bound:
+            self.bind()
+        features = self.features
+        actions = self.actions
+        values_size = actions * sizeof(float)
+        coeffs = self.coeffs
+        free = self.free
+        values = self.values
         action = -1
 
         for step in range(steps):
-            values = free[:]
+            memcpy(address(values[0]), address(free[0, 0]), values_size)
             state0 = c_get_state()
-            for feature in range(features):
-                state0f = state0[feature]
-                values[0] += state0l[0, feature] * state0f
-                values[1] += state0l[1, feature] * state0f
-                values[2] += state0l[2, feature] * state0f
-                values[3] += state0l[3, feature] * state0f
-            action = (((0 if values[0] > values[3] else 3)
-                                if values[0] > values[2] else
-                                        (2 if values[2] > values[3] else 3))
-                                if values[0] > values[1] else
-                        ((1 if values[1] > values[3] else 3)
-                                if values[1] > values[2] else
-                                        (2 if values[2] > values[3] else 3)))
+            add_products(address(values[0]), address(coeffs[0, 0, 0]), state0,
+                         features, actions)
+            action = best_action(address(values[0]), actions)
             c_do_action(action)
 
         self.last_action = action
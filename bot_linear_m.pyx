@@ -1,9 +1,11 @@
 """
 Linear with support for multi-value parameter sets.
 """
-from cython import ccall, cclass, declare, locals, returns
+from cython import address, ccall, cclass, locals, returns, sizeof
+from libc.string cimport memcpy
 
 from bot_base cimport BaseBot
+from kernels cimport add_products, best_action
 
 from interface cimport c_do_action, c_get_state, c_get_time
 
@@ -11,6 +13,8 @@ from interface cimport c_do_action, c_get_state, c_get_time
 @cclass
 class Bot(BaseBot):
     multi = True
+    deterministic = True
+    offline_keys = ('state0l',)
 
     @staticmethod
     def shapes(steps, actions, features):
@@ -19,40 +23,35 @@ class Bot(BaseBot):
             'state0l': (actions, features)
         }
 
+    def offline_inputs(self, states, start, end):
+        return states[start:end]
+
     @ccall
     @returns('void')
     @locals(steps='int', step='int', action='int',
-            features='int', feature='int', choices='int[::1]', choice='int',
-            free='float[:, ::1]', state0l='float[:, :, ::1]',
-            state0='float*', state0f='float')
+            features='int', actions='int', values_size='int',
+            choices='int[::1]', choice='int',
+            free='float[:, ::1]', coeffs='float[:, :, ::1]',
+            values='float[::1]', state0='float*')
     def act(self, steps):
-        features = self.level['features']
-        free = self.params['free']
-        state0l = self.params['state0l']
+        if not self.bound:
+            self.bind()
+        features = self.features
+        actions = self.actions
+        values_size = actions * sizeof(float)
+        coeffs = self.coeffs
+        free = self.free
         choices = self.choices
-        values = declare('float[4]')
+        values = self.values
         action = -1
 
         for step in range(c_get_time(), c_get_time() + steps):
             choice = choices[step]
-            values[0] = free[0, choice]
-            values[1] = free[1, choice]
-            values[2] = free[2, choice]
-            values[3] = free[3, choice]
+            memcpy(address(values[0]), address(free[choice, 0]), values_size)
             state0 = c_get_state()
-            for feature in range(features):
-                state0f = state0[feature]
-                values[0] += state0l[0, feature, choice] * state0f
-                values[1] += state0l[1, feature, choice] * state0f
-                values[2] += state0l[2, feature, choice] * state0f
-                values[3] += state0l[3, feature, choice] * state0f
-            action = (((0 if values[0] > values[3] else 3)
-                                if values[0] > values[2] else
-                                        (2 if values[2] > values[3] else 3))
-                                if values[0] > values[1] else
-                        ((1 if values[1] > values[3] else 3)
-                                if values[1] > values[2] else
-                                        (2 if values[2] > values[3] else 3)))
+            add_products(address(values[0]), address(coeffs[choice, 0, 0]),
+                         state0, features, actions)
+            action = best_action(address(values[0]), actions)
             c_do_action(action)
 
         self.last_action = action
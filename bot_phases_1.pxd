@@ -2,4 +2,7 @@ from bot_base cimport BaseBot
 
 
 cdef class Bot(BaseBot):
-    pass
+    cdef:
+        int phase1
+        float[:, :, ::1] coeffs0, coeffs1
+        float[:, ::1] free0, free1
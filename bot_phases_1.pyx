@@ -7,19 +7,21 @@ sets (by time fraction, where 0 is the beginning and 1 the end of a level).
 
 In place of this bot consider using linear_m in combination with the --phases
 option, or better yet with the comb trainer.
-
-Assumes 4 actions.
 """
-from cython import ccall, cclass, locals, returns
+from cython import address, ccall, cclass, locals, returns, sizeof
+from libc.string cimport memcpy
 from numpy import array
 
 from bot_base cimport BaseBot
+from kernels cimport add_products, best_action
 
 from interface cimport c_do_action, c_get_state, c_get_time
 
 
 @cclass
 class Bot(BaseBot):
+    deterministic = True
+
     @staticmethod
     def shapes(steps, actions, features):
         return {
@@ -33,43 +35,52 @@ class Bot(BaseBot):
         super().__init__(level, *args, **kwargs)
         self.params['phases'] = array([level['steps'] // 2])
 
+    @ccall
+    @returns('void')
+    def bind(self):
+        BaseBot.bind(self)
+        self.phase1 = self.params['phases'][0]
+        self.coeffs0, self.free0 = self.kernel_params(('state0p0l',), 'freep0')
+        self.coeffs1, self.free1 = self.kernel_params(('state0p1l',), 'freep1')
+
     @ccall
     @returns('void')
     @locals(steps='int', step='int', action='int', phase1='int',
-            features='int', feature='int',
-            free='float[4]', state0l='float[:, ::1]',
-            values='float[4]', state0='float*', state0f='float')
+            features='int', actions='int', values_size='int',
+            free0='float[:, ::1]', coeffs0='float[:, :, ::1]',
+            free1='float[:, ::1]', coeffs1='float[:, :, ::1]',
+            free='float*', coeffs='float*',
+            values='float[::1]', state0='float*')
     def act(self, steps):
-        features = self.level['features']
-        phase1 = self.params['phases'][0]
+        if not self.bound:
+            self.bind()
+        features = self.features
+        actions = self.actions
+        values_size = actions * sizeof(float)
+        phase1 = self.phase1
+        coeffs0 = self.coeffs0
+        free0 = self.free0
+        coeffs1 = self.coeffs1
+        free1 = self.free1
+        values = self.values
         action = -1
 
         if c_get_time() < phase1:
-            free = self.params['freep0']
-            state0l = self.params['state0p0l']
+            free = address(free0[0, 0])
+            coeffs = address(coeffs0[0, 0, 0])
         else:
-            free = self.params['freep1']
-            state0l = self.params['state0p1l']
+            free = address(free1[0, 0])
+            coeffs = address(coeffs1[0, 0, 0])
 
         for step in range(c_get_time(), c_get_time() + steps):
-            values = free[:]
+            memcpy(address(values[0]), free, values_size)
             state0 = c_get_state()
-            for feature in range(features):
-                state0f = state0[feature]
-                values[0] += state0l[0, feature] * state0f
-                values[1] += state0l[1, feature] * state0f
-                values[2] += state0l[2, feature] * state0f
-                values[3] += state0l[3, feature] * state0f
-            action = (((0 if values[0] > values[3] else 3)
-                                if values[0] > values[2] else
-                                        (2 if values[2] > values[3] else 3))
-                                if values[0] > values[1] else
-                        ((1 if values[1] > values[3] else 3)
-                                if values[1] > values[2] else
-                                        (2 if values[2] > values[3] else 3)))
+            add_products(address(values[0]), coeffs, state0, features,
+                         actions)
+            action = best_action(address(values[0]), actions)
             c_do_action(action)
             if step == phase1:
-                free = self.params['freep1']
-                state0l = self.params['state0p1l']
+                free = address(free1[0, 0])
+                coeffs = address(coeffs1[0, 0, 0])
 
         self.last_action = action
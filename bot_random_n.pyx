@@ -42,7 +42,8 @@ class Bot(BaseBot):
         prob += change * (dists['unit'].rvs() - prob)
         min_prob = 0 if action == 0 else probs[step][action - 1]
         max_prob = 1 if action == actions - 2 else probs[step][action + 1]
-        probs[step, action] = (min_prob if prob < min_prob else
+        self.set_param_entry(step * (actions - 1) + action,
+                             min_prob if prob < min_prob else
                                     (max_prob if prob > max_prob else prob))
 
     @ccall
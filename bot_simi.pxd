@@ -5,4 +5,5 @@ cdef class Bot(BaseBot):
     cdef:
         float* states
         float* scores
-        int* actions
+        int* past_actions
+        int recorded
@@ -27,12 +27,13 @@ class Bot(BaseBot):
         features = level['features']
         self.states = cast('float*', malloc(steps * features * sizeof(float)))
         self.scores = cast('float*', malloc(steps * sizeof(float)))
-        self.actions = cast('int*', malloc(steps * sizeof(int)))
+        self.past_actions = cast('int*', malloc(steps * sizeof(int)))
+        self.recorded = 0
 
     def __dealloc__(self):
         free(self.states)
         free(self.scores)
-        free(self.actions)
+        free(self.past_actions)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -40,18 +41,27 @@ class Bot(BaseBot):
         self.params['threshold'] = .01
 
     @ccall
-    @returns('Bot')
-    @locals(state='bint', bot='Bot')
-    def clone(self, state=True):
-        bot = BaseBot.clone(self, state)
-        if state:
-            memcpy(bot.states, self.states, self.level['steps'] *
-                                        self.level['features'] * sizeof(float))
-            memcpy(bot.scores, self.scores, self.level['steps'] *
-                                                                sizeof(float))
-            memcpy(bot.actions, self.actions, self.level['steps'] *
-                                                                sizeof(int))
-        return bot
+    @returns('void')
+    @locals(bot='BaseBot', source='Bot', features='int', start='int',
+            count='int')
+    def load_state(self, bot):
+        """
+        Copies just the steps that can still be looked back at, so the cost
+        does not grow with the level length.
+        """
+        BaseBot.load_state(self, bot)
+        source = bot
+        features = self.level['features']
+        start = max(0, source.recorded - self.params['lookback'])
+        count = source.recorded - start
+        memcpy(address(self.states[start * features]),
+               address(source.states[start * features]),
+               count * features * sizeof(float))
+        memcpy(address(self.scores[start]), address(source.scores[start]),
+               count * sizeof(float))
+        memcpy(address(self.past_actions[start]),
+               address(source.past_actions[start]), count * sizeof(int))
+        self.recorded = source.recorded
 
     @ccall
     @returns('void')
@@ -74,7 +84,7 @@ class Bot(BaseBot):
         threshold = self.params['threshold']
         states = self.states
         scores = self.scores
-        actions = self.actions
+        actions = self.past_actions
         values = declare('float[4]')
         action = -1
 
@@ -105,4 +115,5 @@ class Bot(BaseBot):
             c_do_action(action)
             actions[step] = action
 
+        self.recorded = c_get_time()
         self.last_action = action
@@ -0,0 +1,148 @@
+"""
+Caching of deterministic bots' scores.
+
+A deterministic bot always scores the same on a level, given the same
+parameters, so there is no need to play the level again with parameters that
+were already evaluated -- what happens when a trainer returns to an earlier
+set of parameters, when seeds are scored again, or when a parameter set is
+played repeatedly. Scores are keyed by a hash of the bot's class, parameters
+and level (its dimensions and the contents of its file). Recent scores are
+kept in memory, and optionally all scores are also stored in a file, so they
+persist between sessions. The keys also include the cache version, that needs
+to be bumped whenever a change to the bots or the interface changes the scores
+bots get, so that stale scores are not read from the file.
+
+Bots that are not deterministic are not cached, as their scores depend on
+the state of the generators rather than just on the session seed -- unless
+they are evaluated under common random numbers, with the generators reseeded
+before each run. Their scores are then keyed by the run seeds too, and the
+per-run scores are kept, letting a later candidate be paired with a cached
+incumbent. Scores are those of bots in their initial state (as after creation
+or clone(False)).
+"""
+from collections import OrderedDict as odict
+from functools import partial
+from hashlib import sha1
+from shelve import open as open_shelf
+
+from numpy import asarray, full
+
+import cython_init  # Executes pyximport install on module import # noqa.
+from iop import level_path
+
+# Where scores are stored if the persistent cache is enabled.
+default_path = 'params/scores'
+
+# Part of every key, bump to invalidate the stored scores.
+version = 1
+
+
+class ScoreCache:
+    """
+    A least-recently-used scores cache, with an optional on-disk store.
+
+    The size is the number of scores kept in memory. If a path is given,
+    scores are also read from and written to a shelf at the path.
+    """
+    def __init__(self, size=4096, path=None):
+        self.size = size
+        self.scores = odict()
+        self.shelf = None if path is None else open_shelf(path)
+        self.levels = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, bot, level, seeds=None):
+        """
+        Hashes the cache version, the bot's class and parameters with the
+        level's dimensions and contents (and the run seeds, if given).
+        """
+        digest = sha1("{} {} {key} {steps} {actions} {features}".format(
+                            version, type(bot).__module__, **level).encode())
+        digest.update(self.level_digest(level))
+        for key, param in sorted(bot.params.items()):
+            # Some bots also keep plain numbers among their parameters.
+            param = asarray(param)
+            digest.update("{} {} {}".format(key, param.dtype.str,
+                                            param.shape).encode())
+            digest.update(param.tobytes())
+        if seeds is not None:
+            digest.update(b"seeds")
+            digest.update(seeds.tobytes())
+        return digest.hexdigest()
+
+    def level_digest(self, level):
+        """
+        Returns a hash of the level's file (read once for each level).
+        """
+        key = level['key']
+        if key not in self.levels:
+            digest = sha1()
+            with open(level_path(key), 'rb') as level_file:
+                for chunk in iter(partial(level_file.read, 2 ** 20), b''):
+                    digest.update(chunk)
+            self.levels[key] = digest.digest()
+        return self.levels[key]
+
+    def get(self, bot, level, seeds=None):
+        """
+        Returns the cached score of the bot on the level or None if the bot
+        has not been evaluated yet (or is not deterministic and no run seeds
+        are given).
+
+        With seeds, the bot's run_scores are also restored.
+        """
+        if bot.deterministic:
+            key = self.key(bot, level)
+        elif seeds is not None:
+            key = self.key(bot, level, seeds)
+        else:
+            return None
+        if key in self.scores:
+            self.scores.move_to_end(key)
+        elif self.shelf is not None and key in self.shelf:
+            self.remember(key, self.shelf[key])
+        else:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if bot.deterministic:
+            if seeds is not None:
+                bot.run_scores = full(len(seeds), self.scores[key])
+            return self.scores[key]
+        score, bot.run_scores = self.scores[key]
+        return score
+
+    def put(self, bot, level, score, seeds=None):
+        """
+        Stores the bot's score on the level (if the bot is deterministic, or
+        was evaluated with the seeds, in which case its run_scores are stored
+        with the score).
+        """
+        if bot.deterministic:
+            key = self.key(bot, level)
+        elif seeds is not None:
+            key = self.key(bot, level, seeds)
+            score = (score, bot.run_scores)
+        else:
+            return
+        self.remember(key, score)
+        if self.shelf is not None:
+            self.shelf[key] = score
+
+    def remember(self, key, score):
+        """
+        Keeps the score in memory, forgetting the least recently used one if
+        the cache is full.
+        """
+        self.scores[key] = score
+        if len(self.scores) > self.size:
+            self.scores.popitem(last=False)
+
+    def close(self):
+        """
+        Writes out and closes the on-disk store (if any).
+        """
+        if self.shelf is not None:
+            self.shelf.close()
+            self.shelf = None
@@ -8,6 +8,17 @@ A command-line utility for gathering data. Only a collector name is required:
 By default the random bot is used to wander across the training level. Another
 bot or level can be selected using --bot (name and params key) and --level.
 
+Some collectors take a few options, for instance to probe just every 10th step
+(and only half of the actions at each probed step):
+
+    ./collect.py sps 10 1 2
+
+More data can be gathered at once with --runs, optionally spread among a few
+processes with --jobs; each run is seeded differently, and all of them are
+stored as a single data set:
+
+    ./collect.py srs --runs 24 --jobs 4
+
 Collectors vary greatly in what they do. They usually have a matching processor
 or trainer that can make use of the collected data.
 """
@@ -20,6 +31,11 @@ arguments = (
         'choices': available_collectors.keys(),
         'help': "collector to use"
     }),
+    (('config',), {
+        'nargs': '*',
+        'default': [],
+        'help': "options to pass to the collector (some may be required)"
+    }),
     (('-l', '--level'), {
         'default': 'train',
         'help': "level to collect from (levels/<level>_level.data)"
@@ -30,10 +46,20 @@ arguments = (
         'help': "bot and params key that will be used to wander the level"
     }),
     (('-i', '--iterations'), {
+        'type': int,
+        'default': 1,
+        'help': "number of data sets to collect (with the same config)"
+    }),
+    (('-r', '--runs'), {
         'type': int,
         'default': 1,
         'help': "level runs to make, amount of data to collect"
     }),
+    (('-j', '--jobs'), {
+        'type': int,
+        'default': 1,
+        'help': "number of worker processes making runs in parallel"
+    }),
     (('-s', '--prngs_seed'), {
         'type': int,
         'default': None,
@@ -41,7 +67,7 @@ arguments = (
     }),
     (('-o', '--output'), {
         'default': None,
-        'help': "file suffix in data/<collector>_<output>.npz"
+        'help': "file suffix in data/<collector>_<output>/"
     }),
     (('-v', '--verbosity'), {
         'type': int,
@@ -57,6 +83,9 @@ arguments = (
 
 if __name__ == '__main__':
     args = parse_args(description, arguments)
+    args.config = tuple(args.config)
+    if args.runs < 1 or args.jobs < 1:
+        raise ValueError("--runs and --jobs should be positive")
 
     for iteration in range(args.iterations):
         data, info = do_collect(**vars(args))
@@ -68,10 +97,11 @@ if __name__ == '__main__':
             info['date'] = date_desc(info['date'])
             info['level'] = level_desc(info['level'])
             info['time'] = time_desc(info['time'], args.precision)
+            info['config'] = " ".join(info['config'])
             out = ("\nDate: {date}\n" +
-                   "Collector: {collector}\n" +
+                   "Collector: {collector} {config}\n" +
                    "Level: {level}\n" +
                    "Bot: {bot[0]} {bot[1]}\n" +
-                   "Time: {time}\n" +
+                   "Runs: {runs}, Jobs: {jobs}, Time: {time}\n" +
                    "Output: {output}, PRNGs: {prngs_seed}\n").format(**info)
         print(out, flush=True)
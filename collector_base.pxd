@@ -5,8 +5,11 @@ cdef class BaseCollector:
     cdef:
         dict level
         BaseBot bot
+        object path
         list checkpoints
+        list snapshots
 
+    cpdef object allocate(self, str, tuple, str)
     cpdef int create_checkpoint(self)
     cpdef void load_checkpoint(self, int checkpoint)
     cpdef void clear_checkpoints(self)
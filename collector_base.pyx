@@ -1,4 +1,8 @@
+from os.path import join
+
 from cython import ccall, cclass, locals, returns
+from numpy import empty
+from numpy.lib.format import open_memmap
 
 from interface import (clear_all_checkpoints, create_checkpoint,
                        load_from_checkpoint)
@@ -8,47 +12,89 @@ from interface import (clear_all_checkpoints, create_checkpoint,
 class BaseCollector:
     """
     Abstract collector class, defines the interface.
+
+    Configurable collectors should provide a specification of their options
+    as an "arguments" attribute, in the same form as trainers.
     """
-    @locals(level='dict', bot='BaseBot')
-    def __init__(self, level, bot):
+    arguments = ()
+
+    @locals(level='dict', bot='BaseBot', config='tuple')
+    def __init__(self, level, bot, path=None, config=()):
         """
         Initializes the collector for the given level and bot.
+
+        If a data set directory path is given, records are written directly
+        to their shards (see allocate), rather than kept in memory.
         """
         self.level = level
         self.bot = bot
+        self.path = path
         self.checkpoints = []
+        self.snapshots = []
+
+        arguments_desc = ", ".join("{}: {}".format(n, t.__name__)
+                                   for n, t in self.arguments)
+        if len(config) < len(self.arguments):
+            raise ValueError("Too few arguments ({})".format(arguments_desc))
+        if len(config) > len(self.arguments):
+            raise ValueError("Too many arguments ({})".format(arguments_desc))
+        for (arg, parser), value in zip(self.arguments, config):
+            setattr(self, arg, parser(value))
+
+    @ccall
+    @returns('object')
+    @locals(name='str', shape='tuple', dtype='str')
+    def allocate(self, name, shape, dtype):
+        """
+        Creates an array for a record of the given shape and type.
+
+        With a data set path the array is a memory-mapped .npy shard, so the
+        collected data can be flushed to the disk while the collector runs.
+        """
+        if self.path is None:
+            return empty(shape, dtype=dtype)
+        return open_memmap(join(self.path, '{}.npy'.format(name)), mode='w+',
+                           dtype=dtype, shape=shape)
 
     @ccall
     @returns('int')
-    @locals(checkpoint='int', bot='BaseBot')
+    @locals(index='int', snapshot='BaseBot')
     def create_checkpoint(self):
         """
         Marks game and bot state for future restoration.
+
+        The bot state is copied to a snapshot bot (see BaseBot.load_state);
+        the snapshots are created once and reused after the checkpoints are
+        cleared, so only the bot's mutable state is copied at each step.
         """
-        checkpoint = create_checkpoint()
-        bot = self.bot.clone()
-        self.checkpoints.append((checkpoint, bot))
-        return len(self.checkpoints) - 1
+        index = len(self.checkpoints)
+        if index == len(self.snapshots):
+            self.snapshots.append(self.bot.clone())
+        else:
+            snapshot = self.snapshots[index]
+            snapshot.load_state(self.bot)
+        self.checkpoints.append(create_checkpoint())
+        return index
 
     @ccall
     @returns('void')
-    @locals(index='int', checkpoint='int', bot='BaseBot')
+    @locals(index='int')
     def load_checkpoint(self, index):
         """
         Brings the game and bot state to a past point.
         """
-        checkpoint, bot = self.checkpoints[index]
-        load_from_checkpoint(checkpoint)
-        self.bot = bot
+        load_from_checkpoint(self.checkpoints[index])
+        self.bot.load_state(self.snapshots[index])
 
     @ccall
     @returns('void')
     def clear_checkpoints(self):
         """
-        Removes all checkpoints (potentially freeing up some memory).
+        Removes all checkpoints (potentially freeing up some memory), the
+        snapshot bots are kept for reuse.
         """
         clear_all_checkpoints()
-        self.checkpoints = []
+        del self.checkpoints[:]
 
     @ccall
     @returns('dict')
@@ -0,0 +1,8 @@
+from collector_base cimport BaseCollector
+
+
+cdef class Collector(BaseCollector):
+    cdef:
+        public int interval
+        public float fraction
+        public int probes
@@ -0,0 +1,92 @@
+"""
+Collects states at every step, and rewards and following states for a sample
+of (step, action) pairs.
+
+Trying every action at every step (as srs and sss do) costs a checkpoint
+round trip per action and step. This collector only probes steps that are
+multiples of an interval, and out of those a random fraction; at a probed
+step a random subset of actions is tried.
+
+The config should consist of an integer, a float and another integer: the
+probing interval, the fraction of steps to probe and the number of actions to
+try at each probed step. For example, "10 1 4" probes all 4 actions at every
+10th step, "1 .1 4" a random tenth of the steps, and "1 1 2" two random
+actions at every step.
+
+Indices of the probed steps are stored as "probed"; rewards and following
+states have a row for each of them, with NaNs for the actions not tried.
+"""
+from cython import ccall, cclass, locals, returns
+from numpy import arange, argsort, nan, nonzero
+from numpy.random import random_sample
+
+from collector_base import BaseCollector
+
+from interface cimport c_do_action, c_get_score, c_get_state
+
+
+@cclass
+class Collector(BaseCollector):
+    arguments = (
+        ('interval', int),
+        ('fraction', float),
+        ('probes', int)
+    )
+
+    @ccall
+    @returns('dict')
+    @locals(steps='int', step='int', actions='int', action='int',
+            features='int', feature='int', state='float*', checkpoint='int',
+            probe='int', probes='int', score='float',
+            probed='int[:]', tried='bint[:, :]', states='float[:, :]',
+            rewards='float[:, :]', following_states='float[:, :, :]')
+    def collect(self):
+        steps = self.level['steps']
+        actions = self.level['actions']
+        features = self.level['features']
+        if self.interval < 1 or not 0 < self.fraction <= 1:
+            raise ValueError("The interval should be positive and the " +
+                             "fraction in (0, 1]")
+
+        # Draw the steps and actions to probe up front.
+        selected = ((arange(steps) % self.interval == 0) &
+                    (random_sample(steps) < self.fraction))
+        selected = nonzero(selected)[0]
+        probes = selected.shape[0]
+        probed = self.allocate('probed', (probes,), 'i4')
+        for probe in range(probes):
+            probed[probe] = selected[probe]
+        order = argsort(random_sample((probes, actions)), axis=1)
+        tried = (order < min(self.probes, actions)).astype('intc')
+
+        states = self.allocate('states', (steps, features), 'f4')
+        rewards = self.allocate('rewards', (probes, actions), 'f4')
+        following_states = self.allocate('following_states',
+                                         (probes, actions, features), 'f4')
+
+        probe = 0
+        for step in range(steps):
+            state = c_get_state()
+            for feature in range(features):
+                states[step, feature] = state[feature]
+            if probe < probes and probed[probe] == step:
+                score = c_get_score()
+                checkpoint = self.create_checkpoint()
+                for action in range(actions):
+                    if not tried[probe, action]:
+                        rewards[probe, action] = nan
+                        following_states[probe, action, :] = nan
+                        continue
+                    c_do_action(action)
+                    rewards[probe, action] = c_get_score() - score
+                    state = c_get_state()
+                    for feature in range(features):
+                        following_states[probe, action, feature] = (
+                                                                state[feature])
+                    self.load_checkpoint(checkpoint)
+                self.clear_checkpoints()
+                probe += 1
+            self.bot.act(1)
+
+        return {'states': states, 'probed': probed, 'rewards': rewards,
+                'following_states': following_states}
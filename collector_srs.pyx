@@ -3,7 +3,6 @@ Collects (state, immediate rewards) tuples, trying each action at every step
 of a level playthrough.
 """
 from cython import ccall, cclass, locals, returns
-from numpy import empty
 
 from collector_base import BaseCollector
 
@@ -21,8 +20,8 @@ class Collector(BaseCollector):
         steps = self.level['steps']
         actions = self.level['actions']
         features = self.level['features']
-        states = empty((steps, features), dtype='f4')
-        rewards = empty((steps, actions), dtype='f4')
+        states = self.allocate('states', (steps, features), 'f4')
+        rewards = self.allocate('rewards', (steps, actions), 'f4')
 
         for step in range(steps):
             state = c_get_state()
@@ -6,7 +6,6 @@ The final state and score are also stored (thus the actions array is one item
 shorter than the arrays for states and scores).
 """
 from cython import ccall, cclass, locals, returns
-from numpy import empty
 
 from collector_base import BaseCollector
 
@@ -23,9 +22,9 @@ class Collector(BaseCollector):
     def collect(self):
         steps = self.level['steps']
         features = self.level['features']
-        states = empty((steps + 1, features), dtype='f4')
-        scores = empty(steps + 1, dtype='f4')
-        actions = empty(steps, dtype='i4')
+        states = self.allocate('states', (steps + 1, features), 'f4')
+        scores = self.allocate('scores', (steps + 1,), 'f4')
+        actions = self.allocate('actions', (steps,), 'i4')
 
         for step in range(steps):
             state = c_get_state()
@@ -3,7 +3,6 @@ Collects (state, following states) tuples, trying each action at every step of
 a level run.
 """
 from cython import ccall, cclass, locals, returns
-from numpy import empty
 
 from collector_base import BaseCollector
 
@@ -21,8 +20,9 @@ class Collector(BaseCollector):
         steps = self.level['steps']
         actions = self.level['actions']
         features = self.level['features']
-        states = empty((steps, features), dtype='f4')
-        following_states = empty((steps, actions, features), dtype='f4')
+        states = self.allocate('states', (steps, features), 'f4')
+        following_states = self.allocate('following_states',
+                                         (steps, actions, features), 'f4')
 
         for step in range(steps):
             state = c_get_state()
@@ -1,10 +1,12 @@
 from collections import OrderedDict as odict
 
+from collector_sps cimport Collector as CollectorSps
 from collector_srs cimport Collector as CollectorSrs
 from collector_ssa cimport Collector as CollectorSsa
 from collector_sss cimport Collector as CollectorSss
 
 available_collectors = odict((
+    ('sps', CollectorSps),
     ('srs', CollectorSrs),
     ('ssa', CollectorSsa),
     ('sss', CollectorSss)
@@ -2,37 +2,75 @@
 Proxies between command-line utilities and statically compiled implementations.
 """
 from collections import OrderedDict as odict
+from contextlib import redirect_stdout
 from datetime import datetime
 from heapq import heappop, heappush
-from time import clock
+from math import ceil, log2
+from multiprocessing import Pool
+from os import devnull
+from os.path import dirname, exists, join
+from tempfile import TemporaryDirectory
+from time import clock, perf_counter
+
+from numpy import array, asarray
+from scipy.stats import beta, norm
 
 import cython_init  # Executes pyximport install on module import # noqa.
 from bots import available_bots
+from cache import ScoreCache, default_path
 from collectors import available_collectors
-from iop import (common_printoptions, first_free, load_data, load_level,
-                 load_params, save_data, save_params)
-from prngs import seed_prngs
+from evaluator import Evaluator
+from iop import (common_printoptions, create_data, data_formats, first_free,
+                 load_data, load_level, load_params, save_data, save_params,
+                 save_records)
+from prngs import pool_dists, seed_prngs
 from processors import available_processors
+from profiler import enable as enable_profile, note, now, stages
 from trainers import available_trainers
 
-from interface import finish
+from interface import finish, reset_level
+
+try:
+    from interface import create_level
+except ImportError:
+    # Only the stand-in interface can create levels.
+    create_level = None
+
+# The level loaded by a collecting worker process (or the main one).
+collect_level = None
 
 
-def do_play(bot, params, levels, runs, prngs_seed, verbosity, **kwargs):
+def do_play(bot, params, levels, runs, score_cache, profile, prngs_seed,
+            verbosity, **kwargs):
     """
     Evaluates the bot with params on some levels.
+
+    With the score cache enabled, scores of deterministic bots are stored on
+    disk and not recomputed when the same params are played again. With
+    profile, time spent in the stages of the session is measured (see the
+    profiler module).
     """
     common_printoptions()
     prngs_seed = seed_prngs(prngs_seed)
+    enable_profile(profile)
 
     start = clock()
     bot_class = available_bots[bot]
     params_key, params = load_params(bot, params, verbosity)[:2]
+    cache = ScoreCache(path=default_path if score_cache else None)
     scores = odict()
     for level in levels:
+        stage = now()
         level = load_level(level, verbosity)
-        scores[level['key']] = bot_class(level, params).evaluate(runs)
+        bot_ = bot_class(level, params)
+        note('setup', stage)
+        score = cache.get(bot_, level)
+        if score is None:
+            score = bot_.evaluate(runs)
+            cache.put(bot_, level, score)
+        scores[level['key']] = score
         finish(verbose=verbosity > 3)
+    cache.close()
     end = clock()
 
     return {'date': datetime.utcnow(),
@@ -42,22 +80,71 @@ def do_play(bot, params, levels, runs, prngs_seed, verbosity, **kwargs):
             'runs': runs,
             'scores': scores,
             'time': end - start,
+            'profile': stages() if profile else None,
             'prngs_seed': prngs_seed}
 
 
+def screening_schedule(pool, seeds, steps, runs, screening):
+    """
+    Plans a successive halving of a pool of random seeds down to the given
+    number of seeds, as a tuple of (survivors, steps, runs) rounds.
+
+    Each round keeps half of the remaining seeds (the last one just the
+    seeds) and plays twice as many level steps as the previous one, with the
+    last round playing the full level with all runs, and the earlier ones a
+    single run. The screening fraction bounds the part of the level played
+    in the first rounds from below (0 disables screening, scoring the whole
+    pool on the full level).
+    """
+    if not screening or pool <= seeds:
+        return ((seeds, steps, runs),)
+    rounds = int(ceil(log2(pool / seeds)))
+    schedule = []
+    for round_ in range(1, rounds + 1):
+        fraction = max(screening, .5 ** (rounds - round_))
+        schedule.append((max(seeds, int(ceil(pool / 2 ** round_))),
+                         max(1, int(fraction * steps)),
+                         runs if round_ == rounds else 1))
+    return tuple(schedule)
+
+
 def do_train(bot, trainer, config, dists, emphases, phases,
-             random_seeds, random_seeds_pool,
+             random_seeds, random_seeds_pool, screening,
              stored_seeds, param_map, param_freeze, param_scale,
              level, eval_levels,
-             runs, prngs_seed, output, verbosity, **kwargs):
+             runs, common, adaptive, jobs, candidates, incremental,
+             score_cache, abort, abort_margin, profile, prngs_seed, output,
+             verbosity, **kwargs):
     """
     Chooses the right bot and trainer, loads the level, generates or loads
     some seeds and lets the trainer work.
+
+    With more than one job, bots are evaluated by a pool of worker processes,
+    each with its own copy of the level. A non-zero incremental interval lets
+    variations of a bot be evaluated by replaying just a part of the level.
+    Scores of deterministic bots are cached, with score_cache also on disk.
+    A non-zero abort interval lets hopeless variations be given up on before
+    the level end. With common, all bots play the runs with the same random
+    streams, so that stochastic bots are compared pairwise. A non-zero
+    adaptive threshold lets variations of stochastic bots be played only as
+    many runs as needed to tell if they are better than their parent.
+
+    With screening, the pool of random seeds is narrowed down by successive
+    halving (see screening_schedule()), scoring most of the seeds on just a
+    prefix of the level.
+
+    Variates of the distributions are drawn in blocks, from generators seeded
+    with the session seed (see prngs.pool_dists()).
+
+    With profile, counts and times of the session stages (seeds screening,
+    training, evaluations on other levels) and of their parts (evaluating,
+    cloning, varying, sampling) are stored in the history.
     """
     if output is None:
         output = first_free('params/{}'.format(bot))
     common_printoptions()
     prngs_seed = seed_prngs(prngs_seed)
+    enable_profile(profile)
 
     start = clock()
     bot_class = available_bots[bot]
@@ -72,29 +159,75 @@ def do_train(bot, trainer, config, dists, emphases, phases,
         weights[int(index)] = float(weight)
     emphases = tuple(weights)
 
+    cache = ScoreCache(path=default_path if score_cache else None)
+    evaluator = Evaluator(level, runs, jobs, prngs_seed, verbosity,
+                          incremental, cache, abort, abort_margin, common,
+                          adaptive)
+    variates = pool_dists(dists, prngs_seed)
+
     # Load and/or draw some starting parameters.
+    stage = now()
     seeds = []
     for index, seed in enumerate(stored_seeds):
         params_key, params, history = load_params(bot, seed, verbosity)
         bot_ = bot_class(level, params, param_map, param_freeze, param_scale,
-                         dists, emphases, phases)
+                         variates, emphases, phases)
         heappush(seeds, (float('inf'), index, bot_, history))
-    for index in range(random_seeds_pool):
-        bot_ = bot_class(level, dists=dists, emphases=emphases, phases=phases)
-        score = bot_.evaluate(runs)
-        heappush(seeds, (score, index + len(stored_seeds), bot_, []))
-        if len(seeds) > len(stored_seeds) + random_seeds:
-            heappop(seeds)
+    # Random seeds are drawn and scored in batches of a few per job; with
+    # screening, the survivors of the first round are then scored again.
+    schedule = screening_schedule(random_seeds_pool, random_seeds,
+                                  level['steps'], runs, screening)
+
+    def score(bots, steps, runs_):
+        if steps == level['steps'] and runs_ == runs:
+            return evaluator.evaluate(bots)
+        return evaluator.screen(bots, steps, runs_)
+
+    survivors, steps, runs_ = schedule[0]
+    batch_size = 16 * jobs
+    for batch_start in range(0, random_seeds_pool, batch_size):
+        batch_end = min(batch_start + batch_size, random_seeds_pool)
+        bots = [bot_class(level, dists=variates, emphases=emphases,
+                          phases=phases)
+                for index in range(batch_start, batch_end)]
+        scores = score(bots, steps, runs_)
+        for index, bot_, score_ in zip(range(batch_start, batch_end), bots,
+                                       scores):
+            heappush(seeds, (score_, index + len(stored_seeds), bot_, []))
+            if len(seeds) > len(stored_seeds) + survivors:
+                heappop(seeds)
+    for survivors, steps, runs_ in schedule[1:]:
+        randoms = [s for s in seeds if s[1] >= len(stored_seeds)]
+        seeds = [s for s in seeds if s[1] < len(stored_seeds)]
+        scores = score([s[2] for s in randoms], steps, runs_)
+        for (_, index, bot_, history), score_ in zip(randoms, scores):
+            heappush(seeds, (score_, index, bot_, history))
+            if len(seeds) > len(stored_seeds) + survivors:
+                heappop(seeds)
     seeds = tuple((s[2], s[3]) for s in seeds)
+    note('seeds', stage, len(stored_seeds) + random_seeds_pool)
 
-    trainer_ = trainer_class(level, config, dists, emphases, seeds, runs)
-    params, history = trainer_.train()
+    stage = now()
+    trainer_ = trainer_class(level, config, variates, emphases, seeds, runs,
+                             evaluator, candidates)
+    try:
+        params, history = trainer_.train()
+    finally:
+        evaluator.close()
+    note('training', stage)
 
     # Evaluate the params on more than just the training level.
+    stage = now()
     scores = odict()
     for key in eval_levels:
         level_ = load_level(key, verbosity)
-        scores[key] = bot_class(level_, params).evaluate(runs)
+        bot_ = bot_class(level_, params)
+        scores[key] = cache.get(bot_, level_)
+        if scores[key] is None:
+            scores[key] = bot_.evaluate(runs)
+            cache.put(bot_, level_, scores[key])
+    note('eval levels', stage, len(eval_levels))
+    cache.close()
     end = clock()
 
     # Save the final parameters with their history.
@@ -107,14 +240,25 @@ def do_train(bot, trainer, config, dists, emphases, phases,
         'emphases': emphases,
         'phases': phases,
         'seeds': (stored_seeds, random_seeds, random_seeds_pool),
+        'screening': schedule if len(schedule) > 1 else (),
         'param_map': param_map,
         'param_freeze': param_freeze,
         'param_scale': param_scale,
         'level': level,
         'runs': runs,
+        'common': common,
+        'adaptive': (adaptive, evaluator.decisions, evaluator.decision_runs),
+        'jobs': jobs,
+        'candidates': candidates,
+        'incremental': incremental,
+        'score_cache': score_cache,
+        'abort': (abort, abort_margin, evaluator.aborted),
+        'evaluations': (evaluator.evaluations, evaluator.steps,
+                        evaluator.steps_saved),
         'output': output,
         'scores': scores,
         'time': end - start,
+        'profile': stages() if profile else None,
         'prngs_seed': prngs_seed
     }
     history.append(meta)
@@ -122,12 +266,40 @@ def do_train(bot, trainer, config, dists, emphases, phases,
     return params, meta
 
 
-def do_collect(collector, level, bot, prngs_seed, output, verbosity, **kwargs):
+def init_collect_worker(level_key, verbosity):
+    """
+    Loads the level in a newly started collecting process.
+    """
+    global collect_level
+    collect_level = load_level(level_key, verbosity)
+
+
+def collect_run(task):
+    """
+    Plays a single collector run, with generators seeded with the given seed,
+    streaming records into the run directory. Returns the records names.
+    """
+    collector, config, bot_class, params, path, seed = task
+    seed_prngs(seed)
+    reset_level()
+    bot = bot_class(collect_level, params)
+    collector_ = available_collectors[collector](collect_level, bot, path,
+                                                 config)
+    return save_records(path, collector_.collect())
+
+
+def do_collect(collector, config, level, bot, runs, jobs, prngs_seed, output,
+               verbosity, **kwargs):
     """
     Collects data from the level using the given collector.
+
+    Makes a number of runs, each seeded with a different seed following the
+    session one, and with more than one job spreads them among a pool of
+    worker processes. All runs are stored in a single data set.
     """
+    global collect_level
     if output is None:
-        output = first_free('data/{}'.format(collector))
+        output = first_free('data/{}'.format(collector), data_formats)
     common_printoptions()
     prngs_seed = seed_prngs(prngs_seed)
 
@@ -138,34 +310,55 @@ def do_collect(collector, level, bot, prngs_seed, output, verbosity, **kwargs):
         params_key, params = load_params(*bot, verbosity=verbosity)[:2]
     else:
         params_key, params = None, {}
-    bot_ = bot_class(level, params)
-    collector_ = available_collectors[collector](level, bot_)
-    data = collector_.collect()
+    paths = create_data(collector, output, runs, verbosity)
+    seeds = tuple((prngs_seed + run) % 2 ** 32 for run in range(runs))
+    tasks = [(collector, config, bot_class, params, path, seed)
+             for path, seed in zip(paths, seeds)]
+    if jobs > 1 and runs > 1:
+        pool = Pool(min(jobs, runs), init_collect_worker,
+                    (level['key'], verbosity))
+        runs_shards = pool.map(collect_run, tasks)
+        pool.close()
+        pool.join()
+    else:
+        collect_level = level
+        runs_shards = [collect_run(task) for task in tasks]
+    # Runs may end up with different records (for instance, if one ends early).
+    shards = tuple(odict.fromkeys(s for r in runs_shards for s in r))
     end = clock()
 
     meta = {
         'date': datetime.utcnow(),
         'collector': collector,
+        'config': config,
         'level': level,
         'bot': (bot[0], params_key),
+        'runs': runs,
+        'jobs': jobs,
+        'seeds': seeds,
         'output': '{}_{}'.format(collector, output),
         'time': end - start,
         'prngs_seed': prngs_seed
     }
-    save_data(collector, output, data, meta, verbosity)
-    return data, meta
+    save_data(collector, output, shards, meta, verbosity)
+    return load_data(collector, output, verbosity), meta
 
 
-def do_process(processor, input_, prngs_seed, verbosity, **kwargs):
+def do_process(processor, input_, jobs, prngs_seed, verbosity, **kwargs):
     """
     Analyses data collected by a collector.
+
+    All runs of the given data sets are processed together, as if they were
+    separate inputs. With more than one job, records are accumulated by a
+    pool of worker processes.
     """
     common_printoptions()
     prngs_seed = seed_prngs(prngs_seed)
 
     start = clock()
-    data = tuple(load_data(*key, verbosity=verbosity) for key in input_)
-    processor_ = available_processors[processor](data)
+    data = tuple(run for key in input_
+                 for run in load_data(*key, verbosity=verbosity))
+    processor_ = available_processors[processor](data, jobs)
     results = processor_.process()
     end = clock()
 
@@ -173,7 +366,240 @@ def do_process(processor, input_, prngs_seed, verbosity, **kwargs):
         'date': datetime.utcnow(),
         'processor': processor,
         'input': input_,
+        'jobs': jobs,
         'time': end - start,
         'prngs_seed': prngs_seed
     }
     return results, meta
+
+
+# Groups of benchmarks that do_bench() can run.
+bench_groups = ('bots', 'trainers', 'collectors', 'processors', 'params')
+
+# Benchmarked configurations, as small as the tests' ones.
+bench_dists = {
+    'real': norm(0, 1),
+    'unit': beta(2, 2),
+    'new': {},
+    'vary': {},
+    'variations': beta(2, 2, loc=1, scale=9),
+    'acceptance': beta(1, 1, loc=-100, scale=110)
+}
+bench_trainers = {
+    'anneal': (5, 2, 1),
+    'anneal_d': (5, 2, 1, .1),
+    'cma': (2, 4, .1),
+    'comb': (3,),
+    'comb_phases': (3,),
+    'local': (5, 1),
+    'local_d': (5, 1, .1),
+    'select': (),
+    'tempering': (2, 2, 2, .1, 1.)
+}
+bench_collectors = {
+    'sps': (10, .5, 2)
+}
+bench_phases = array([.33, .67, 1.], dtype='f4')
+
+# Bots that assume 4 actions, and ones that cannot play a single step at once.
+bench_four_actions = ('random', 'random_1', 'random_5', 'random_n', 'simi')
+bench_sequences = ('random_5', 'random_n')
+
+
+def bench_level(level, substeps, verbosity):
+    """
+    Loads a named level, or creates and loads a synthetic one for a
+    <steps>x<actions>x<features> description (requires the stand-in).
+    """
+    try:
+        steps, actions, features = map(int, level.split('x'))
+    except ValueError:
+        return load_level(level, verbosity)
+    if create_level is None:
+        raise ValueError("Synthetic levels need the stand-in interface")
+    key = 'bench_{}_{}_{}_{}'.format(steps, actions, features, substeps)
+    path = join(dirname(__file__), 'levels', '{}_level.data'.format(key))
+    if not exists(path):
+        create_level(path, steps, actions, features, 0, substeps)
+    return load_level(key, verbosity)
+
+
+def bench_rate(setup, repeat):
+    """
+    Calls setup() repeat times and times the function that it returns.
+
+    The function should return the amount of work done, the highest amount
+    per second is returned.
+    """
+    rate = 0
+    for iteration in range(repeat):
+        function = setup()
+        start = perf_counter()
+        work = function()
+        rate = max(rate, work / (perf_counter() - start))
+    return rate
+
+
+def do_bench(levels, groups, repeat, substeps, prngs_seed, verbosity,
+             **kwargs):
+    """
+    Measures the throughput of bots, trainers, collectors and processors, and
+    the latency of saving and loading params, on each of the levels.
+
+    Bots are measured both playing whole levels and a single step at a time
+    (as collectors play them), in level steps per second. Trainers and
+    collectors are also measured in level steps per second, processors in
+    megabytes of records per second, and params saving and loading in
+    milliseconds. Each measurement is the best of repeat ones.
+
+    Returns an ordered dict of "<group> <name> <level>" keys mapping to
+    (value, unit) pairs, and the session info.
+    """
+    prngs_seed = seed_prngs(prngs_seed)
+    dists = pool_dists(bench_dists, prngs_seed)
+    results = odict()
+
+    start = clock()
+    for level_key in levels:
+        level = bench_level(level_key, substeps, verbosity)
+        steps = level['steps']
+        emphases = (1.,) * level['features']
+        seed_prngs(prngs_seed)
+
+        def result(group, name, value, unit):
+            key = '{} {} {}'.format(group, name, level_key)
+            results[key] = (value, unit)
+            if verbosity > 1:
+                print("{}: {:.1f} {}".format(key, value, unit), flush=True)
+
+        def new_bot(bot_key):
+            bot_class = available_bots[bot_key]
+            return bot_class(level, dists=dists, emphases=emphases,
+                             phases=bench_phases if bot_class.multi else None)
+
+        bot_keys = [k for k in available_bots
+                    if level['actions'] == 4 or k not in bench_four_actions]
+        bots = {k: new_bot(k) for k in bot_keys}
+        collector_bot_key = 'random' if level['actions'] == 4 else 'linear'
+        collector_bot = new_bot(collector_bot_key)
+
+        if 'bots' in groups:
+            for bot_key, bot in bots.items():
+                def evaluate():
+                    bot.evaluate(1)
+                    return steps
+                result('bots', bot_key, bench_rate(lambda: evaluate, repeat),
+                       'steps/s')
+                if bot_key in bench_sequences:
+                    continue
+
+                def act():
+                    reset_level()
+                    for step in range(steps):
+                        bot.act(1)
+                    return steps
+                result('bots', '{} act(1)'.format(bot_key),
+                       bench_rate(lambda: act, repeat), 'steps/s')
+
+        if 'trainers' in groups:
+            seeds = tuple((new_bot('linear_m'), []) for seed in range(2))
+            for trainer_key, config in bench_trainers.items():
+                def setup():
+                    evaluator = Evaluator(level, 1)
+                    trainer = available_trainers[trainer_key](
+                                    level, config, dists, emphases, seeds, 1,
+                                    evaluator)
+
+                    def train():
+                        with open(devnull, 'w') as null, redirect_stdout(null):
+                            trainer.train()
+                        return evaluator.steps
+                    return train
+                rate = bench_rate(setup, repeat)
+                # Some trainers only combine the seeds, without playing.
+                if rate:
+                    result('trainers', trainer_key, rate, 'steps/s')
+
+        data = {}
+        if 'collectors' in groups or 'processors' in groups:
+            for collector_key, collector_class in available_collectors.items():
+                config = bench_collectors.get(collector_key, ())
+
+                def collect():
+                    reset_level()
+                    collector = collector_class(level, collector_bot,
+                                                config=config)
+                    record = collector.collect()
+                    meta = {'collector': collector_key, 'level': level,
+                            'bot': (collector_bot_key, None)}
+                    data[collector_key] = (
+                        ({k: asarray(v) for k, v in record.items()}, meta),)
+                    return steps
+                rate = bench_rate(lambda: collect, repeat)
+                if 'collectors' in groups:
+                    result('collectors', collector_key, rate, 'steps/s')
+
+        if 'processors' in groups:
+            for processor_key, processor_class in available_processors.items():
+                records = data[processor_class.formats[0]]
+                size = sum(v.nbytes for r, m in records for v in r.values())
+
+                def process():
+                    processor_class(records).process()
+                    return size / 2 ** 20
+                result('processors', processor_key,
+                       bench_rate(lambda: process, repeat), 'MB/s')
+
+        if 'params' in groups:
+            with TemporaryDirectory() as folder:
+                for bot_key, bot in bots.items():
+                    path = join(folder, bot_key)
+
+                    # Single calls are too short to be timed reliably.
+                    def save():
+                        for call in range(10):
+                            save_params(bot_key, path, dict(bot.params), [], 0)
+                        return 10
+
+                    def load():
+                        for call in range(10):
+                            load_params(bot_key, path, 0)
+                        return 10
+                    result('params', '{} save'.format(bot_key),
+                           1000 / bench_rate(lambda: save, repeat), 'ms')
+                    result('params', '{} load'.format(bot_key),
+                           1000 / bench_rate(lambda: load, repeat), 'ms')
+        finish(verbose=verbosity > 3)
+    end = clock()
+
+    meta = {
+        'date': datetime.utcnow(),
+        'levels': levels,
+        'groups': groups,
+        'repeat': repeat,
+        'substeps': substeps,
+        'time': end - start,
+        'prngs_seed': prngs_seed
+    }
+    return results, meta
+
+
+def compare_bench(results, baseline, threshold):
+    """
+    Lists results that are worse than the baseline ones by more than the
+    threshold fraction, as (key, value, baseline value, unit) tuples.
+
+    Times (in ms) are better when lower, other results when higher.
+    """
+    regressions = []
+    for key, (value, unit) in results.items():
+        if key not in baseline:
+            continue
+        base_value = baseline[key][0]
+        if unit == 'ms':
+            ratio = base_value / value if value else float('inf')
+        else:
+            ratio = value / base_value if base_value else float('inf')
+        if ratio < 1 - threshold:
+            regressions.append((key, value, base_value, unit))
+    return regressions
@@ -1,37 +1,68 @@
 from functools import wraps
+from os import environ
+from os.path import expanduser, join
 
 import numpy
 import pyximport.pyximport
 
+# Directives that deactivate all Cython safety checks and compatibility
+# options (do not use without first testing that things work reliably).
+unsafe_directives = {
+    'boundscheck': False,
+    'wraparound': False,
+    'initializedcheck': False,
+    'cdivision': True,
+    'always_allow_keywords': False
+}
 
-def cython_on_demand(unsafe):
+# Build profiles, as triples of directives, C macros and compiler arguments.
+# The checked profile keeps Cython's default checks (indexing, division),
+# linetrace makes compiled functions report calls and executed lines to the
+# Python tracing hooks (and is much slower), the default profile is unsafe.
+# The kernels (kernels.pxd) are written to be vectorized per input, so for the
+# optimized build loop vectorization (that goes across inputs, only adding
+# shuffles) is disabled.
+build_profiles = {
+    'unsafe': (unsafe_directives, (), ('-fno-tree-loop-vectorize',)),
+    'checked': ({}, (), ()),
+    'linetrace': (dict(unsafe_directives, binding=True, profile=True,
+                       linetrace=True),
+                  (('CYTHON_TRACE', '1'),), ())
+}
+
+
+def cython_on_demand(profile):
     """
     Enables loading .pyx files from .py files (on-demand compilation).
 
-    With `unsafe` deactivates all Cython safety checks and compatibility
-    options (do not use without first testing that things work reliably).
+    The profile selects compilation options (see build_profiles). Every
+    profile has a build directory of its own (~/.pyxbld/<profile>), thus
+    switching between profiles does not cause recompilations.
     """
-    if unsafe:
-        _old_get_du_ext = pyximport.pyximport.get_distutils_extension
-
-        @wraps(_old_get_du_ext)
-        def _new_get_du_ext(*args, **kwargs):
-            extension, setup_args = _old_get_du_ext(*args, **kwargs)
-            directives = getattr(extension, 'cython_directives', {})
-            directives.update({
-                'language_level': 3,
-                'boundscheck': False,
-                'wraparound': False,
-                'initializedcheck': False,
-                'cdivision': True,
-                'always_allow_keywords': False
-            })
-            extension.cython_directives = directives
-            return extension, setup_args
-
-        pyximport.pyximport.get_distutils_extension = _new_get_du_ext
-
-    pyximport.install(setup_args={'include_dirs': numpy.get_include()})
-
-# Needs to be executed before other imports.
-cython_on_demand(unsafe=True)
+    try:
+        directives, macros, compile_args = build_profiles[profile]
+    except KeyError:
+        raise ValueError("No such build profile {} (choose from {})".format(
+                            profile, ", ".join(sorted(build_profiles))))
+    _old_get_du_ext = pyximport.pyximport.get_distutils_extension
+
+    @wraps(_old_get_du_ext)
+    def _new_get_du_ext(*args, **kwargs):
+        extension, setup_args = _old_get_du_ext(*args, **kwargs)
+        directives_ = getattr(extension, 'cython_directives', {})
+        directives_['language_level'] = 3
+        directives_.update(directives)
+        extension.cython_directives = directives_
+        extension.define_macros.extend(macros)
+        extension.extra_compile_args.extend(compile_args)
+        return extension, setup_args
+
+    pyximport.pyximport.get_distutils_extension = _new_get_du_ext
+
+    build_dir = join(expanduser('~'), '.pyxbld', profile)
+    pyximport.install(build_dir=build_dir,
+                      setup_args={'include_dirs': numpy.get_include()})
+
+# Needs to be executed before other imports. The profile can be chosen with
+# the BLACKBOX_BUILD environment variable.
+cython_on_demand(environ.get('BLACKBOX_BUILD', 'unsafe'))
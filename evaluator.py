@@ -0,0 +1,337 @@
+"""
+Scoring of bots, either in the current process or in a pool of workers.
+
+The game interface holds a single, global level per process, thus to use more
+than one core we need to fork a couple of processes, each with its own copy of
+the level. Bots are sent to workers as their class and parameters, and rebuilt
+there, so any state that is not kept in the params dict is not transferred.
+
+Variations of a single parent bot may also be evaluated incrementally, playing
+only a part of the level (see the playthrough module). This is done in the
+current process only.
+
+Otherwise, evaluations may be aborted early: bots record their intermediate
+scores, and a variation whose score falls too far below its parent's at the
+same point of the level is given up on (and scored -inf).
+
+With common random numbers, the generators are reseeded before each run from
+a fixed set of run seeds, so that a stochastic candidate and its parent are
+compared on the same random streams.
+
+Variations of a stochastic parent may also be evaluated sequentially, adding
+runs only while the difference from the parent's score remains uncertain.
+"""
+from math import sqrt
+from multiprocessing import Pool, current_process
+
+from numpy import asarray
+
+import cython_init  # Executes pyximport install on module import # noqa.
+from iop import load_level
+from playthrough import Playthrough
+from prngs import run_seeds, seed_prngs
+
+# The level loaded by a worker process (one for each worker).
+worker_level = None
+
+
+def init_worker(level_key, prngs_seed, verbosity):
+    """
+    Loads the level and seeds generators in a newly started worker process.
+
+    Each worker gets a different seed derived from the session seed.
+    """
+    global worker_level
+    worker_index = current_process()._identity[0]
+    seed_prngs((prngs_seed + worker_index) % 2 ** 32)
+    worker_level = load_level(level_key, verbosity)
+
+
+def evaluate_params(task):
+    """
+    Recreates a bot from its class and params and plays the worker's level
+    (or its first steps, if steps is non-zero).
+
+    Returns the score and the bot's per-run scores (if seeds are given).
+    """
+    bot_class, params, runs, steps, seeds = task
+    bot = bot_class(worker_level, params)
+    score = bot.evaluate(runs, 0, None, steps, seeds)
+    return score, bot.run_scores
+
+
+def evaluate_bounded(task):
+    """
+    Plays the worker's level with a bot rebuilt from its class and params,
+    noting intermediate scores and possibly aborting early.
+
+    Returns the score, the bot's score trajectory, the steps played and the
+    per-run scores (if seeds are given).
+    """
+    bot_class, params, runs, interval, bounds, seeds = task
+    bot = bot_class(worker_level, params)
+    score = bot.evaluate(runs, interval, bounds, 0, seeds)
+    return score, bot.trajectory, bot.played, bot.run_scores
+
+
+class Evaluator:
+    """
+    Evaluates batches of bots on a level.
+
+    With a single job, bots are simply evaluated one after another in the
+    current process (using the level that is already loaded). With more jobs,
+    a pool of worker processes is started, each loading the level once, and
+    batches are spread among them.
+
+    The prngs_seed should be the (already drawn) session seed, the workers'
+    generators are seeded with consecutive values following it.
+
+    A non-zero incremental interval enables incremental evaluation of parent
+    variations, with level checkpoints every that many steps (only with a
+    single run, as bots may carry state from one run to the next). If a score
+    cache is given, bots that were already evaluated are not played again.
+
+    A non-zero abort interval makes bots record their scores every that many
+    steps; variations of a parent are aborted as soon as their score drops
+    more than the abort margin below the parent's score at the same step.
+
+    With common, each of the runs is played with the generators reseeded
+    from the same run seed for all bots (see prngs.run_seeds()), pairing the
+    scores of stochastic bots; bots get their per-run scores as run_scores,
+    and these are cached along with the scores (see the cache module).
+    Variations of stochastic bots are then not evaluated incrementally.
+
+    A non-zero adaptive threshold makes variations of a non-deterministic
+    parent be played one run at a time, up to runs, stopping as soon as the
+    mean of their run score differences with the parent exceeds that many
+    standard errors (after at least two runs). The parent's run scores are
+    completed once and kept as its run_scores. Such variations are scored
+    as the parent's mean plus the mean difference, bypassing the cache and
+    any incremental or aborted evaluations. The number of such decisions and
+    the runs they took are counted.
+
+    The evaluator counts evaluated bots, played level steps and steps that
+    were saved by the incremental evaluation, the cache or early aborts, and
+    the number of aborted evaluations.
+
+    Bots can also be screened on just a prefix of the level, bypassing the
+    cache and any incremental or aborted evaluations.
+    """
+    def __init__(self, level, runs, jobs=1, prngs_seed=0, verbosity=0,
+                 incremental=0, cache=None, abort=0, abort_margin=0.,
+                 common=False, adaptive=0.):
+        self.level = level
+        self.runs = runs
+        self.seeds = run_seeds(prngs_seed, runs) if common else None
+        self.jobs = jobs
+        self.cache = cache
+        self.abort = abort
+        self.abort_margin = abort_margin
+        self.adaptive = adaptive
+        if jobs > 1:
+            self.pool = Pool(jobs, init_worker,
+                             (level['key'], prngs_seed, verbosity))
+        else:
+            self.pool = None
+        if incremental:
+            self.playthrough = Playthrough(level, incremental)
+        else:
+            self.playthrough = None
+        self.resumed = []
+        self.evaluations = 0
+        self.steps = 0
+        self.steps_saved = 0
+        self.aborted = 0
+        self.decisions = 0
+        self.decision_runs = 0
+
+    def evaluate(self, bots, parent=None):
+        """
+        Returns a list of scores, one for each of the bots given.
+
+        The parent should be given if all bots are its (fresh) variations.
+        """
+        self.evaluations += len(bots)
+        if (self.adaptive and parent is not None and
+                not parent.deterministic and bots):
+            return self.evaluate_sequential(bots, parent)
+        if self.cache is None:
+            return self.play(bots, parent)
+        scores = [self.cache.get(bot, self.level, self.seeds)
+                  for bot in bots]
+        missing = [i for i, s in enumerate(scores) if s is None]
+        self.steps_saved += ((len(bots) - len(missing)) * self.runs *
+                             self.level['steps'])
+        for index, score in zip(missing, self.play([bots[i] for i in missing],
+                                                   parent)):
+            scores[index] = score
+            if score != float('-inf'):
+                self.cache.put(bots[index], self.level, score, self.seeds)
+        return scores
+
+    def play(self, bots, parent=None):
+        """
+        Plays the level with each of the bots, returns their scores.
+        """
+        if not bots:
+            return []
+        if (self.playthrough is not None and parent is not None and
+                parent.offline_keys and self.runs == 1 and
+                (self.seeds is None or parent.deterministic)):
+            return self.evaluate_incremental(bots, parent)
+        if self.abort:
+            return self.play_bounded(bots, parent)
+        self.steps += len(bots) * self.runs * self.level['steps']
+        return self.play_prefix(bots, 0, self.runs)
+
+    def screen(self, bots, steps, runs=1):
+        """
+        Plays the first steps of the level with each of the bots (repeating
+        that many runs), returns their scores at that point.
+        """
+        self.evaluations += len(bots)
+        self.steps += len(bots) * runs * steps
+        return self.play_prefix(bots, steps, runs)
+
+    def play_prefix(self, bots, steps, runs):
+        """
+        Plays the first steps of the level (all of it if steps is zero) with
+        each of the bots, in the current process or in the workers.
+        """
+        seeds = None if self.seeds is None else self.seeds[:runs]
+        if self.pool is None or len(bots) < 2:
+            return [bot.evaluate(runs, 0, None, steps, seeds) for bot in bots]
+        tasks = [(type(bot), bot.params, runs, steps, seeds) for bot in bots]
+        scores = []
+        for bot, (score, run_scores) in zip(bots, self.pool.map(
+                                                evaluate_params, tasks)):
+            bot.run_scores = run_scores
+            scores.append(score)
+        return scores
+
+    def play_run(self, bots, run):
+        """
+        Plays a single run of the level (the one with the given index, if run
+        seeds are in use) with each of the bots, returns their scores.
+        """
+        seeds = None if self.seeds is None else self.seeds[run:run + 1]
+        self.steps += len(bots) * self.level['steps']
+        if self.pool is None or len(bots) < 2:
+            return [bot.evaluate(1, 0, None, 0, seeds) for bot in bots]
+        tasks = [(type(bot), bot.params, 1, 0, seeds) for bot in bots]
+        return [score for score, _ in self.pool.map(evaluate_params, tasks)]
+
+    def evaluate_sequential(self, bots, parent):
+        """
+        Scores variations of the parent adding runs while a sequential test
+        of their score differences with the parent is inconclusive.
+
+        All runs of the parent are played first (unless it already has its
+        run scores), so the variations are compared with the same estimate.
+        """
+        runs = self.runs
+        if parent.run_scores is None or len(parent.run_scores) < runs:
+            played = [] if parent.run_scores is None else list(
+                                                        parent.run_scores)
+            for run in range(len(played), runs):
+                played.extend(self.play_run([parent], run))
+            parent.run_scores = asarray(played)
+        parent_scores = parent.run_scores
+        parent_score = parent_scores.mean()
+        diffs = [[] for bot in bots]
+        undecided = list(range(len(bots)))
+        for run in range(runs):
+            scores = self.play_run([bots[i] for i in undecided], run)
+            for index, score in zip(undecided, scores):
+                diffs[index].append(score - parent_scores[run])
+            undecided = [i for i in undecided if not self.decided(diffs[i])]
+            if not undecided:
+                break
+        scores = []
+        for bot, bot_diffs in zip(bots, diffs):
+            bot.run_scores = parent_scores[:len(bot_diffs)] + bot_diffs
+            scores.append(parent_score + sum(bot_diffs) / len(bot_diffs))
+            self.steps_saved += (runs - len(bot_diffs)) * self.level['steps']
+            self.decision_runs += len(bot_diffs)
+        self.decisions += len(bots)
+        return scores
+
+    def decided(self, diffs):
+        """
+        Tells if the mean of the run score differences is more than adaptive
+        standard errors away from zero.
+        """
+        count = len(diffs)
+        if count < 2:
+            return False
+        mean = sum(diffs) / count
+        deviation = sqrt(sum((d - mean) ** 2 for d in diffs) / (count - 1))
+        return (deviation == 0 or
+                abs(mean) * sqrt(count) > self.adaptive * deviation)
+
+    def play_bounded(self, bots, parent=None):
+        """
+        Plays the level with each of the bots, noting their intermediate
+        scores, and aborting those that fall behind the parent's trajectory
+        (if a parent with a recorded trajectory is given).
+        """
+        runs = self.runs
+        interval = self.abort
+        if parent is not None and parent.trajectory is not None:
+            bounds = parent.trajectory - self.abort_margin
+        else:
+            bounds = None
+        seeds = self.seeds
+        if self.pool is None or len(bots) < 2:
+            results = []
+            for bot in bots:
+                score = bot.evaluate(runs, interval, bounds, 0, seeds)
+                results.append((score, bot.trajectory, bot.played,
+                                bot.run_scores))
+        else:
+            tasks = [(type(bot), bot.params, runs, interval, bounds, seeds)
+                     for bot in bots]
+            results = self.pool.map(evaluate_bounded, tasks)
+        scores = []
+        for bot, (score, trajectory, played, run_scores) in zip(bots,
+                                                                 results):
+            bot.trajectory = trajectory
+            bot.run_scores = run_scores
+            scores.append(score)
+            self.steps += played
+            self.steps_saved += runs * self.level['steps'] - played
+            if score == float('-inf'):
+                self.aborted += 1
+        return scores
+
+    def evaluate_incremental(self, bots, parent):
+        """
+        Scores variations of the parent, replaying them only from the point
+        they start to act differently than the parent (for multi-valued bots
+        the search starts from the first varied phase).
+
+        If the parent is one of the bots from the previous batch, its
+        playthrough is recorded only from the checkpoint it was resumed from.
+        """
+        playthrough = self.playthrough
+        if playthrough.bot is not parent:
+            checkpoint = next((c for b, c in self.resumed if b is parent), 0)
+            playthrough.record(parent, checkpoint)
+            self.steps += playthrough.played
+        scores = []
+        self.resumed = []
+        for bot in bots:
+            scores.append(playthrough.evaluate(bot))
+            self.resumed.append((bot, playthrough.resumed))
+            self.steps += playthrough.played
+            self.steps_saved += self.level['steps'] - playthrough.played
+        return scores
+
+    def close(self):
+        """
+        Stops the worker processes (if any were started).
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
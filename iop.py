@@ -2,13 +2,16 @@
 Input, output and printing.
 """
 from argparse import ArgumentParser, HelpFormatter
+from collections.abc import Mapping
 from contextlib import contextmanager
-from os import fstat
-from os.path import dirname, exists, join
+from json import dump as json_dump, dumps, load as json_load
+from os import fstat, makedirs
+from os.path import dirname, exists, isdir, join
+from pickle import dump as pickle_dump, load as pickle_load
 from textwrap import indent
 
-from numpy import (array, asscalar, get_printoptions, load, savez_compressed,
-                   set_printoptions)
+from numpy import (array, asscalar, get_printoptions, load, save,
+                   savez_compressed, set_printoptions)
 from scipy import stats
 
 from interface import (get_max_time, get_num_of_actions, get_num_of_features,
@@ -86,12 +89,17 @@ def parse_args(description, arguments):
     return args
 
 
-def first_free(prefix):
+# Data sets are stored as directories of .npy shards (the first format), but
+# older, zipped .npz files can still be read.
+data_formats = ('', '.npz')
+
+
+def first_free(prefix, formats=('.npz',)):
     """
-    Finds the first inexistent file of the form <prefix>_<i>.npz.
+    Finds the first inexistent file of the form <prefix>_<i><format>.
     """
     index = 0
-    while exists('{}_{}.npz'.format(prefix, index)):
+    while any(exists('{}_{}{}'.format(prefix, index, f)) for f in formats):
         index += 1
     return index
 
@@ -120,9 +128,7 @@ def load_level(level, verbosity):
     """
     Loads the named level and returns its name and description.
     """
-    path = join(dirname(__file__), 'levels', level)
-    if not path.endswith('_level.data'):
-        path = '{}_level.data'.format(path)
+    path = level_path(level)
     if verbosity > 3:
         print("Loading level from {}".format(path))
     bb_load_level(path, verbose=verbosity > 3)
@@ -132,16 +138,29 @@ def load_level(level, verbosity):
             'features': get_num_of_features()}
 
 
-def resolve_path(agent, key, folder):
+def level_path(level):
+    """
+    Returns the path of the named level's file.
+    """
+    path = join(dirname(__file__), 'levels', level)
+    if not path.endswith('_level.data'):
+        path = '{}_level.data'.format(path)
+    return path
+
+
+def resolve_path(agent, key, folder, formats=('.npz',)):
     """
     Finds a file identified by the given key (in the context of the agent).
 
     If the key is composed of only digits, adds the agent (collector or bot)
     as a prefix. Otherwise uses the whole key, if "last" is given as the key,
     finds the file with the highest numeric key.
+
+    If several formats are allowed, the first existing one is chosen, or the
+    first one listed when none of the files exist yet.
     """
     if key == 'last':
-        key = first_free(join(folder, agent)) - 1
+        key = first_free(join(folder, agent), formats) - 1
     if isinstance(key, int) or key.isdigit():
         key = '{}_{}'.format(agent, key)
     path = dirname(__file__)
@@ -149,8 +168,9 @@ def resolve_path(agent, key, folder):
         path = join(path, folder, key)
     else:
         path = join(path, key)
-    if not path.endswith('.npz'):
-        path = '{}.npz'.format(path)
+    if not any(f and path.endswith(f) for f in formats):
+        paths = ['{}{}'.format(path, f) for f in formats]
+        path = next((p for p in paths if exists(p)), paths[0])
     return key, path
 
 
@@ -199,28 +219,146 @@ def load_params(bot, key, verbosity):
     return key, params, history
 
 
-def save_data(collector, key, data, meta, verbosity):
+class DataRecords(Mapping):
+    """
+    Read-only, lazily loaded view of a data set directory.
+
+    Each record is memory-mapped from its .npy shard on first access, so only
+    the parts of the data that are actually used get read from the disk.
+    """
+    def __init__(self, path, shards):
+        self.path = path
+        self.shards = tuple(shards)
+        self.loaded = {}
+
+    def __getitem__(self, name):
+        try:
+            return self.loaded[name]
+        except KeyError:
+            if name not in self.shards:
+                raise
+        # Copy-on-write, as processors may take the records as (writable)
+        # typed memoryviews; changes are never written back to the shards.
+        record = load(join(self.path, '{}.npy'.format(name)), mmap_mode='c')
+        self.loaded[name] = record
+        return record
+
+    def __iter__(self):
+        return iter(self.shards)
+
+    def __getstate__(self):
+        # Records are mapped again after unpickling, rather than copied.
+        return {'path': self.path, 'shards': self.shards, 'loaded': {}}
+
+    def __len__(self):
+        return len(self.shards)
+
+
+def create_data(collector, key, runs, verbosity):
+    """
+    Prepares the data/<collector>_<key> directory for collectors to stream
+    their records into, with a numbered subdirectory for each run.
+
+    Returns the paths of the run directories.
     """
-    Saves collected data to data/<collector>_<key>.npz.
+    path = resolve_path(collector, key, 'data', data_formats)[1]
+    if verbosity > 3:
+        print("Creating data set: {}".format(path))
+    paths = tuple(join(path, str(run)) for run in range(runs))
+    for run_path in paths:
+        makedirs(run_path)
+    return paths
+
+
+def save_records(path, data):
+    """
+    Saves records that a collector did not stream to their shards in the
+    given run directory. Returns the names of all the records.
+    """
+    for name, record in data.items():
+        shard = join(path, '{}.npy'.format(name))
+        if not exists(shard):
+            save(shard, record)
+    return tuple(data.keys())
+
+
+def save_data(collector, key, shards, meta, verbosity):
+    """
+    Finalizes the data set in data/<collector>_<key>.
+
+    Data sets are directories with a numbered subdirectory for each collector
+    run, each holding one uncompressed .npy shard per record (see
+    save_records), and a manifest listing the shards of all runs and holding
+    the meta information shared by the runs.
     """
-    data['__meta'] = meta
-    path = resolve_path(collector, key, 'data')[1]
+    path = resolve_path(collector, key, 'data', data_formats)[1]
     if verbosity > 3:
         print("Saving data to: {}".format(path))
-    savez_compressed(path, **data)
+    with open(join(path, 'manifest.pkl'), 'wb') as manifest:
+        pickle_dump({'shards': shards, 'meta': meta}, manifest)
 
 
 def load_data(collector, key, verbosity):
     """
-    Loads collected data from data/<collector>_<key>.npz.
+    Loads collected data from data/<collector>_<key> (or an older .npz file).
+
+    Returns a tuple of (records, meta) pairs, one for each collector run.
+    Records from data set directories are memory-mapped on demand (each run
+    lists just the shards found in its directory), the meta of each run holds
+    the seed it was collected with as its prngs_seed.
     """
-    path = resolve_path(collector, key, 'data')[1]
+    path = resolve_path(collector, key, 'data', data_formats)[1]
     if verbosity > 3:
         print("Loading data from: {}".format(path))
+    if isdir(path):
+        with open(join(path, 'manifest.pkl'), 'rb') as manifest:
+            manifest = pickle_load(manifest)
+        shards, meta = manifest['shards'], manifest['meta']
+        data = []
+        for run, seed in enumerate(meta['seeds']):
+            run_path = join(path, str(run))
+            run_shards = [s for s in shards
+                          if exists(join(run_path, '{}.npy'.format(s)))]
+            data.append((DataRecords(run_path, run_shards),
+                         dict(meta, prngs_seed=seed)))
+        return tuple(data)
     with load(path) as data:
         records = dict(data)
         meta = asscalar(records.pop('__meta'))
-    return records, meta
+    return ((records, meta),)
+
+
+def save_bench(path, results, meta, verbosity):
+    """
+    Writes benchmark results with the session info as a JSON document.
+
+    The path may be "-" to print the document instead.
+    """
+    document = {
+        'meta': dict(meta, date=date_desc(meta['date'])),
+        'results': {k: {'value': v, 'unit': u}
+                    for k, (v, u) in results.items()}
+    }
+    if path == '-':
+        print(dumps(document, indent=4, sort_keys=True))
+        return
+    if verbosity > 3:
+        print("Saving benchmark results to: {}".format(path))
+    with open(path, 'w') as bench_file:
+        json_dump(document, bench_file, indent=4, sort_keys=True)
+
+
+def load_bench(path, verbosity):
+    """
+    Reads benchmark results saved by save_bench(), returns a dict mapping
+    benchmark keys to (value, unit) pairs.
+    """
+    if verbosity > 3:
+        print("Loading benchmark results from: {}".format(path))
+    with open(path) as bench_file:
+        document = json_load(bench_file)
+    return {k: (r['value'], r['unit'])
+            for k, r in document['results'].items()}
 
 
 def date_desc(date):
@@ -303,6 +441,14 @@ def seeds_desc(seeds, verbosity):
     return desc
 
 
+def screening_desc(screening):
+    """
+    Describes the rounds of seeds screening, as survivors and steps played.
+    """
+    return ", ".join("{} after {} x {}".format(n, s, r)
+                     for n, s, r in screening)
+
+
 def param_map_desc(param_map):
     """
     Stringifies parameter mappings.
@@ -351,6 +497,35 @@ def scores_desc(scores, verbosity, precision):
                          for l, s in scores.items())
 
 
+def evaluations_desc(evaluations):
+    """
+    Describes the number of evaluated bots and played level steps.
+    """
+    bots, steps, steps_saved = evaluations
+    total = steps + steps_saved
+    saved = 100. * steps_saved / total if total else 0.
+    return "{} bots, {} steps played, {:.1f}% saved".format(bots, steps, saved)
+
+
+def adaptive_desc(adaptive, precision):
+    """
+    Describes the sequential testing threshold and the average number of runs
+    played per decision.
+    """
+    threshold, decisions, runs = adaptive
+    average = runs / decisions if decisions else 0.
+    return "{} ({:.{}f} runs per decision)".format(threshold, average,
+                                                    precision)
+
+
+def profile_desc(profile, precision):
+    """
+    Lists the profiled stages with their times and counts, a line for each.
+    """
+    return "\n".join("{} {} in {}".format(s, c, time_desc(t, precision))
+                     for s, (c, t) in profile.items())
+
+
 def training_desc(info, verbosity, precision):
     """
     Textifies a single training history record. Returns a list of lines.
@@ -363,11 +538,32 @@ def training_desc(info, verbosity, precision):
         "Seeds: {}".format(seeds_desc(info['seeds'], verbosity)),
         "Level: {}".format(level_desc(info['level'])) +
                 ", Runs: {}".format(info['runs']) +
+                (" common" if info['common'] else "") +
                 ", Time: {}".format(time_desc(info['time'], precision)),
         "Output: {output}, PRNGs: {prngs_seed}".format(**info) +
                 ", Scores: {}".format(scores_desc(info['scores'], verbosity,
                                                   precision))
     ]
+    if info['candidates'] != 1:
+        desc[1] += ", Candidates: {candidates}".format(**info)
+    if info['incremental']:
+        desc[1] += ", Incremental: {incremental}".format(**info)
+    if info['abort'][0]:
+        desc[1] += ", Abort: {} {}".format(*info['abort'])
+    if info['adaptive'][0]:
+        desc[4] += ", Adaptive: {}".format(adaptive_desc(info['adaptive'],
+                                                         precision))
+    if info['screening']:
+        desc[3] += ", Screening: {}".format(screening_desc(info['screening']))
+    if info['incremental'] or info['score_cache'] or info['abort'][0]:
+        desc.append("Evaluations: {}".format(
+                                    evaluations_desc(info['evaluations'])))
+        if info['abort'][0]:
+            desc[-1] += ", {} aborted".format(info['abort'][2])
+    if info['profile']:
+        desc.append("Profile: {}".format(
+                indent(profile_desc(info['profile'], precision),
+                       " " * 9).strip()))
     if info['phases'] is not None:
         desc.insert(3, "Phases: {}".format(
                                     phases_desc(info['phases'], precision)))
@@ -398,6 +594,21 @@ def params_desc(params, precision):
     return desc
 
 
+def bench_desc(results, baseline, precision):
+    """
+    Lists benchmark results, with changes relative to the baseline ones.
+    """
+    width = max(map(len, results), default=0)
+    desc = ""
+    for key, (value, unit) in results.items():
+        desc += "{:{}}  {:.{}f} {}".format(key, width, value, precision, unit)
+        if key in baseline and baseline[key][0]:
+            change = 100. * (value / baseline[key][0] - 1)
+            desc += " ({:+.1f}%)".format(change)
+        desc += "\n"
+    return desc
+
+
 def results_desc(results, verbosity, precision):
     """
     Nicely formatted processor results.
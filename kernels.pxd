@@ -0,0 +1,68 @@
+# Inner loops shared by bots that choose the action with the biggest value of
+# a linear function of some inputs (derived from the observed states).
+#
+# Coefficients are expected input-major, that is as a contiguous (inputs,
+# actions) block, so the values for all actions are updated together for each
+# input (see BaseBot.kernel_params()). Any number of actions is supported,
+# with a register-only path for the common case of 4 actions.
+
+
+cdef inline void add_products(float* values, const float* coeffs,
+                              const float* inputs, int count,
+                              int actions) nogil:
+    """
+    Adds the products of count inputs and their coefficients to the values.
+    """
+    cdef:
+        int input, action
+        float inputf, inputg
+        float value0, value1, value2, value3
+        float valueg0, valueg1, valueg2, valueg3
+
+    if actions == 4:
+        # Two interleaved sets of sums, to not wait for each addition.
+        value0 = values[0]
+        value1 = values[1]
+        value2 = values[2]
+        value3 = values[3]
+        valueg0 = valueg1 = valueg2 = valueg3 = 0
+        for input in range(0, count - 1, 2):
+            inputf = inputs[input]
+            inputg = inputs[input + 1]
+            value0 += coeffs[0] * inputf
+            value1 += coeffs[1] * inputf
+            value2 += coeffs[2] * inputf
+            value3 += coeffs[3] * inputf
+            valueg0 += coeffs[4] * inputg
+            valueg1 += coeffs[5] * inputg
+            valueg2 += coeffs[6] * inputg
+            valueg3 += coeffs[7] * inputg
+            coeffs += 8
+        if count % 2:
+            inputf = inputs[count - 1]
+            value0 += coeffs[0] * inputf
+            value1 += coeffs[1] * inputf
+            value2 += coeffs[2] * inputf
+            value3 += coeffs[3] * inputf
+        values[0] = value0 + valueg0
+        values[1] = value1 + valueg1
+        values[2] = value2 + valueg2
+        values[3] = value3 + valueg3
+    else:
+        for input in range(count):
+            inputf = inputs[input]
+            for action in range(actions):
+                values[action] += coeffs[action] * inputf
+            coeffs += actions
+
+
+cdef inline int best_action(const float* values, int actions) nogil:
+    """
+    Returns the action with the biggest value (the last one in case of ties).
+    """
+    cdef int action, best = 0
+
+    for action in range(1, actions):
+        if values[action] >= values[best]:
+            best = action
+    return best
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+"""
+A line-level profiler for the statically compiled parts of the toolkit. Give
+it a play.py or train.py invocation:
+
+    ./lineprof.py play.py linear 0
+    ./lineprof.py train.py diffs_1 local 100 1
+
+The modules are built with line tracing (in a separate build directory, see
+cython_init), the command is run as usual, and then the lines of the bot
+that took the most time are listed (lines of bot_base.pyx and kernels.pxd
+are included with those of the bot's module).
+
+Line tracing slows bots down by an order of magnitude or more, so prefer short
+sessions; bots played by worker processes (--jobs) are not traced.
+"""
+from os import environ
+
+# The build profile has to be chosen before anything is compiled.
+environ['BLACKBOX_BUILD'] = 'linetrace'
+
+from argparse import REMAINDER
+from linecache import getline
+from os.path import basename
+from runpy import run_path
+from sys import argv
+
+import cython_init  # Executes pyximport install on module import # noqa.
+from core import available_bots
+from iop import parse_args
+from linetrace import LineTracer
+
+description = "Profile lines of a bot during a play or train session."
+arguments = (
+    (('-n', '--lines'), {
+        'type': int,
+        'default': 20,
+        'help': "number of the most time consuming lines to list"
+    }),
+    (('-a', '--all_modules'), {
+        'action': 'store_true',
+        'default': False,
+        'help': "list lines of all compiled modules, not just the bot's"
+    }),
+    (('command',), {
+        'choices': ('play.py', 'train.py'),
+        'help': "command to profile"
+    }),
+    (('command_args',), {
+        'nargs': REMAINDER,
+        'help': "arguments for the command, the first one should be the bot"
+    })
+)
+
+if __name__ == '__main__':
+    args = parse_args(description, arguments)
+    if not args.command_args or args.command_args[0] not in available_bots:
+        raise ValueError("The first command argument should be a bot name")
+    bot = args.command_args[0]
+
+    files = None
+    if not args.all_modules:
+        files = {'bot_{}.pyx'.format(bot), 'bot_base.pyx', 'kernels.pxd'}
+    tracer = LineTracer(files)
+    argv[:] = [args.command] + args.command_args
+    tracer.start()
+    try:
+        run_path(args.command, run_name='__main__')
+    finally:
+        tracer.stop()
+
+    times = tracer.times
+    total = sum(times.values())
+    print("\nLines taking the most time ({:.3f} s traced):\n".format(total))
+    print("{:>6}  {:>10}  {:>24}  {}".format("time", "hits", "line", "code"))
+    for path, line in sorted(times, key=times.get, reverse=True)[:args.lines]:
+        print("{:>5.1f}%  {:>10}  {:>24}  {}".format(
+                100 * times[path, line] / total if total else 0,
+                tracer.hits.get((path, line), 0),
+                "{}:{}".format(basename(path), line),
+                getline(path, line).strip()))
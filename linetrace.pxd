@@ -0,0 +1,20 @@
+from cpython.object cimport PyObject
+from cpython.pystate cimport PyFrameObject, Py_tracefunc
+
+
+cdef extern from "Python.h":
+    void PyEval_SetTrace(Py_tracefunc, PyObject*)
+
+
+cdef class LineTracer:
+    cdef:
+        object files
+        dict included
+        readonly dict hits, times
+        tuple last
+
+    cpdef void start(self)
+    cpdef void stop(self)
+
+
+cdef int trace(PyObject*, PyFrameObject*, int, PyObject*) noexcept
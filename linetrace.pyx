@@ -0,0 +1,87 @@
+"""
+Line-level tracing of the statically compiled modules.
+
+Modules only report executed lines if built with the linetrace profile (see
+cython_init). The tracer is registered as a C trace function, as Cython does
+not pass line events of all of its frames to Python trace functions.
+"""
+from os.path import basename
+
+from cpython.pystate cimport PyTrace_LINE
+
+from cython import NULL, cast, ccall, cclass, cfunc, exceptval, locals, returns
+
+from profiler cimport now
+
+
+@cclass
+class LineTracer:
+    """
+    Counts executions and sums times of lines of compiled modules.
+
+    Only lines of .pyx and .pxd files are noted, and if a set of file names is
+    given, only lines of these files. A line's time lasts until the next event
+    of an included file, so lines calling other traced functions only count
+    the time until the call (while calls to other code count in full).
+
+    Hits and times map (path, line number) pairs to counts and seconds.
+    """
+    @locals(files='object')
+    def __init__(self, files=None):
+        self.files = files
+        self.included = {}
+        self.hits = {}
+        self.times = {}
+        self.last = None
+
+    @ccall
+    @returns('void')
+    def start(self):
+        """
+        Begins tracing (in the current thread).
+        """
+        PyEval_SetTrace(trace, cast('PyObject*', self))
+
+    @ccall
+    @returns('void')
+    def stop(self):
+        """
+        Ends tracing.
+        """
+        PyEval_SetTrace(NULL, NULL)
+
+
+@cfunc
+@exceptval(check=False)
+@returns('int')
+@locals(tracer_object='PyObject*', frame_object='PyFrameObject*', what='int',
+        arg='PyObject*', moment='double', tracer='LineTracer',
+        frame='object', code='object', name='str', line='tuple',
+        last='tuple')
+def trace(tracer_object, frame_object, what, arg):
+    """
+    The trace function, notes line events of included files' frames.
+    """
+    moment = now()
+    tracer = cast(object, tracer_object)
+    frame = cast(object, frame_object)
+    code = frame.f_code
+    included = tracer.included.get(code)
+    if included is None:
+        name = basename(code.co_filename)
+        included = (name.endswith(('.pyx', '.pxd')) and
+                    (tracer.files is None or name in tracer.files))
+        tracer.included[code] = included
+    if not included:
+        return 0
+
+    last = tracer.last
+    if last is not None:
+        line = last[0]
+        tracer.times[line] = tracer.times.get(line, 0.) + moment - last[1]
+        tracer.last = None
+    if what == PyTrace_LINE:
+        line = (code.co_filename, frame.f_lineno)
+        tracer.hits[line] = tracer.hits.get(line, 0) + 1
+        tracer.last = (line, now())
+    return 0
@@ -13,9 +13,16 @@ the needed coefficients (matched by key):
 Multiple parameter sets can be evaluated at once with a bit of shell magic:
 
     ./play.py linear `ls params/linear_*.npz` --ignore_exceptions --verbosity=0
+
+Scores of deterministic bots may be stored, so that playing the same params
+again does not need to replay the levels:
+
+    ./play.py linear 0 --score_cache
 """
+from textwrap import indent
+
 from core import available_bots, do_play
-from iop import date_desc, parse_args, scores_desc, time_desc
+from iop import date_desc, parse_args, profile_desc, scores_desc, time_desc
 
 description = "Evaluate a bot with params on a level."
 arguments = (
@@ -40,6 +47,17 @@ arguments = (
         'default': 1,
         'help': "number of repetitions (over which to average scores)"
     }),
+    (('-sc', '--score_cache'), {
+        'action': 'store_true',
+        'default': False,
+        'help': "reuse and store scores of deterministic bots " +
+                "(in params/scores)"
+    }),
+    (('-pr', '--profile'), {
+        'action': 'store_true',
+        'default': False,
+        'help': "measure time spent in stages of the session"
+    }),
     (('-s', '--prngs_seed'), {
         'type': int,
         'default': None,
@@ -85,5 +103,9 @@ if __name__ == '__main__':
                    "Bot: {bot}, params: {params_key}, runs: {runs}\n" +
                    "Scores: {scores}\n" +
                    "Time: {time}, PRNGs: {prngs_seed}").format(**info))
+            if info['profile']:
+                print("Profile: {}".format(indent(
+                        profile_desc(info['profile'], args.precision),
+                        " " * 9).strip()))
     if args.verbosity != 0:
         print()
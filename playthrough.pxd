@@ -0,0 +1,21 @@
+from bot_base cimport BaseBot
+
+
+cdef class Playthrough:
+    cdef:
+        dict level
+        int interval
+        object states
+        object actions
+        list checkpoints
+        list checkpoint_steps
+        list snapshots
+        int created
+        readonly BaseBot bot
+        readonly float score
+        readonly int resumed
+        readonly int played
+
+    cpdef void record(self, BaseBot, int checkpoint=?)
+    cpdef int divergence(self, BaseBot, int first=?)
+    cpdef float evaluate(self, BaseBot)
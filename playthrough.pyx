@@ -0,0 +1,185 @@
+"""
+Recorded playthroughs, for incremental evaluation of parameter variations.
+
+Local search trainers evaluate bots that differ from their parent in just a
+few parameter entries, and such bots often act exactly like the parent for a
+big part of the level. A playthrough stores the states seen and actions made
+by the parent, along with level checkpoints and copies of the bot (for its
+state) made every interval steps and at the start of each of its phases. A
+variation is then evaluated by computing its actions for the recorded states
+(without playing), finding the first step at which it may act differently,
+and playing the level only from the last checkpoint before that step.
+
+Variations of multi-valued bots cannot act differently before the start of
+the first phase whose parameters were varied, thus the search starts from
+there.
+
+This only works for bots that support offline_actions() (see BaseBot), and
+assumes that the level is deterministic and that level checkpoints survive
+level resets.
+"""
+from bisect import bisect_right
+
+from cython import address, ccall, cclass, locals, returns, sizeof
+from libc.string cimport memcpy
+from numpy import asarray, diff, empty, flatnonzero
+
+from profiler cimport enabled, note, now
+
+from interface cimport c_get_score, c_get_state
+from interface import (clear_all_checkpoints, create_checkpoint,
+                       load_from_checkpoint, reset_level)
+
+
+@cclass
+class Playthrough:
+    """
+    States, actions and checkpoints from a single playthrough of a bot.
+
+    The bot attribute holds the recorded bot and score its score. After an
+    evaluation, resumed is the index of the checkpoint the evaluated bot was
+    resumed from (the number of checkpoints if it did not need to be played
+    at all), and played is the number of level steps that had to be played.
+    """
+    @locals(level='dict', interval='int')
+    def __init__(self, level, interval):
+        """
+        Prepares buffers for a level, interval is the number of steps between
+        periodic checkpoints.
+        """
+        self.level = level
+        self.interval = interval
+        self.states = empty((level['steps'], level['features']), dtype='f4')
+        self.actions = empty(level['steps'], dtype='i4')
+        self.checkpoints = []
+        self.checkpoint_steps = []
+        self.snapshots = []
+        self.created = 0
+        self.bot = None
+        self.score = 0
+        self.resumed = 0
+        self.played = 0
+
+    @ccall
+    @returns('void')
+    @locals(bot='BaseBot', checkpoint='int', steps='int', features='int',
+            first='int', index='int', point='int', end='int', step='int',
+            points='list', player='BaseBot',
+            states='float[:, ::1]', actions='int[::1]')
+    def record(self, bot, checkpoint=0):
+        """
+        Plays the level with a copy of the bot, recording the states it sees,
+        actions it makes, and creating checkpoints.
+
+        If a checkpoint index is given, the bot is assumed to act exactly like
+        the previously recorded one up to the checkpoint (for instance, it was
+        resumed from the checkpoint in evaluate()), so only the rest of the
+        level needs to be replayed.
+        """
+        steps = self.level['steps']
+        features = self.level['features']
+        states = self.states
+        actions = self.actions
+        self.bot = bot
+        if checkpoint >= len(self.checkpoints) > 0:
+            # The bot acts just like the recorded one.
+            self.played = 0
+            return
+
+        player = bot.clone(state=False)
+        if checkpoint == 0 or self.created > 2 * len(self.checkpoints):
+            # Level checkpoints cannot be removed one by one, so once enough
+            # of them accumulate, we clear them all and record anew.
+            clear_all_checkpoints()
+            self.created = 0
+            checkpoint = 0
+            first = 0
+            reset_level()
+        else:
+            first = self.checkpoint_steps[checkpoint]
+            load_from_checkpoint(self.checkpoints[checkpoint])
+            player.load_state(self.snapshots[checkpoint])
+        del self.checkpoints[checkpoint:]
+        del self.checkpoint_steps[checkpoint:]
+        del self.snapshots[checkpoint:]
+
+        points = list(range(0, steps, self.interval))
+        if bot.multi:
+            points += (flatnonzero(diff(asarray(bot.choices))) + 1).tolist()
+        points = sorted({p for p in points if p >= first}) + [steps]
+        for index in range(len(points) - 1):
+            point = points[index]
+            end = points[index + 1]
+            self.checkpoints.append(create_checkpoint())
+            self.checkpoint_steps.append(point)
+            self.snapshots.append(player.clone())
+            self.created += 1
+            for step in range(point, end):
+                memcpy(address(states[step, 0]), c_get_state(),
+                       features * sizeof(float))
+                player.act(1)
+                actions[step] = player.last_action
+        self.score = c_get_score()
+        self.played = steps - first
+
+    @ccall
+    @returns('int')
+    @locals(bot='BaseBot', first='int', steps='int', checkpoint='int',
+            start='int', end='int')
+    def divergence(self, bot, first=0):
+        """
+        Returns the first step (not before the given one) at which the bot
+        may act differently than the recorded one did, or the number of level
+        steps if it would not.
+        """
+        steps = self.level['steps']
+        checkpoint = bisect_right(self.checkpoint_steps, first) - 1
+        start = first
+        while start < steps:
+            checkpoint += 1
+            if checkpoint < len(self.checkpoint_steps):
+                end = self.checkpoint_steps[checkpoint]
+            else:
+                end = steps
+            actions, certain = bot.offline_actions(self.states, start, end)
+            differences = flatnonzero((actions != self.actions[start:end]) |
+                                      ~certain)
+            if len(differences):
+                return start + differences[0]
+            start = end
+        return steps
+
+    @ccall
+    @returns('float')
+    @locals(bot='BaseBot', steps='int', divergence='int', checkpoint='int',
+            start='double')
+    def evaluate(self, bot):
+        """
+        Scores a variation of the recorded bot (it should be in its initial
+        state, with parameters changed through vary_param()), playing as
+        little of the level as possible.
+
+        A bot with no variations noted (such as a clone of a variation) may
+        still differ from the recorded one, so it is compared from the start.
+        """
+        start = now() if enabled else 0
+        steps = self.level['steps']
+        divergence = bot.varied_step()
+        if divergence == steps:
+            divergence = 0
+        divergence = self.divergence(bot, divergence)
+        if divergence == steps:
+            self.resumed = len(self.checkpoints)
+            self.played = 0
+            if enabled:
+                note('replay', start, 0)
+            return self.score
+        checkpoint = bisect_right(self.checkpoint_steps, divergence) - 1
+        load_from_checkpoint(self.checkpoints[checkpoint])
+        bot.load_state(self.snapshots[checkpoint])
+        bot.act(steps - self.checkpoint_steps[checkpoint])
+        self.resumed = checkpoint
+        self.played = steps - self.checkpoint_steps[checkpoint]
+        if enabled:
+            note('replay', start, self.played)
+        return c_get_score()
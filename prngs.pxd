@@ -0,0 +1,12 @@
+cdef class VariatePool:
+    cdef:
+        readonly object dist
+        object stream
+        int block
+        double[::1] variates
+        int next
+
+    cpdef double draw(self)
+    cpdef int index(self, int)
+
+cpdef void seed_run(long)
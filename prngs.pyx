@@ -1,5 +1,10 @@
+from cython import cast, ccall, cclass, locals, returns
 from libc.stdlib cimport srand
-from numpy.random import randint, seed as nseed
+from numpy import asarray, empty
+from numpy.random import RandomState, randint, seed as nseed
+from scipy.stats import norm, uniform
+
+from profiler cimport enabled, note, now
 
 
 def seed_prngs(seed=None):
@@ -18,3 +23,136 @@ def seed_prngs(seed=None):
     nseed(seed)
     srand(randint(2 ** 32))
     return seed
+
+
+@locals(seed='long', runs='int')
+def run_seeds(seed, runs):
+    """
+    Returns an array of seeds for the runs of an evaluation, derived from the
+    session seed.
+
+    Evaluating bots with the generators reseeded before each run (see
+    seed_run()) makes them play all runs under common random numbers, so
+    the scores of two stochastic bots are paired run by run.
+    """
+    # A two-entry key, to not repeat the session or the pools streams.
+    return RandomState([seed, runs]).randint(2 ** 32, size=runs, dtype='u8')
+
+
+@ccall
+@returns('void')
+@locals(seed='long')
+def seed_run(seed):
+    """
+    Reseeds NumPy's and C's generators with a seed of a run.
+    """
+    nseed(seed)
+    srand(seed)
+
+
+@cclass
+class VariatePool:
+    """
+    Variates of a distribution, drawn in blocks from a generator of its own.
+
+    Can be used in place of a frozen SciPy distribution: rvs() without a size
+    returns the next variate from the current block (drawing a new block when
+    it runs out), with a size it draws an array directly from the generator.
+    """
+    @locals(dist='object', stream='object', block='int')
+    def __init__(self, dist, stream, block=4096):
+        """
+        Wraps the distribution, stream should be a NumPy RandomState and block
+        the number of variates to draw at once.
+        """
+        self.dist = dist
+        self.stream = stream
+        self.block = block
+        self.variates = empty(0)
+        self.next = 0
+
+    @ccall
+    @returns('double')
+    @locals(start='double')
+    def draw(self):
+        """
+        Returns the next variate.
+        """
+        if self.next == self.variates.shape[0]:
+            start = now() if enabled else 0
+            self.variates = asarray(self.dist.rvs(size=self.block,
+                                                  random_state=self.stream),
+                                    dtype='f8')
+            self.next = 0
+            if enabled:
+                note('sampling', start, self.block)
+        self.next += 1
+        return self.variates[self.next - 1]
+
+    @ccall
+    @returns('int')
+    @locals(count='int', index='int')
+    def index(self, count):
+        """
+        Returns a random integer from [0, count), assuming that the pool
+        holds uniform variates from [0, 1).
+        """
+        index = cast('int', self.draw() * count)
+        return index if index < count else count - 1
+
+    def rvs(self, size=None):
+        if size is None:
+            return self.draw()
+        return self.dist.rvs(size=size, random_state=self.stream)
+
+
+@locals(dists='dict', seed='long', stream='int', block='int',
+        pooled='dict', pool='int', key='str', subkey='str', value='object',
+        dist='object')
+def pool_dists(dists, seed, stream=0, block=4096):
+    """
+    Returns a copy of a distributions dict, with each distribution replaced by
+    a pool of its variates, and pools of uniform [0, 1) and standard normal
+    variates added under the "uniform" and "normal" keys.
+
+    Every pool gets an independent generator derived from the seed, the
+    stream number and the pool's position (in keys order), thus processes
+    using different stream numbers draw different variates, while a session
+    is still reproducible from its seed.
+    """
+    pooled = {}
+    pool = 0
+    for key, value in sorted(dists.items()):
+        if isinstance(value, dict):
+            pooled[key] = {}
+            for subkey, dist in sorted(value.items()):
+                pooled[key][subkey] = VariatePool(
+                        dist, RandomState([seed, stream, pool]), block)
+                pool += 1
+        else:
+            pooled[key] = VariatePool(
+                        value, RandomState([seed, stream, pool]), block)
+            pool += 1
+    pooled['uniform'] = VariatePool(
+                        uniform(), RandomState([seed, stream, pool]), block)
+    pooled['normal'] = VariatePool(
+                        norm(), RandomState([seed, stream, pool + 1]), block)
+    return pooled
+
+
+@locals(dists='dict', unpooled='dict', key='str', value='object')
+def unpool_dists(dists):
+    """
+    Reverses pool_dists(), returning a dict of the wrapped distributions
+    (that can be sent to another process and pooled there).
+    """
+    unpooled = {}
+    for key, value in dists.items():
+        if isinstance(value, dict):
+            unpooled[key] = unpool_dists(value)
+        elif isinstance(value, VariatePool):
+            if key not in ('uniform', 'normal'):
+                unpooled[key] = cast(VariatePool, value).dist
+        else:
+            unpooled[key] = value
+    return unpooled
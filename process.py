@@ -8,6 +8,10 @@ A command-line tool for data munging. Select a processor and feed it with data:
 Multiple inputs can be listed and processed together:
 
     ./process.py stats srs 0 srs 1 srs 2
+
+Most processors reduce each input to a few statistics that are stored beside
+the data, so adding an input later only needs the new data to be processed.
+Inputs can also be reduced in parallel with --jobs.
 """
 from core import available_processors, do_process
 from iop import date_desc, parse_args, results_desc, time_desc
@@ -23,6 +27,11 @@ arguments = (
         'metavar': 'input',
         'help': "data to process, for example srs 0 srs 1 srs 3"
     }),
+    (('-j', '--jobs'), {
+        'type': int,
+        'default': 1,
+        'help': "number of worker processes reducing inputs in parallel"
+    }),
     (('-s', '--prngs_seed'), {
         'type': int,
         'default': None,
@@ -58,5 +67,5 @@ if __name__ == '__main__':
         info['results'] = results
         print(("\nDate: {date}\n" +
                "Processor: {processor}\n" +
-               "Input: {input}, Time: {time}\n" +
+               "Input: {input}, Jobs: {jobs}, Time: {time}\n" +
                "PRNGs: {prngs_seed}\n{results}").format(**info))
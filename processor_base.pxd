@@ -2,6 +2,10 @@ cdef class BaseProcessor:
     cdef:
         tuple data, records, meta, levels, bots
         int max_steps, max_actions, max_features
+        int jobs
 
     cpdef tuple results(self, tuple)
+    cpdef dict accumulate(self, object, dict)
+    cpdef dict reduce(self)
+    cpdef object summarize(self, dict)
     cpdef object process(self)
@@ -1,15 +1,32 @@
+from multiprocessing import Pool
+from os.path import exists, join
+from pickle import dump, load
+
 from cython import ccall, cclass, locals, returns
 
 
+def accumulate_task(task):
+    """
+    Accumulates a single record in a worker process.
+    """
+    processor_class, record, meta = task
+    return processor_class(((record, meta),)).accumulate(record, meta)
+
+
 @cclass
 class BaseProcessor:
     """
     Abstract processor class, defines the interface.
+
+    Processors may either implement process() directly, or reduce each
+    record to a dict of mergeable accumulators (see the accumulators module)
+    with accumulate() and turn the merged accumulators into results with
+    summarize().
     """
     formats = ()
 
-    @locals(data='tuple')
-    def __init__(self, data):
+    @locals(data='tuple', jobs='int')
+    def __init__(self, data, jobs=1):
         """
         Initializes the processor for the given data sets.
 
@@ -19,8 +36,12 @@ class BaseProcessor:
 
         The meta data is prescanned to find the maximum numbers of features,
         actions and steps in the set.
+
+        With more than one job, records are accumulated by a pool of worker
+        processes.
         """
         self.data = data
+        self.jobs = jobs
         self.records, self.meta = zip(*data)
         for meta in self.meta:
             if meta['collector'] not in self.formats:
@@ -45,10 +66,76 @@ class BaseProcessor:
                  ("levels", ", ".join([l['key'] for l in self.levels]))) +
                  entries)
 
+    @ccall
+    @returns('dict')
+    @locals(meta='dict')
+    def accumulate(self, record, meta):
+        """
+        Reduces a single record to a dict of accumulators.
+        """
+        raise NotImplementedError()
+
+    @ccall
+    @returns('dict')
+    @locals(accumulated='list', missing='list', paths='list', index='int',
+            merged='dict', accumulators='dict')
+    def reduce(self):
+        """
+        Accumulates all records and merges their accumulators.
+
+        Accumulators of records from data set directories are stored beside
+        the records, so only data that was not processed before needs to be
+        accumulated (the collected data never changes).
+        """
+        accumulated = []
+        missing = []
+        paths = []
+        for index, (record, meta) in enumerate(self.data):
+            path = getattr(record, 'path', None)
+            if path is not None:
+                path = join(path, '{}.pkl'.format(type(self).__module__))
+                if exists(path):
+                    with open(path, 'rb') as accumulators_file:
+                        accumulated.append(load(accumulators_file))
+                    continue
+            accumulated.append(None)
+            missing.append(index)
+            paths.append(path)
+
+        tasks = [(type(self),) + self.data[i] for i in missing]
+        if self.jobs > 1 and len(tasks) > 1:
+            pool = Pool(min(self.jobs, len(tasks)))
+            results = pool.map(accumulate_task, tasks)
+            pool.close()
+            pool.join()
+        else:
+            results = [self.accumulate(*self.data[i]) for i in missing]
+        for index, path, accumulators in zip(missing, paths, results):
+            accumulated[index] = accumulators
+            if path is not None:
+                with open(path, 'wb') as accumulators_file:
+                    dump(accumulators, accumulators_file)
+
+        merged = accumulated[0]
+        for accumulators in accumulated[1:]:
+            merged = {k: a.merge(accumulators[k]) for k, a in merged.items()}
+        return merged
+
+    @ccall
+    @returns('object')
+    @locals(accumulated='dict')
+    def summarize(self, accumulated):
+        """
+        Turns the merged accumulators into results to print.
+        """
+        raise NotImplementedError()
+
     @ccall
     @returns('object')
     def process(self):
         """
         The main processor function, returns an ordered dict of data to print.
+
+        By default summarizes the merged accumulators of all records.
         """
-        raise NotImplementedError()
+        return self.summarize(self.reduce())
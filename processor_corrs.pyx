@@ -3,9 +3,10 @@ Prints correlations between state components.
 
 Can consume any data that contains consequent states (srs, ssa, sss).
 """
-from cython import ccall, cclass, returns
-from numpy import corrcoef, nonzero, transpose, triu, zeros
+from cython import ccall, cclass, locals, returns
+from numpy import nonzero, transpose, triu
 
+from accumulators cimport Covariance
 from processor_base cimport BaseProcessor
 
 
@@ -14,23 +15,24 @@ class Processor(BaseProcessor):
     formats = ('srs', 'ssa', 'sss')
 
     @ccall
-    @returns('object')
-    def process(self):
-        corrs = zeros((self.max_features, self.max_features), dtype='f4')
-        steps = 0
-
-        for record, meta in self.data:
-            corrs += corrcoef(record['states'], rowvar=0)
-            steps += meta['level']['steps']
+    @returns('dict')
+    @locals(meta='dict')
+    def accumulate(self, record, meta):
+        return {'states': Covariance(record['states'])}
 
-        # It would probably be better to calculate the correlation over the
-        # combined data from all iterations / files.
-        corrs = triu(corrs, 1) / len(self.data)
+    @ccall
+    @returns('object')
+    @locals(accumulated='dict', states='Covariance')
+    def summarize(self, accumulated):
+        # The correlations are computed over the combined data from all the
+        # records (the covariances are pooled, not averaged).
+        states = accumulated['states']
+        corrs = triu(states.correlations(), 1)
         corrs_large = list(nonzero(corrs > .5))
-        corrs_large.append(corrs[corrs_large])
+        corrs_large.append(corrs[tuple(corrs_large)])
         corrs_large = transpose(corrs_large)
         corrs_small = list(nonzero(corrs < -.5))
-        corrs_small.append(corrs[corrs_small])
+        corrs_small.append(corrs[tuple(corrs_small)])
         corrs_small = transpose(corrs_small)
 
         return self.results((
@@ -1,17 +1,18 @@
 """
 Shows information about the first few states.
 
-Needs data from the sss collector.
+Needs data from the sss collector, or from the sps one with the first and the
+fourth step probed (actions that were not tried show up as NaNs).
 """
 from cython import ccall, cclass, returns
-from numpy import empty, var
+from numpy import empty, nanvar, searchsorted
 
 from processor_base cimport BaseProcessor
 
 
 @cclass
 class Processor(BaseProcessor):
-    formats = ('sss',)
+    formats = ('sss', 'sps')
 
     @ccall
     @returns('object')
@@ -29,14 +30,23 @@ class Processor(BaseProcessor):
         variances4 = empty((records_count, features), dtype='f4')
 
         for index, (record, meta) in enumerate(self.data):
+            # Rows of following states for the first and the fourth step.
+            if 'probed' in record:
+                probed = record['probed']
+                if not {0, 3} <= set(probed[:4].tolist()):
+                    raise ValueError("The first and the fourth step need to " +
+                                     "be probed")
+                rows = searchsorted(probed, (0, 3))
+            else:
+                rows = (0, 3)
             states0[index] = record['states'][0]
             states3[index] = record['states'][3]
-            fstates1[index] = record['following_states'][0]
-            fstates4[index] = record['following_states'][3]
+            fstates1[index] = record['following_states'][rows[0]]
+            fstates4[index] = record['following_states'][rows[1]]
             changes1[index] = fstates1[index] - states0[index]
             changes4[index] = fstates4[index] - states3[index]
-            variances1[index] = var(fstates1[index], axis=0)
-            variances4[index] = var(fstates4[index], axis=0)
+            variances1[index] = nanvar(fstates1[index], axis=0)
+            variances4[index] = nanvar(fstates4[index], axis=0)
 
         return self.results((
                 ("initial states", states0),
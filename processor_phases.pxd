@@ -2,4 +2,5 @@ from processor_base cimport BaseProcessor
 
 
 cdef class Processor(BaseProcessor):
-    pass
+    cpdef int period(self, object)
+    cpdef str phases_arg(self, object)
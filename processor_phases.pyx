@@ -5,10 +5,17 @@ For each feature we find the steps at which its initial value first reoccurs.
 If the repetitions are common to multiple playthroughs, and spaced more or
 less evenly throughout the level, the component may mark phase starts.
 
-for meaningful results you should pass at least a couple of inputs.
+Independently, the autocorrelation of each feature (computed with FFT and
+averaged over the playthroughs) is searched for a dominant period.
+
+Phase splits suggested by either method are given in the form accepted by
+train.py --phases. For meaningful results you should pass at least a couple
+of inputs.
 """
 from cython import ccall, cclass, locals, returns
-from numpy import allclose, ones, diff, linspace, nonzero, split, transpose
+from numpy import (allclose, arange, argmax, ascontiguousarray, diff,
+                   linspace, nonzero, ones, split, transpose, zeros)
+from numpy.fft import irfft, rfft
 
 from processor_base cimport BaseProcessor
 
@@ -23,30 +30,46 @@ class Processor(BaseProcessor):
     # What does it mean to be spaced more or less evenly.
     rtol = .3
 
+    # Minimal autocorrelation at the period for a feature to be periodic.
+    min_autocorrelation = .5
+
+    # Number of features transformed at once (limits the memory needed).
+    features_block = 12
+
     @ccall
     @returns('object')
-    @locals(possible='bint[:, ::1]', states='float[:, ::1]',
-            step='int', fstep='int', feature='int')
+    @locals(steps='int', features='int', length='int', start='int', end='int',
+            half='int', period='int')
     def process(self):
         if any([l != self.levels[0] for l in self.levels]):
             raise ValueError("Data must be collected on a single level")
+        steps = self.max_steps
+        features = self.max_features
 
-        possible = ones((self.max_steps, self.max_features), dtype='intc')
-
+        # Steps at which features are back at their initial values, in all
+        # the records; only the first step of each such run counts.
+        possible = ones((steps, features), dtype=bool)
         for record in self.records:
-            states = record['states']
-            for step in range(self.max_steps):
-                for feature in range(self.max_features):
-                    if states[step, feature] != states[0, feature]:
-                        possible[step, feature] = False
-
-        for feature in range(self.max_features):
-            for step in range(self.max_steps):
-                if possible[step, feature]:
-                    fstep = step + 1
-                    while fstep < self.max_steps and possible[fstep, feature]:
-                        possible[fstep, feature] = False
-                        fstep += 1
+            states = record['states'][:steps]
+            possible &= states == states[0]
+        possible[1:] &= ~possible[:steps - 1]
+
+        # Autocorrelations, padded (to a power of two) to avoid wrapping
+        # around the level end.
+        length = 1
+        while length < 2 * steps - 1:
+            length *= 2
+        autocorrs = zeros((features, steps), dtype='f4')
+        for start in range(0, features, self.features_block):
+            end = min(start + self.features_block, features)
+            spectrum = 0.
+            for record in self.records:
+                states = ascontiguousarray(
+                            transpose(record['states'][:steps, start:end]))
+                states -= states.mean(axis=1)[:, None]
+                states = rfft(states, length, 1)
+                spectrum = spectrum + states.real ** 2 + states.imag ** 2
+            autocorrs[start:end] = irfft(spectrum, length, 1)[:, :steps]
 
         starts = nonzero(transpose(possible))
         feature_splits = nonzero(diff(starts[0]))[0] + 1
@@ -57,12 +80,68 @@ class Processor(BaseProcessor):
                 info = "no reoccurences"
             elif len(starts) > self.max_phases:
                 info = "too many reoccurences"
-            elif not allclose(starts / self.max_steps, even, rtol=self.rtol):
+            elif not allclose(starts / steps, even, rtol=self.rtol):
                 info = "not evenly distributed"
             else:
-                info = ", ".join(map(str, starts))
+                info = "{} ({})".format(", ".join(map(str, starts)),
+                                        self.phases_arg(starts[1:] / steps))
             phases[index] = "{}: {}".format(index, info)
         phases = "\n".join(phases)
 
+        periods = []
+        half = steps // 2
+        overlaps = steps - arange(half)
+        for index in range(features):
+            autocorr = autocorrs[index]
+            if autocorr[0] <= 0:
+                periods.append("{}: constant".format(index))
+                continue
+            # Normalize by the number of overlapping steps at each lag.
+            autocorr = autocorr[:half] / autocorr[0] * steps / overlaps
+            period = self.period(autocorr)
+            if period == 0:
+                info = "no periodicity"
+            elif steps // period > self.max_phases:
+                info = "period {} (too short)".format(period)
+            else:
+                info = "period {} ({})".format(period, self.phases_arg(
+                                        arange(period, steps, period) / steps))
+            periods.append("{}: {}".format(index, info))
+        periods = "\n".join(periods)
+
         return self.results((
-                ("possible subepisodes (feature resets)", phases),))
+                ("possible subepisodes (feature resets)", phases),
+                ("possible subepisodes (feature periods)", periods)))
+
+    @ccall
+    @returns('int')
+    @locals(first='int', top='float', peak_start='int', peak_end='int')
+    def period(self, autocorr):
+        """
+        Finds the lag of the first high peak of the (normalized)
+        autocorrelation, returns zero if there is none.
+
+        Only lags past the first drop below zero are considered, and a peak
+        is high if it comes close to the highest value at the further lags.
+        """
+        below = nonzero(autocorr < 0)[0]
+        if len(below) == 0:
+            return 0
+        first = below[0]
+        top = autocorr[first:].max()
+        if top < self.min_autocorrelation:
+            return 0
+        high = autocorr[first:] >= .9 * top
+        peak_start = first + argmax(high)
+        peak_end = peak_start + argmax(~high[peak_start - first:])
+        if peak_end == peak_start:
+            peak_end = len(autocorr)
+        return peak_start + argmax(autocorr[peak_start:peak_end])
+
+    @ccall
+    @returns('str')
+    def phases_arg(self, splits):
+        """
+        Formats phase splits as an argument for train.py.
+        """
+        return "--phases " + " ".join(["{:.4g}".format(s) for s in splits])
@@ -4,9 +4,10 @@ first glance at possible temporal patterns.
 
 Processes data from the ssa processor.
 """
-from cython import ccall, cclass, returns
+from cython import ccall, cclass, locals, returns
 from numpy import diff, zeros
 
+from accumulators cimport Sums
 from processor_base cimport BaseProcessor
 
 
@@ -15,8 +16,9 @@ class Processor(BaseProcessor):
     formats = ('ssa',)
 
     @ccall
-    @returns('object')
-    def process(self):
+    @returns('dict')
+    @locals(meta='dict')
+    def accumulate(self, record, meta):
         action_counts = zeros(self.max_actions, dtype='i4')
         action_rewards = zeros(self.max_actions, dtype='f4')
         phase5_rewards = zeros(5, dtype='f4')
@@ -26,26 +28,45 @@ class Processor(BaseProcessor):
         mod8_rewards = zeros(8, dtype='f4')
         mod9_rewards = zeros(9, dtype='f4')
 
-        for record, meta in self.data:
-            steps = meta['level']['steps']
-            rewards = diff(record['scores'])
-            for step, action in enumerate(record['actions']):
-                reward = rewards[step]
-                action_counts[action] += 1
-                action_rewards[action] += reward
-                phase5_rewards[int(5 * step / steps)] += reward
-                phase8_rewards[int(8 * step / steps)] += reward
-                phase9_rewards[int(9 * step / steps)] += reward
-                mod5_rewards[step % 5] += reward
-                mod8_rewards[step % 8] += reward
-                mod9_rewards[step % 9] += reward
+        steps = meta['level']['steps']
+        rewards = diff(record['scores'])
+        for step, action in enumerate(record['actions']):
+            reward = rewards[step]
+            action_counts[action] += 1
+            action_rewards[action] += reward
+            phase5_rewards[int(5 * step / steps)] += reward
+            phase8_rewards[int(8 * step / steps)] += reward
+            phase9_rewards[int(9 * step / steps)] += reward
+            mod5_rewards[step % 5] += reward
+            mod8_rewards[step % 8] += reward
+            mod9_rewards[step % 9] += reward
+
+        return {
+            'action_counts': Sums(action_counts, 1),
+            'action_rewards': Sums(action_rewards, 1),
+            'phase5_rewards': Sums(phase5_rewards, 1),
+            'phase8_rewards': Sums(phase8_rewards, 1),
+            'phase9_rewards': Sums(phase9_rewards, 1),
+            'mod5_rewards': Sums(mod5_rewards, 1),
+            'mod8_rewards': Sums(mod8_rewards, 1),
+            'mod9_rewards': Sums(mod9_rewards, 1)
+        }
 
+    @ccall
+    @returns('object')
+    @locals(accumulated='dict', action_counts='Sums')
+    def summarize(self, accumulated):
+        action_counts = accumulated['action_counts']
         return self.results((
-                ("counts of actions taken", action_counts),
-                ("average reward per action", action_rewards / action_counts),
-                ("gains by 5 level phases", phase5_rewards / len(self.data)),
-                ("gains by 8 level phases", phase8_rewards / len(self.data)),
-                ("gains by 9 level phases", phase9_rewards / len(self.data)),
-                ("gains by step mod 5", mod5_rewards / len(self.data)),
-                ("gains by step mod 8", mod8_rewards / len(self.data)),
-                ("gains by step mod 9", mod9_rewards / len(self.data))))
+                ("counts of actions taken", action_counts.total),
+                ("average reward per action",
+                    accumulated['action_rewards'].total / action_counts.total),
+                ("gains by 5 level phases",
+                    accumulated['phase5_rewards'].mean()),
+                ("gains by 8 level phases",
+                    accumulated['phase8_rewards'].mean()),
+                ("gains by 9 level phases",
+                    accumulated['phase9_rewards'].mean()),
+                ("gains by step mod 5", accumulated['mod5_rewards'].mean()),
+                ("gains by step mod 8", accumulated['mod8_rewards'].mean()),
+                ("gains by step mod 9", accumulated['mod9_rewards'].mean())))
@@ -1,40 +1,46 @@
 """
 Calculates various global statistics about state and rewards.
 
-Requires data from the srs collector.
+Requires data from the srs collector, or the sps one (average rewards are then
+computed over the probed steps and actions).
 """
-from cython import ccall, cclass, returns
-from numpy import zeros, diff, fabs, sqrt, where
+from cython import ccall, cclass, locals, returns
+from numpy import diff, fabs, isnan, nansum, sqrt, where
 
+from accumulators cimport Moments, Sums
 from processor_base cimport BaseProcessor
 
 
 @cclass
 class Processor(BaseProcessor):
-    formats = ('srs',)
+    formats = ('srs', 'sps')
 
     @ccall
-    @returns('object')
-    def process(self):
-        rewards = zeros(self.max_actions, dtype='f4')
-        totals = zeros(self.max_features, dtype='f4')
-        variances = zeros(self.max_features, dtype='f4')
-        changes = zeros(self.max_features, dtype='i4')
-        large_changes = zeros(self.max_features, dtype='i4')
-        steps = 0
-
-        for record, meta in self.data:
-            rewards += record['rewards'].sum(axis=0)
-            totals += record['states'].sum(axis=0)
-            variances += record['states'].var(axis=0) * meta['level']['steps']
-            diffs = diff(record['states'], axis=0)
-            changes += where(diffs != 0., 1, 0).sum(axis=0)
-            large_changes += where(fabs(diffs) > 1., 1, 0).sum(axis=0)
-            steps += meta['level']['steps']
+    @returns('dict')
+    @locals(meta='dict', steps='long')
+    def accumulate(self, record, meta):
+        steps = meta['level']['steps']
+        diffs = diff(record['states'], axis=0)
+        rewards = record['rewards']
+        return {
+            'rewards': Sums(nansum(rewards, axis=0), steps),
+            'probes': Sums((~isnan(rewards)).sum(axis=0), 1),
+            'states': Moments(record['states']),
+            'changes': Sums(where(diffs != 0., 1, 0).sum(axis=0), steps),
+            'large_changes': Sums(where(fabs(diffs) > 1., 1, 0).sum(axis=0),
+                                  steps)
+        }
 
+    @ccall
+    @returns('object')
+    @locals(accumulated='dict', states='Moments')
+    def summarize(self, accumulated):
+        states = accumulated['states']
         return self.results((
-                ("average rewards", rewards / steps),
-                ("state component means", totals / steps),
-                ("state standard deviations", sqrt(variances / steps)),
-                ("change frequencies", changes / steps),
-                ("change > 1 frequencies", large_changes / steps)))
+                ("average rewards", accumulated['rewards'].total /
+                                    accumulated['probes'].total),
+                ("state component means", states.means),
+                ("state standard deviations", sqrt(states.variances())),
+                ("change frequencies", accumulated['changes'].mean()),
+                ("change > 1 frequencies",
+                                    accumulated['large_changes'].mean())))
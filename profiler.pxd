@@ -0,0 +1,6 @@
+cdef bint enabled
+cdef dict counts, times
+
+cpdef void enable(bint flag=?)
+cpdef double now()
+cpdef void note(str stage, double start, long count=?)
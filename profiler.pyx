@@ -0,0 +1,66 @@
+"""
+Counters and timers of the stages of a session.
+
+Stages are named parts of a session, such as cloning or evaluating bots. Each
+stage accumulates the time spent in it and a count of items it handled (bots,
+level steps or variates, depending on the stage).
+
+Profiling is disabled by default, and statically compiled callers check the
+enabled flag before reading the clock, so a disabled profile costs a single
+branch per instrumented call. Stages of bots evaluated in worker processes
+are not recorded, only the time their batches took in the main process.
+"""
+from collections import OrderedDict as odict
+
+from posix.time cimport CLOCK_MONOTONIC, clock_gettime, timespec
+
+from cython import address, ccall, declare, locals, returns
+
+enabled = False
+counts = {}
+times = {}
+
+
+@ccall
+@returns('void')
+@locals(flag='bint')
+def enable(flag=True):
+    """
+    Enables or disables profiling, discarding anything noted before.
+    """
+    global enabled
+    enabled = flag
+    counts.clear()
+    times.clear()
+
+
+@ccall
+@returns('double')
+def now():
+    """
+    Monotonic clock reading in seconds.
+    """
+    moment = declare(timespec)
+    clock_gettime(CLOCK_MONOTONIC, address(moment))
+    return moment.tv_sec + moment.tv_nsec * 1e-9
+
+
+@ccall
+@returns('void')
+@locals(stage='str', start='double', count='long')
+def note(stage, start, count=1):
+    """
+    Adds the time since the start and the count to the stage's totals.
+    """
+    if enabled:
+        counts[stage] = counts.get(stage, 0) + count
+        times[stage] = times.get(stage, 0.) + now() - start
+
+
+def stages():
+    """
+    Returns an ordered dict of (count, time) pairs, with stages that took the
+    most time first.
+    """
+    return odict((s, (counts[s], times[s]))
+                 for s in sorted(times, key=times.get, reverse=True))
@@ -6,7 +6,7 @@ meta = {
     'name': 'blackbox',
     'version': '0.1.0',
     'packages': ('blackbox',),
-    'install_requires': ('cython>=0.24', 'numpy>=1.11', 'scipy>=0.17'),
+    'install_requires': ('cython>=0.29.31', 'numpy>=1.11', 'scipy>=0.17'),
     'tests_require': ('pytest', 'pytest-benchmark', 'pytest-flake8',
                       'pytest-isort', 'pytest-readme',
                       'flake8-print', 'flake8-todo', 'pep8-naming'),
@@ -0,0 +1,4 @@
+cdef float* c_get_state()
+cdef float c_get_score()
+cdef int c_get_time()
+cdef bint c_do_action(int action)
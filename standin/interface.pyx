@@ -0,0 +1,211 @@
+"""
+An offline stand-in for the game interface.
+
+Implements the Python and C API of the competition's interface module, but
+plays synthetic levels: the state is a vector of features evolving through a
+random, fixed (for the level) nonlinear map; each action nudges the state in
+its own direction, and rewards are a linear function of the state and action,
+plus some noise. Levels are fully determined by a few numbers stored in the
+level file (see create_level()).
+
+The substeps level parameter makes the map be applied that many times per
+step, to let the step cost approximate that of a real game.
+
+Checkpoints store the whole game state (including the noise generator) and
+survive level resets, just like with the real interface.
+
+As bots copy the state after making an action, the pointer returned by
+c_get_state() stays valid (and unchanged) until the next action.
+"""
+from libc.math cimport sqrt, tanh
+from libc.stdint cimport uint32_t
+from libc.string cimport memcpy
+
+from numpy import asarray, zeros
+from numpy.random import RandomState
+
+cdef:
+    int steps = 0, actions = 0, features = 0, substeps = 0
+    int time = 0
+    float score = 0
+    uint32_t noise = 0, noise_seed = 1
+    float noise_scale = 0
+    float* state
+    float* next_state
+    float* work_state
+    float[:, ::1] state_buffers
+    float[::1] initial_state
+    float[:, ::1] transition, effects, rewards
+    float[::1] biases
+    list checkpoints = []
+
+
+def create_level(path, steps, actions, features, seed=0, substeps=1,
+                 noise=.1):
+    """
+    Writes a synthetic level description, that can be loaded by load_level().
+    """
+    with open(path, 'w') as level_file:
+        level_file.write("standin {} {} {} {} {} {}\n".format(
+                                steps, actions, features, seed, substeps,
+                                noise))
+
+
+def load_level(path, verbose=0):
+    """
+    Reads a level description and prepares the level for playing.
+
+    The last state feature is constant (it may serve as a bias input).
+    """
+    global steps, actions, features, substeps, noise_seed, noise_scale
+    global state, next_state, work_state, state_buffers, initial_state
+    global transition, effects, rewards, biases, checkpoints
+    with open(path) as level_file:
+        desc = level_file.read().split()
+    if len(desc) != 7 or desc[0] != 'standin':
+        raise ValueError("Not a stand-in level: {}".format(path))
+    steps, actions, features, seed, substeps = map(int, desc[1:6])
+    noise_scale = float(desc[6])
+
+    generator = RandomState(seed)
+    scale = 1.5 / sqrt(features)
+    transition = generator.normal(0, scale, (features, features)).astype('f4')
+    transition[features - 1] = 0
+    effects = generator.normal(0, .5, (actions, features)).astype('f4')
+    effects[:, features - 1] = 0
+    rewards = generator.normal(0, 1, (actions, features)).astype('f4')
+    biases = generator.normal(0, .1, actions).astype('f4')
+    initial_state = generator.uniform(-1, 1, features).astype('f4')
+    initial_state[features - 1] = 1
+    state_buffers = zeros((3, features), dtype='f4')
+    state = &state_buffers[0, 0]
+    next_state = &state_buffers[1, 0]
+    work_state = &state_buffers[2, 0]
+    noise_seed = generator.randint(1, 2 ** 32)
+    checkpoints = []
+    reset_level()
+    if verbose:
+        print("Stand-in level: {} steps, {} actions, {} features".format(
+                                                    steps, actions, features))
+
+
+def reset_level():
+    """
+    Brings the level to its initial state.
+    """
+    global time, score, noise
+    time = 0
+    score = 0
+    noise = noise_seed
+    memcpy(state, &initial_state[0], features * sizeof(float))
+
+
+cdef inline float c_noise():
+    """
+    Xorshift, returns a uniform float from [-1, 1).
+    """
+    global noise
+    noise ^= noise << 13
+    noise ^= noise >> 17
+    noise ^= noise << 5
+    return <float>noise / 2147483648. - 1
+
+
+cdef float* c_get_state():
+    return state
+
+
+cdef float c_get_score():
+    return score
+
+
+cdef int c_get_time():
+    return time
+
+
+cdef bint c_do_action(int action):
+    """
+    Makes a step of the level, returns false if the level has already ended.
+    """
+    global time, score, state, next_state
+    cdef:
+        int substep, feature, feature1
+        float value
+        float* source = state
+
+    if time >= steps:
+        return False
+    value = biases[action]
+    for feature in range(features):
+        value += rewards[action, feature] * state[feature]
+    score += value + noise_scale * c_noise()
+
+    for substep in range(substeps):
+        if substep > 0:
+            memcpy(work_state, next_state, features * sizeof(float))
+            source = work_state
+        for feature in range(features - 1):
+            value = effects[action, feature] + noise_scale * c_noise()
+            for feature1 in range(features):
+                value += transition[feature, feature1] * source[feature1]
+            next_state[feature] = <float>tanh(value)
+        next_state[features - 1] = 1
+    state, next_state = next_state, state
+    time += 1
+    return True
+
+
+def get_max_time():
+    return steps
+
+
+def get_num_of_actions():
+    return actions
+
+
+def get_num_of_features():
+    return features
+
+
+def get_time():
+    return time
+
+
+def get_score():
+    return score
+
+
+def get_state():
+    return asarray(<float[:features]>state).copy()
+
+
+def do_action(action):
+    return c_do_action(action)
+
+
+def is_level_finished():
+    return time >= steps
+
+
+def create_checkpoint():
+    """
+    Stores the game state, returns an identifier to restore it with.
+    """
+    checkpoints.append((time, score, noise, get_state()))
+    return len(checkpoints) - 1
+
+
+def load_from_checkpoint(checkpoint):
+    global time, score, noise
+    cdef float[::1] saved_state
+    time, score, noise, saved_state = checkpoints[checkpoint]
+    memcpy(state, &saved_state[0], features * sizeof(float))
+
+
+def clear_all_checkpoints():
+    del checkpoints[:]
+
+
+def finish(verbose=0):
+    if verbose:
+        print("Level finished at step {}, score: {}".format(time, score))
@@ -4,6 +4,8 @@ from scipy.stats import beta, norm
 
 from core import available_bots
 from iop import load_level
+from playthrough import Playthrough
+from prngs import run_seeds
 
 from interface import is_level_finished
 
@@ -21,6 +23,14 @@ emphases = (1.,) * level['features']
 no_phases = array([1.], dtype='f4')
 phases = array([.33, .67, 1.], dtype='f4')
 
+offline_bots = {k: c for k, c in available_bots.items() if c.offline_keys}
+
+# The random bot can only be cloned with its state.
+stateless_bots = {k: c for k, c in available_bots.items() if k != 'random'}
+
+# The similarity bot does not support parameter variations.
+varied_bots = {k: c for k, c in stateless_bots.items() if k != 'simi'}
+
 
 class Benchmarks:
     @mark.parametrize('bot_key, bot_class', available_bots.items())
@@ -30,3 +40,64 @@ class Benchmarks:
                         phases=phases if bot_key.endswith('_m') else no_phases)
         benchmark(bot.evaluate, 1)
         assert is_level_finished()
+
+    @mark.parametrize('bot_key, bot_class', offline_bots.items())
+    @mark.benchmark(group='playthroughs')
+    def benchmark_playthrough(self, benchmark, bot_key, bot_class):
+        bot = bot_class(level=level, dists=dists, emphases=emphases,
+                        phases=phases if bot_key.endswith('_m') else no_phases)
+        playthrough = Playthrough(level, 1000)
+        playthrough.record(bot)
+        variation = bot.clone(state=False)
+        variation.vary_param(dists, emphases, .1)
+        score = benchmark(lambda: playthrough.evaluate(
+                                                variation.clone(state=False)))
+        assert score == variation.clone(state=False).evaluate(1)
+
+    @mark.parametrize('bot_key, bot_class', available_bots.items())
+    @mark.benchmark(group='trajectories')
+    def benchmark_evaluate_trajectory(self, benchmark, bot_key, bot_class):
+        bot = bot_class(level=level, dists=dists, emphases=emphases,
+                        phases=phases if bot_key.endswith('_m') else no_phases)
+        score = benchmark(bot.evaluate, 1, 1000)
+        assert score == bot.trajectory[-1]
+        assert bot.played == level['steps']
+        if bot_key in stateless_bots:
+            # Bots may carry state between evaluations, compare fresh clones
+            # (on common random numbers, for the stochastic ones).
+            seeds = run_seeds(0, 1)
+            reference = bot.clone(state=False)
+            reference.evaluate(1, 1000, None, 0, seeds)
+            bounds = reference.trajectory + 1
+            variation = bot.clone(state=False)
+            assert variation.evaluate(1, 1000, bounds, 0,
+                                      seeds) == float('-inf')
+
+    @mark.parametrize('bot_key, bot_class', varied_bots.items())
+    @mark.benchmark(group='variations')
+    def benchmark_vary_params(self, benchmark, bot_key, bot_class):
+        bot = bot_class(level=level, dists=dists, emphases=emphases,
+                        phases=phases if bot_key.endswith('_m') else no_phases)
+
+        def vary():
+            variation = bot.clone(state=False)
+            variation.vary_params(dists, emphases, .1, 10)
+            return variation
+        variation = benchmark(vary)
+        assert variation.varied_choices
+
+    @mark.parametrize('bot_key, bot_class', varied_bots.items())
+    @mark.benchmark(group='deltas')
+    def benchmark_apply_deltas(self, benchmark, bot_key, bot_class):
+        bot = bot_class(level=level, dists=dists, emphases=emphases,
+                        phases=phases if bot_key.endswith('_m') else no_phases)
+        variation = bot.clone(state=False)
+        variation.vary_params(dists, emphases, .1, 10)
+
+        def apply():
+            changed = bot.clone(state=False)
+            changed.apply_deltas(variation.param_deltas)
+            return changed
+        changed = benchmark(apply)
+        assert (changed.param_vector() == variation.param_vector()).all()
+        assert changed.param_deltas == variation.param_deltas
@@ -0,0 +1,74 @@
+from numpy import array
+from scipy.stats import beta, norm
+
+import cache
+from cache import ScoreCache
+from core import available_bots
+from iop import load_level
+from prngs import run_seeds
+
+level = load_level('train', 0)
+
+dists = {
+    'real': norm(0, 1),
+    'unit': beta(2, 2),
+    'new': {},
+    'vary': {}
+}
+
+emphases = (1.,) * level['features']
+
+
+class CacheTests:
+    def test_hit(self):
+        score_cache = ScoreCache()
+        bot = available_bots['linear'](level=level, dists=dists,
+                                       emphases=emphases)
+        score_cache.put(bot, level, 5.)
+        assert score_cache.get(bot.clone(state=False), level) == 5.
+        assert score_cache.hits == 1 and score_cache.misses == 0
+
+    def test_scalars(self):
+        score_cache = ScoreCache()
+        bot = available_bots['belief_1'](level=level, dists=dists,
+                                         emphases=emphases)
+        score_cache.put(bot, level, 5.)
+        assert score_cache.get(bot.clone(state=False), level) == 5.
+
+    def test_miss(self, monkeypatch):
+        score_cache = ScoreCache()
+        bot = available_bots['linear'](level=level, dists=dists,
+                                       emphases=emphases)
+        score_cache.put(bot, level, 5.)
+        variation = bot.clone(state=False)
+        variation.vary_param(dists, emphases, 1.)
+        assert score_cache.get(variation, level) is None
+        assert score_cache.get(bot, dict(level, steps=1)) is None
+        monkeypatch.setattr(cache, 'version', cache.version + 1)
+        assert score_cache.get(bot, level) is None
+        assert score_cache.hits == 0 and score_cache.misses == 3
+
+    def test_stochastic(self):
+        score_cache = ScoreCache()
+        bot = available_bots['random_1'](level=level, dists=dists,
+                                         emphases=emphases)
+        score_cache.put(bot, level, 5.)
+        assert score_cache.get(bot, level) is None
+        seeds = run_seeds(0, 2)
+        bot.run_scores = array([4., 6.])
+        score_cache.put(bot, level, 5., seeds)
+        clone = bot.clone(state=False)
+        assert score_cache.get(clone, level, seeds) == 5.
+        assert list(clone.run_scores) == [4., 6.]
+        assert score_cache.get(clone, level, run_seeds(1, 2)) is None
+
+    def test_shelf(self, tmpdir):
+        path = str(tmpdir.join('scores'))
+        bot = available_bots['linear'](level=level, dists=dists,
+                                       emphases=emphases)
+        score_cache = ScoreCache(path=path)
+        score_cache.put(bot, level, 5.)
+        score_cache.close()
+        score_cache = ScoreCache(path=path)
+        assert score_cache.get(bot, level) == 5.
+        score_cache.close()
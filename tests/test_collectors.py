@@ -6,12 +6,30 @@ from iop import load_level
 level = load_level('train', 0)
 bot = available_bots['random'](level=level)
 
+configs = {
+    'sps': (3, .5, 2),
+    'srs': (),
+    'ssa': (),
+    'sss': ()
+}
+
 
 class Benchmarks:
     @mark.parametrize('collector_key, collector_class',
                       available_collectors.items())
     @mark.benchmark(group='collectors')
     def benchmark_train(self, benchmark, collector_key, collector_class):
-        collector = collector_class(level=level, bot=bot)
+        collector = collector_class(level=level, bot=bot,
+                                    config=configs[collector_key])
         data = benchmark(collector.collect)
         assert data
+
+    @mark.parametrize('collector_key, collector_class',
+                      available_collectors.items())
+    @mark.benchmark(group='collectors to disk')
+    def benchmark_train_to_disk(self, benchmark, tmpdir, collector_key,
+                                collector_class):
+        collector = collector_class(level=level, bot=bot, path=str(tmpdir),
+                                    config=configs[collector_key])
+        data = benchmark(collector.collect)
+        assert all(tmpdir.join('{}.npy'.format(k)).check() for k in data)
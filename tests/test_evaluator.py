@@ -0,0 +1,93 @@
+from numpy.random import RandomState
+from pytest import approx
+from scipy.stats import beta, norm
+
+from cache import ScoreCache
+from core import available_bots
+from evaluator import Evaluator
+from iop import load_level
+
+level = load_level('train', 0)
+
+dists = {
+    'real': norm(0, 1),
+    'unit': beta(2, 2),
+    'new': {},
+    'vary': {}
+}
+
+emphases = (1.,) * level['features']
+
+
+class Player:
+    """
+    Stands in for a stochastic bot, scoring its mean plus a standard normal
+    variate on each run.
+    """
+    deterministic = False
+
+    def __init__(self, mean, seed):
+        self.mean = mean
+        self.noise = RandomState(seed)
+        self.run_scores = None
+
+    def evaluate(self, runs, interval=0, bounds=None, steps=0, seeds=None):
+        return self.mean + self.noise.standard_normal(runs).mean()
+
+
+class EvaluatorTests:
+    def test_sequential(self):
+        evaluator = Evaluator(level, 20, adaptive=2.)
+        parent = Player(0, 0)
+        better, worse = Player(100, 1), Player(-100, 2)
+        better_score, worse_score = evaluator.evaluate([better, worse],
+                                                       parent)
+        parent_score = parent.run_scores.mean()
+        assert len(parent.run_scores) == 20
+        assert len(better.run_scores) == len(worse.run_scores) == 2
+        assert better_score == approx(parent_score + 100, abs=5)
+        assert worse_score == approx(parent_score - 100, abs=5)
+        assert better_score - parent_score == approx(
+                            (better.run_scores - parent.run_scores[:2]).mean())
+        assert evaluator.decisions == 2
+        assert evaluator.decision_runs == 4
+        assert evaluator.steps == 24 * level['steps']
+
+    def test_common(self):
+        evaluator = Evaluator(level, 3, common=True)
+        bot = available_bots['random_1'](level=level, dists=dists,
+                                         emphases=emphases)
+        clone = bot.clone(state=False)
+        assert evaluator.evaluate([bot]) == evaluator.evaluate([clone])
+        assert list(bot.run_scores) == list(clone.run_scores)
+
+    def test_common_cache(self):
+        score_cache = ScoreCache()
+        bot = available_bots['random_1'](level=level, dists=dists,
+                                         emphases=emphases)
+        evaluator = Evaluator(level, 3, cache=score_cache, common=True)
+        score = evaluator.evaluate([bot])
+        assert evaluator.evaluate([bot.clone(state=False)]) == score
+        assert score_cache.hits == 1 and score_cache.misses == 1
+        evaluator = Evaluator(level, 3, prngs_seed=1, cache=score_cache,
+                              common=True)
+        evaluator.evaluate([bot.clone(state=False)])
+        assert score_cache.hits == 1 and score_cache.misses == 2
+
+    def test_incremental(self):
+        bot = available_bots['linear'](level=level, dists=dists,
+                                       emphases=emphases)
+        variations = []
+        for index in range(3):
+            variation = bot.clone(state=False)
+            variation.vary_param(dists, emphases, .1)
+            variations.append(variation)
+        evaluator = Evaluator(level, 1, incremental=1000)
+        scores = evaluator.evaluate(variations, bot)
+        assert scores == [v.clone(state=False).evaluate(1)
+                          for v in variations]
+        assert evaluator.steps + evaluator.steps_saved == 4 * level['steps']
+        evaluator = Evaluator(level, 2, incremental=1000)
+        evaluator.evaluate([v.clone(state=False) for v in variations], bot)
+        assert evaluator.playthrough.bot is None
+        assert evaluator.steps_saved == 0
@@ -1,14 +1,20 @@
-from numpy import asarray
+from functools import reduce
+
+from numpy import allclose, array_split, asarray
 from pytest import mark
 
+import cython_init  # Executes pyximport install on module import # noqa.
+from accumulators import Covariance, Moments
 from core import available_bots, available_collectors, available_processors
 from iop import load_level
 
 level = load_level('train', 0)
 bot = available_bots['random'](level=level)
+configs = {'sps': (3, .5, 2)}
 data = {}
 for key, collector in available_collectors.items():
-    record = collector(level=level, bot=bot).collect()
+    record = collector(level=level, bot=bot,
+                       config=configs.get(key, ())).collect()
     record = {k: asarray(v) for k, v in record.items()}
     meta = {'collector': key, 'level': level, 'bot': ('random', None)}
     data[key] = ((record, meta),)
@@ -22,3 +28,13 @@ class Benchmarks:
         processor = processor_class(data=data[processor_class.formats[0]])
         results = benchmark(processor.process)
         assert results
+
+    @mark.parametrize('accumulator_class', (Moments, Covariance))
+    @mark.benchmark(group='accumulators')
+    def benchmark_merge(self, benchmark, accumulator_class):
+        states = asarray(data['srs'][0][0]['states'])
+        parts = [accumulator_class(p) for p in array_split(states, 10)]
+        merged = benchmark(reduce, lambda a, b: a.merge(b), parts)
+        whole = accumulator_class(states)
+        assert merged.count == whole.count
+        assert allclose(merged.means, whole.means)
@@ -1,19 +1,23 @@
-from pytest import mark
+from pytest import mark, raises
 from scipy.stats import beta, norm
 
 from core import available_bots, available_trainers
+from evaluator import Evaluator
 from iop import load_level
+from prngs import pool_dists
 
 level = load_level('train', 0)
 
 configs = {
     'anneal': (5, 2, 1),
     'anneal_d': (5, 2, 1, .1),
+    'cma': (2, 4, .1),
     'comb': (3,),
     'comb_phases': (3,),
     'local': (5, 1),
     'local_d': (5, 1, .1),
-    'select': ()
+    'select': (),
+    'tempering': (2, 2, 2, .1, 1.)
 }
 
 dists = {
@@ -42,3 +46,34 @@ class Benchmarks:
                                 emphases=emphases, seeds=seeds, runs=1)
         params = benchmark(trainer.train)[0]
         assert 'free' in params and 'state0l' in params
+
+    @mark.parametrize('trainer_key, trainer_class', available_trainers.items())
+    @mark.benchmark(group='trainers_pooled')
+    def benchmark_train_pooled(self, benchmark, trainer_key, trainer_class):
+        config = configs[trainer_key]
+        trainer = trainer_class(level=level, config=config,
+                                dists=pool_dists(dists, 0), emphases=emphases,
+                                seeds=seeds, runs=1)
+        params = benchmark(trainer.train)[0]
+        assert 'free' in params and 'state0l' in params
+
+    @mark.benchmark(group='trainers_parallel')
+    def benchmark_train_tempering_jobs(self, benchmark):
+        evaluator = Evaluator(level, 1, 2)
+        trainer = available_trainers['tempering'](
+                        level=level, config=configs['tempering'],
+                        dists=pool_dists(dists, 0), emphases=emphases,
+                        seeds=seeds, runs=1, evaluator=evaluator)
+        try:
+            params = benchmark(trainer.train)[0]
+        finally:
+            evaluator.close()
+        assert 'free' in params and 'state0l' in params
+
+
+class TrainerTests:
+    def test_cma_population(self):
+        with raises(ValueError):
+            available_trainers['cma'](level=level, config=(2, 1, .1),
+                                      dists=dists, emphases=emphases,
+                                      seeds=seeds, runs=1)
@@ -20,6 +20,13 @@ After that, many different options can be given, some notable are:
     serve to choose the starting point, either the best params out of a random
     pool or a set loaded from a file;
 
+--screening
+    narrows a big pool of random seeds down by successive halving: all seeds
+    are first scored on a short prefix of the level (at least the given
+    fraction of it, in a single run), then the better half is scored on a
+    twice longer prefix, and so on, with the final seeds chosen on the full
+    level;
+
 --dist_param_new and --dist_param_vary
     can be used to specify a distribution for a parameter array generation or
     mutation; they take the name of the array and a SciPy stats distribution
@@ -33,6 +40,48 @@ After that, many different options can be given, some notable are:
     trainers such as anneal have a way of escaping local maxima by sometimes
     accepting a score decline, this distribution describes this process;
 
+--common
+    plays each of the --runs of every evaluation with the generators reseeded
+    from the same seed, so a variation of a non-deterministic bot is compared
+    with its parent under common random numbers (the score differences are
+    then much less noisy, and fewer runs are needed for the same decisions);
+
+--adaptive
+    plays variations of a non-deterministic bot one run at a time (up to
+    --runs), until the mean difference of their run scores from the parent's
+    is more than the given number of its standard errors away from zero; the
+    average number of runs a decision took is kept in the history;
+
+--jobs and --candidates
+    let you use more cores: with multiple jobs bots are evaluated by a pool of
+    worker processes, and mutating trainers may try a couple of candidate
+    variations at each step, keeping the best one;
+
+--incremental
+    makes local search trainers replay variations only from the last level
+    checkpoint before the step at which they start to act differently than
+    their parent (this only works with a single job and run, and bots that
+    are linear in some function of the observed states, such as linear or
+    diffs); with multi-valued bots (see --phases) checkpoints are also kept
+    at phase starts and variations are not replayed before the first phase
+    they changed;
+
+--score_cache
+    deterministic bots are never evaluated twice with the same parameters
+    during a session, with this option their scores are also kept on disk and
+    reused in later sessions;
+
+--abort and --abort_margin
+    let trainers give up on a variation before the level end, if its score at
+    one of the points every --abort steps is more than the margin below the
+    score its parent had at the same point (the margin should be at least as
+    big as the declines the trainer may accept);
+
+--profile
+    counts and times the stages of the session (seeds screening, training and
+    its parts such as evaluating, cloning or varying bots), the breakdown is
+    printed and kept in the history;
+
 --emphasis
     can be used to hint trainers that some components of state are more or less
     important than other;
@@ -138,6 +187,13 @@ arguments = (
         'help': "pool of random seeds to choose from, and optionally the " +
                 "number of seeds to pass to the trainer"
     }),
+    (('-sn', '--screening'), {
+        'type': float,
+        'default': 0.,
+        'help': "screen the random seeds pool by successive halving, " +
+                "starting with at least that fraction of the level " +
+                "(0 = disabled)"
+    }),
     (('-ss', '--stored_seeds'), {
         'nargs': '+',
         'default': [],
@@ -181,6 +237,60 @@ arguments = (
         'help': "number of repetitions for each params evaluation " +
                 "(for non-deterministic bots)"
     }),
+    (('-cr', '--common'), {
+        'action': 'store_true',
+        'default': False,
+        'help': "reseed the generators before each of the runs, using the " +
+                "same seeds for all bots (common random numbers)"
+    }),
+    (('-ad', '--adaptive'), {
+        'type': float,
+        'default': 0.,
+        'help': "add runs of a variation only until its score difference " +
+                "with the parent is that many standard errors from zero " +
+                "(0 = disabled)"
+    }),
+    (('-j', '--jobs'), {
+        'type': int,
+        'default': 1,
+        'help': "number of worker processes evaluating bots in parallel"
+    }),
+    (('-c', '--candidates'), {
+        'type': int,
+        'default': 1,
+        'help': "count of variations to try at each step of a mutating " +
+                "trainer (the best one is then considered)"
+    }),
+    (('-in', '--incremental'), {
+        'type': int,
+        'default': 0,
+        'help': "evaluate variations incrementally, with checkpoints every " +
+                "that many steps (0 = disabled)"
+    }),
+    (('-sc', '--score_cache'), {
+        'action': 'store_true',
+        'default': False,
+        'help': "store scores of deterministic bots in params/scores, " +
+                "reusing them in following sessions"
+    }),
+    (('-ab', '--abort'), {
+        'type': int,
+        'default': 0,
+        'help': "compare variations with their parent every that many " +
+                "steps, aborting hopeless ones early (0 = disabled)"
+    }),
+    (('-am', '--abort_margin'), {
+        'type': float,
+        'default': 0.,
+        'help': "how far below the parent's intermediate score a variation " +
+                "may fall before it is aborted"
+    }),
+    (('-pr', '--profile'), {
+        'action': 'store_true',
+        'default': False,
+        'help': "measure time spent in stages of the session, storing " +
+                "the breakdown in the history"
+    }),
     (('-s', '--prngs_seed'), {
         'type': int,
         'default': None,
@@ -225,6 +335,22 @@ if __name__ == '__main__':
         args.random_seeds = [1, 1]
     args.random_seeds_pool = args.random_seeds.pop(0)
     args.random_seeds = args.random_seeds[0] if args.random_seeds else 1
+    if not 0 <= args.screening <= 1:
+        raise ValueError("--screening takes a level fraction in [0, 1]")
+    if args.adaptive < 0:
+        raise ValueError("--adaptive takes a non-negative threshold")
+    if args.jobs < 1 or args.candidates < 1:
+        raise ValueError("--jobs and --candidates should be positive")
+    if args.incremental < 0:
+        raise ValueError("--incremental takes a non-negative step interval")
+    if args.incremental and args.jobs > 1:
+        raise ValueError("Incremental evaluation can only use a single job")
+    if args.incremental and args.runs > 1:
+        raise ValueError("Incremental evaluation can only use a single run")
+    if args.abort < 0 or args.abort_margin < 0:
+        raise ValueError("--abort and --abort_margin should be non-negative")
+    if args.abort and args.incremental:
+        raise ValueError("Cannot combine --abort with --incremental")
     if args.random_seeds_pool < args.random_seeds:
         raise ValueError("Cannot choose {random_seeds} seeds from a pool of " +
                          "just {random_seeds_pool}".format(**args))
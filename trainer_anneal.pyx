@@ -25,6 +25,10 @@ anew).
 Two probability distributions are used: --dist_variations controls the number
 of parameters changed at once at each step, and --dist_acceptance decides
 whether to continue with a mutated bot or keep the previous one.
+
+With --candidates greater than one, a few variations of the current parameters
+are evaluated at each step (possibly in parallel, see --jobs), and only the
+best of them is compared with the current set.
 """
 from cython import ccall, cclass, returns
 
@@ -42,22 +46,19 @@ class Trainer(TrainerLocal):
     @ccall
     @returns('tuple')
     def train(self):
-        variations_dist = self.dists['variations']
         acceptance_dist = self.dists['acceptance']
         best_score = float('-inf')
         best_bot = None
         best_history = []
 
-        for bot, history in self.seeds:
-            best_seed_score = bot.evaluate(self.runs)
+        seed_scores = self.evaluate([s[0] for s in self.seeds])
+
+        for (bot, history), best_seed_score in zip(self.seeds, seed_scores):
             best_seed_bot = bot
 
             for step in range(self.steps):
-                bot = best_seed_bot.clone(state=False)
                 change = self.change
-                variations = max(1, round(variations_dist.rvs()))
-                bot.vary_params(self.dists, self.emphases, change, variations)
-                score = bot.evaluate(self.runs)
+                score, bot = self.best_variation(best_seed_bot, change)
                 improvement = score - best_seed_score
                 mult = pow(1 - float(step) / self.steps, self.acceptance_ease)
                 if acceptance_dist.rvs() * mult < improvement:
@@ -1,8 +1,15 @@
+from bot_base cimport BaseBot
+
+
 cdef class BaseTrainer:
     cdef:
         dict level, dists
         tuple emphases
         tuple seeds
         int runs
+        object evaluator
+        int candidates
 
+    cpdef list evaluate(self, list bots, BaseBot parent=?)
+    cpdef tuple best_variation(self, BaseBot bot, float change)
     cpdef tuple train(self)
@@ -1,5 +1,8 @@
 from cython import ccall, cclass, locals, returns
 
+from evaluator import Evaluator
+from profiler cimport enabled, note, now
+
 
 @cclass
 class BaseTrainer:
@@ -9,12 +12,17 @@ class BaseTrainer:
     Trainer subclasses ought to provide a configuration specification as an
     "arguments" attribute. Each entry of the sequence should be a pair of a
     property name and a function to parse the value for it.
+
+    Bots should be scored through evaluate(), rather than by calling their
+    evaluate() directly, so that a whole batch of bots may be played in
+    parallel.
     """
     arguments = ()
 
     @locals(level='dict', config='tuple', dists='dict', emphases='tuple',
-            seeds='tuple', runs='int')
-    def __init__(self, level, config, dists, emphases, seeds, runs):
+            seeds='tuple', runs='int', evaluator='object', candidates='int')
+    def __init__(self, level, config, dists, emphases, seeds, runs,
+                 evaluator=None, candidates=1):
         """
         Initializes the trainer for the given level and configuration.
 
@@ -31,12 +39,21 @@ class BaseTrainer:
 
         Runs is a number of times the level should be played with each
         parameters to average out bot's randomness.
+
+        The evaluator is used to score batches of bots, by default bots are
+        evaluated serially in the current process. Candidates is the number of
+        variations to try at each step by trainers that mutate parameters (it
+        is most useful with a parallel evaluator).
         """
         self.level = level
         self.dists = dists
         self.emphases = emphases
         self.seeds = seeds
         self.runs = runs
+        if evaluator is None:
+            evaluator = Evaluator(level, runs)
+        self.evaluator = evaluator
+        self.candidates = candidates
 
         arguments_desc = ", ".join("{}: {}".format(n, t.__name__)
                                    for n, t in self.arguments)
@@ -47,6 +64,46 @@ class BaseTrainer:
         for (arg, parser), value in zip(self.arguments, config):
             setattr(self, arg, parser(value))
 
+    @ccall
+    @returns('list')
+    @locals(bots='list', parent='BaseBot', start='double', scores='list')
+    def evaluate(self, bots, parent=None):
+        """
+        Scores a batch of bots, returns a list of their scores.
+
+        If all bots are fresh variations of a single bot, it may be given as
+        the parent, letting the evaluator reuse the parent's playthrough.
+        """
+        if not enabled:
+            return self.evaluator.evaluate(bots, parent)
+        start = now()
+        scores = self.evaluator.evaluate(bots, parent)
+        note('evaluate', start, len(bots))
+        return scores
+
+    @ccall
+    @returns('tuple')
+    @locals(bot='BaseBot', change='float', candidate='int', variations='int',
+            bots='list', scores='list', best='int')
+    def best_variation(self, bot, change):
+        """
+        Varies a number of copies of the bot and returns the best one along
+        with its score (as a tuple of score and bot).
+
+        The number of parameter changes for each candidate is drawn from the
+        variations distribution.
+        """
+        variations_dist = self.dists['variations']
+        bots = []
+        for candidate in range(self.candidates):
+            bots.append(bot.clone(state=False))
+            variations = max(1, round(variations_dist.rvs()))
+            bots[candidate].vary_params(self.dists, self.emphases, change,
+                                        variations)
+        scores = self.evaluate(bots, bot)
+        best = max(range(self.candidates), key=scores.__getitem__)
+        return scores[best], bots[best]
+
     @ccall
     @returns('tuple')
     def train(self):
@@ -0,0 +1,8 @@
+from trainer_base cimport BaseTrainer
+
+
+cdef class Trainer(BaseTrainer):
+    cdef:
+        public int generations
+        public int population
+        public float sigma
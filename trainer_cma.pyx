@@ -0,0 +1,123 @@
+"""
+A separable (diagonal) covariance matrix adaptation evolution strategy.
+
+Rather than mutating a single parameter set, the trainer keeps a multivariate
+normal distribution over all parameter entries that may be varied, with a
+diagonal covariance, so its cost stays linear in the number of entries. Every
+generation a population of parameter sets is sampled at once (and evaluated
+as a single batch, possibly in parallel, see --jobs), the mean is moved to a
+weighted average of the better half, and the step size and the per-entry
+variances are adapted from the evolution paths [Ros, Hansen 2008].
+
+The config should consist of three values: the number of generations
+(integer), the population size (integer, at least 2, or 0 for the default of
+4 + 3 ln n for n entries) and the initial step size (float).
+
+The mean starts from the best of the seeds (thus --stored_seeds can be used
+to continue from a stored set), frozen parameters are not varied, and the
+initial deviations of entries follow the emphases (as in new_params()).
+"""
+from libc.math cimport pow, sqrt
+
+from cython import ccall, cclass, locals, returns
+from numpy import arange, argsort, exp, log, sqrt as nsqrt, zeros
+from numpy.linalg import norm as length
+from scipy.stats import norm
+
+from bot_base cimport BaseBot
+from trainer_base cimport BaseTrainer
+
+
+@cclass
+class Trainer(BaseTrainer):
+    arguments = (
+        ('generations', int),
+        ('population', int),
+        ('sigma', float)
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.population < 0 or self.population == 1:
+            # The better half of the population should not be empty.
+            raise ValueError("The population should be at least 2 (or 0 for "
+                             "the default)")
+
+    @ccall
+    @returns('tuple')
+    @locals(entries='int', population='int', parents='int',
+            generation='int', best_score='float', best_bot='BaseBot',
+            mean_bot='BaseBot', bot='BaseBot', bots='list', scores='list',
+            sigma='double', mueff='double', cc='double', cs='double',
+            c1='double', cmu='double', damps='double', chin='double',
+            hsig='bint')
+    def train(self):
+        seed_scores = self.evaluate([s[0] for s in self.seeds])
+        best = max(range(len(self.seeds)), key=seed_scores.__getitem__)
+        mean_bot, best_history = self.seeds[best]
+        best_score = seed_scores[best]
+        best_bot = mean_bot
+
+        mean = mean_bot.param_vector()
+        entries = mean.shape[0]
+        if entries == 0:
+            return best_bot.params, best_history
+        population = self.population
+        if population <= 0:
+            population = 4 + int(3 * log(entries))
+        parents = population // 2
+        weights = log(parents + .5) - log(arange(1, parents + 1))
+        weights /= weights.sum()
+        mueff = 1 / (weights ** 2).sum()
+
+        # Learning rates for the separable variant.
+        cc = (4 + mueff / entries) / (entries + 4 + 2 * mueff / entries)
+        cs = (mueff + 2) / (entries + mueff + 5)
+        c1 = 2 / ((entries + 1.3) ** 2 + mueff)
+        cmu = min(1 - c1, 2 * (mueff - 2 + 1 / mueff) /
+                          ((entries + 2) ** 2 + mueff))
+        c1 = min(1., c1 * (entries + 2) / 3)
+        cmu = min(1 - c1, cmu * (entries + 2) / 3)
+        damps = 1 + 2 * max(0, sqrt((mueff - 1) / (entries + 1)) - 1) + cs
+        chin = sqrt(entries) * (1 - 1 / (4 * entries) +
+                                1 / (21 * entries ** 2))
+
+        sigma = self.sigma
+        deviations = mean_bot.emphasized_multipliers(self.emphases).astype(
+                                                                        'f8')
+        variances = deviations ** 2
+        path_c = zeros(entries)
+        path_s = zeros(entries)
+        normal = self.dists.get('normal', norm())
+
+        for generation in range(self.generations):
+            samples = normal.rvs(size=(population, entries))
+            steps = samples * deviations
+            bots = []
+            for values in mean + sigma * steps:
+                bot = mean_bot.clone(state=False)
+                bot.set_param_vector(values)
+                bots.append(bot)
+            scores = self.evaluate(bots)
+            order = argsort(scores)[::-1]
+            if scores[order[0]] > best_score:
+                best_score = scores[order[0]]
+                best_bot = bots[order[0]]
+
+            step = weights.dot(steps[order[:parents]])
+            mean = mean + sigma * step
+            path_s = ((1 - cs) * path_s + sqrt(cs * (2 - cs) * mueff) *
+                      weights.dot(samples[order[:parents]]))
+            hsig = (length(path_s) /
+                    sqrt(1 - pow(1 - cs, 2 * (generation + 1))) / chin <
+                    1.4 + 2 / (entries + 1))
+            path_c = ((1 - cc) * path_c +
+                      hsig * sqrt(cc * (2 - cc) * mueff) * step)
+            variances = ((1 - c1 - cmu) * variances +
+                         c1 * (path_c ** 2 +
+                               (1 - hsig) * cc * (2 - cc) * variances) +
+                         cmu * weights.dot(steps[order[:parents]] ** 2))
+            deviations = nsqrt(variances)
+            sigma *= exp(cs / damps * (length(path_s) / chin - 1))
+
+        return best_bot.params, best_history
@@ -22,6 +22,8 @@ class Trainer(TrainerComb):
         best_score = float('-inf')
         best_combined_params = {}
         best_history = []
+        combinations = []
+        combined_bots = []
 
         for seeds in product(enumerate(self.seeds), repeat=len(self.phases)):
             indices, seeds = zip(*seeds)
@@ -33,8 +35,13 @@ class Trainer(TrainerComb):
                 combined_params[key] = concatenate(params, axis=-1)
             combined_params['_phases'] = self.phases
 
-            bot = target_class(self.level, combined_params)
-            score = bot.evaluate(self.runs)
+            combinations.append((indices, histories, combined_params))
+            combined_bots.append(target_class(self.level, combined_params))
+
+        scores = self.evaluate(combined_bots)
+
+        for (indices, histories, combined_params), score in zip(combinations,
+                                                                scores):
             print(indices, score)
 
             if score > best_score:
@@ -8,6 +8,10 @@ are kept, otherwise the old set is preserved.
 The config should consist of an integer and a float, the number of steps and
 the variation scale respectively. Moreover, --dist_variations can be used to
 control the count of parameter variations to try at once at each step.
+
+With --candidates greater than one, a few variations of the current parameters
+are evaluated at each step (possibly in parallel, see --jobs), and only the
+best of them is compared with the current set.
 """
 from cython import ccall, cclass, returns
 
@@ -24,21 +28,18 @@ class Trainer(BaseTrainer):
     @ccall
     @returns('tuple')
     def train(self):
-        variations_dist = self.dists['variations']
         best_score = float('-inf')
         best_bot = None
         best_history = []
 
-        for bot, history in self.seeds:
-            best_seed_score = bot.evaluate(self.runs)
+        seed_scores = self.evaluate([s[0] for s in self.seeds])
+
+        for (bot, history), best_seed_score in zip(self.seeds, seed_scores):
             best_seed_bot = bot
 
             for step in range(self.steps):
-                bot = best_seed_bot.clone(state=False)
                 change = self.change
-                variations = max(1, round(variations_dist.rvs()))
-                bot.vary_params(self.dists, self.emphases, change, variations)
-                score = bot.evaluate(self.runs)
+                score, bot = self.best_variation(best_seed_bot, change)
                 if score > best_seed_score:
                     best_seed_score = score
                     best_seed_bot = bot
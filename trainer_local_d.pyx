@@ -24,22 +24,19 @@ class Trainer(BaseTrainer):
     @ccall
     @returns('tuple')
     def train(self):
-        variations_dist = self.dists['variations']
         change_diff = (self.change_high - self.change_low) / self.steps
         best_score = float('-inf')
         best_bot = None
         best_history = []
 
-        for bot, history in self.seeds:
-            best_seed_score = bot.evaluate(self.runs)
+        seed_scores = self.evaluate([s[0] for s in self.seeds])
+
+        for (bot, history), best_seed_score in zip(self.seeds, seed_scores):
             best_seed_bot = bot
 
             for step in range(self.steps):
-                bot = best_seed_bot.clone(state=False)
                 change = self.change_high - change_diff * step
-                variations = max(1, round(variations_dist.rvs()))
-                bot.vary_params(self.dists, self.emphases, change, variations)
-                score = bot.evaluate(self.runs)
+                score, bot = self.best_variation(best_seed_bot, change)
                 if score > best_seed_score:
                     best_seed_score = score
                     best_seed_bot = bot
@@ -21,8 +21,9 @@ class Trainer(BaseTrainer):
         best_bot = None
         best_history = []
 
-        for bot, history in self.seeds:
-            score = bot.evaluate(self.runs)
+        scores = self.evaluate([s[0] for s in self.seeds])
+
+        for (bot, history), score in zip(self.seeds, scores):
             if score > best_score:
                 best_score = score
                 best_bot = bot
@@ -0,0 +1,10 @@
+from trainer_base cimport BaseTrainer
+
+
+cdef class Trainer(BaseTrainer):
+    cdef:
+        public int chains
+        public int rounds
+        public int steps
+        public float change
+        public float acceptance_scale
@@ -0,0 +1,194 @@
+"""
+Parallel tempering (replica exchange) of annealing chains.
+
+A number of chains run simultaneously, each doing anneal-like steps: a few
+parameter entries are redrawn and the variation is accepted if its score gain
+is greater than a threshold drawn from --dist_acceptance and multiplied by the
+chain's acceptance scale. The scales grow linearly from 0 for the first chain
+(that only accepts improvements, as local does) to the configured scale for the
+last one. After each round of steps, neighbouring chains propose to exchange
+their parameter sets, so that good sets found by the hotter chains sink down
+to the colder ones, and the colder ones can escape local maxima.
+
+The config should consist of five values: the number of chains (integer), the
+number of rounds (integer), the number of steps per round (integer), the
+variation scale (float) and the acceptance scale of the hottest chain (float).
+
+With more than one job (see --jobs), chains are run in a pool of worker
+processes, each of which loads the level and rebuilds the bot once, so that
+chains travel to the workers just as buffers of varied parameter entries (and
+their scores), and come back as the changes made to the entries (see
+BaseBot.param_deltas). Chain steps are evaluated with --runs, but without the
+score cache or the other evaluation options.
+"""
+from multiprocessing import Pool, current_process
+from operator import itemgetter
+
+from cython import ccall, cclass, locals, returns
+from numpy.random import randint
+
+from bot_base cimport BaseBot
+from iop import load_level
+from prngs import pool_dists, seed_prngs, unpool_dists
+from trainer_base cimport BaseTrainer
+
+# The bot that chains are rebuilt from, with the distributions, emphases and
+# runs for their steps (one set for each worker).
+chain_bot = None
+chain_dists = None
+chain_emphases = None
+chain_runs = 1
+
+
+def init_chains(bot, dists, emphases, runs, seed, stream=0):
+    """
+    Sets the bot that chains are rebuilt from, with the distributions (pooled
+    with a seed and stream of their own) and emphases for its variations.
+    """
+    global chain_bot, chain_dists, chain_emphases, chain_runs
+    chain_bot = bot
+    chain_dists = pool_dists(dists, seed, stream)
+    chain_emphases = emphases
+    chain_runs = runs
+
+
+@locals(bot='BaseBot')
+def init_chain_worker(level_key, bot_class, params, param_freeze, multipliers,
+                      dists, emphases, runs, seed):
+    """
+    Loads the level and rebuilds the bot in a newly started worker process.
+
+    The bot's parameter multipliers should be given, as some bots set them
+    when generating new parameters (and they scale the variations).
+
+    Each worker gets generators of its own, derived from the seed.
+    """
+    worker_index = current_process()._identity[0]
+    seed_prngs((seed + worker_index) % 2 ** 32)
+    level = load_level(level_key, 0)
+    bot = bot_class(level, params, param_freeze=param_freeze)
+    bot.param_multipliers.update(multipliers)
+    bot.entry_multipliers = bot.emphasized_multipliers(emphases)
+    bot.param_emphases = emphases
+    init_chains(bot, dists, emphases, runs, seed, worker_index)
+
+
+@locals(task='tuple', steps='int', change='float', scale='float',
+        score='float', step='int', variations='int', variation_score='float',
+        bot='BaseBot', variation='BaseBot', deltas='dict')
+def run_chain(task):
+    """
+    Makes the steps of a chain, starting from a parameter entries buffer and
+    its score, returns the changes made to the buffer (as a deltas dict) and
+    the final score (and the number of accepted variations).
+    """
+    values, score, steps, change, scale = task
+    bot = chain_bot.clone(state=False)
+    bot.set_param_vector(values)
+    deltas = {}
+    accepted = 0
+    for step in range(steps):
+        variation = bot.clone(state=False)
+        variations = max(1, round(chain_dists['variations'].rvs()))
+        variation.vary_params(chain_dists, chain_emphases, change, variations)
+        variation_score = variation.evaluate(chain_runs)
+        if (chain_dists['acceptance'].rvs() * scale <
+                variation_score - score):
+            bot = variation
+            score = variation_score
+            deltas.update(variation.param_deltas)
+            accepted += 1
+    return deltas, score, accepted
+
+
+@locals(bot='BaseBot', deltas='dict', changed='BaseBot')
+def apply_chain(bot, deltas):
+    """
+    Returns a clone of the bot with the changes made by a chain applied.
+    """
+    changed = bot.clone(state=False)
+    changed.apply_deltas(deltas)
+    return changed
+
+
+@cclass
+class Trainer(BaseTrainer):
+    arguments = (
+        ('chains', int),
+        ('rounds', int),
+        ('steps', int),
+        ('change', float),
+        ('acceptance_scale', float)
+    )
+
+    @ccall
+    @returns('tuple')
+    @locals(bot='BaseBot', seed='long', scales='list', states='list',
+            tasks='list', results='list', round_='int', chain='int',
+            gain='float', chain_start='BaseBot')
+    def train(self):
+        acceptance_dist = self.dists['acceptance']
+        seed_scores = self.evaluate([s[0] for s in self.seeds])
+        order = sorted(range(len(self.seeds)), key=seed_scores.__getitem__,
+                       reverse=True)
+        bot = self.seeds[order[0]][0]
+        if self.chains < 2:
+            scales = [0.]
+        else:
+            scales = [self.acceptance_scale * c / (self.chains - 1)
+                      for c in range(self.chains)]
+        # Each state is a tuple of a clone of the bot with the chain's
+        # parameter entries, score and history.
+        states = []
+        for chain in range(self.chains):
+            index = order[chain % len(order)]
+            chain_start = bot.clone(state=False)
+            chain_start.set_param_vector(self.seeds[index][0].param_vector())
+            states.append((chain_start, seed_scores[index],
+                           self.seeds[index][1]))
+        best = max(states, key=itemgetter(1))
+
+        uniform = self.dists.get('uniform')
+        seed = (randint(2 ** 32) if uniform is None else
+                int(uniform.rvs() * 2 ** 32))
+        dists = unpool_dists(self.dists)
+        jobs = min(self.evaluator.jobs, self.chains)
+        if jobs > 1:
+            pool = Pool(jobs, init_chain_worker,
+                        (self.level['key'], type(bot), bot.params,
+                         bot.frozen_keys(), bot.param_multipliers, dists,
+                         self.emphases, self.runs, seed))
+        else:
+            pool = None
+            init_chains(bot, dists, self.emphases, self.runs, seed)
+
+        try:
+            for round_ in range(self.rounds):
+                tasks = [(state[0].param_vector().astype('f4'), state[1],
+                          self.steps, self.change, scale)
+                         for state, scale in zip(states, scales)]
+                if pool is None:
+                    results = [run_chain(task) for task in tasks]
+                else:
+                    results = pool.map(run_chain, tasks)
+                self.evaluator.evaluations += self.chains * self.steps
+                self.evaluator.steps += (self.chains * self.steps * self.runs *
+                                         self.level['steps'])
+                states = [(apply_chain(state[0], deltas), score, state[2])
+                          for (deltas, score, _), state in zip(results,
+                                                               states)]
+                best = max(states + [best], key=itemgetter(1))
+
+                # Exchanges between even or odd neighbours, alternately.
+                for chain in range(round_ % 2, self.chains - 1, 2):
+                    gain = states[chain + 1][1] - states[chain][1]
+                    if (acceptance_dist.rvs() *
+                            (scales[chain + 1] - scales[chain]) < gain):
+                        states[chain], states[chain + 1] = (states[chain + 1],
+                                                            states[chain])
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        return best[0].params, best[2]
@@ -90,6 +90,8 @@ if __name__ == '__main__':
                     named_seeds[index] = "{}_{}".format(record['bot'], seed)
                 elif seed.startswith('linear_1'):
                     named_seeds[index] = "linear{}".format(seed[8:])
+            if 'screening' not in record:
+                record['screening'] = ()
             if 'param_map' not in record:
                 record['param_map'] = record.get('params_map', {})
             for key, new_keys in record['param_map'].items():
@@ -107,6 +109,20 @@ if __name__ == '__main__':
                 record['scores'] = odict(train=score)
             elif isinstance(record['scores'], tuple):
                 record['scores'] = odict(train=record['scores'][0])
+            if 'common' not in record:
+                record['common'] = False
+            if 'adaptive' not in record:
+                record['adaptive'] = (0., 0, 0)
+            if 'candidates' not in record:
+                record['candidates'] = 1
+            if 'incremental' not in record:
+                record['incremental'] = 0
+            if 'score_cache' not in record:
+                record['score_cache'] = False
+            if 'abort' not in record:
+                record['abort'] = (0, 0., 0)
+            if 'profile' not in record:
+                record['profile'] = None
             if 'prngs_seed' not in record:
                 record['prngs_seed'] = record.get('rand_seed', '---')
 